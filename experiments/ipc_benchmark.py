@@ -0,0 +1,69 @@
+# IPC overhead of sending a catalog of light curves to worker processes.
+#
+# Compares the bytes pickled per chunk and the wall time of
+# FeatureSpace.extract_batch with threads, with processes receiving pickled
+# copies of the chunks and with processes receiving memory mapped chunks
+# (LightCurveBatch.memmap). Usage:
+#
+#     python ipc_benchmark.py [n_curves] [n_points] [n_jobs]
+
+import sys
+import time
+import pickle
+
+import numpy as np
+
+import joblib
+
+import feets
+from feets.batch import LightCurveBatch
+
+
+n_curves = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+n_points = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+n_jobs = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+
+# the cheapest features, so the transfer dominates
+space = feets.FeatureSpace(only=["Mean", "Std", "Meanvariance", "Skew"])
+
+rand = np.random.RandomState(42)
+size = n_curves * n_points
+batch = LightCurveBatch(
+    offsets=np.arange(0, size + 1, n_points),
+    time=np.tile(np.arange(n_points, dtype=float), n_curves),
+    magnitude=rand.normal(size=size),
+    error=rand.uniform(0.01, 0.1, size=size))
+print("catalog: {} curves x {} points ({:.1f} MB)".format(
+    n_curves, n_points, 3 * size * 8 / 1e6))
+
+
+def extract_copy(space, chunk):
+    return space.extract_batch(chunk)[1]
+
+
+def timeit(label, func, repeat=3):
+    # best of repeat, the first run also pays the start of the workers
+    best = np.inf
+    for _ in range(repeat):
+        start = time.time()
+        func()
+        best = min(best, time.time() - start)
+    print("{:<30} {:8.3f} s".format(label, best))
+
+
+bounds = np.linspace(0, n_curves, n_jobs + 1).astype(int)
+slices = [slice(*b) for b in zip(bounds[:-1], bounds[1:])]
+
+# bytes of one chunk; a memory mapped chunk only sends the file name, the
+# offset and the shape of every buffer
+print("pickled chunk: {:.1f} MB".format(len(pickle.dumps(
+    batch[slices[0]], protocol=pickle.HIGHEST_PROTOCOL)) / 1e6))
+
+timeit("serial", lambda: space.extract_batch(batch))
+timeit("threads", lambda: space.extract_batch(batch, n_jobs=n_jobs))
+timeit("processes (pickled copies)", lambda: joblib.Parallel(
+    n_jobs=n_jobs, backend="loky", max_nbytes=None)(
+        joblib.delayed(extract_copy)(space, batch.take(
+            np.arange(sl.start, sl.stop))) for sl in slices))
+timeit("processes (memmap)", lambda: space.extract_batch(
+    batch, n_jobs=n_jobs, backend="loky"))
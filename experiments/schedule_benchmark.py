@@ -0,0 +1,77 @@
+# Tail latency of a whole catalog with quadratic extractors, splitting the
+# batch in contiguous chunks or with the cost aware schedule
+# (FeatureSpace.extract_batch(schedule=...)).
+#
+# The time of every light curve is measured serially and the makespan of
+# both schedules with n_jobs workers is simulated from these times (so the
+# result doesn't depend on the free CPUs); with --run the parallel
+# extraction is also timed. Usage:
+#
+#     python schedule_benchmark.py [n_curves] [n_jobs] [--run]
+
+import sys
+import time
+import heapq
+
+import numpy as np
+
+import feets
+from feets.batch import LightCurveBatch
+
+
+args = [a for a in sys.argv[1:] if not a.startswith("--")]
+n_curves = int(args[0]) if len(args) > 0 else 200
+n_jobs = int(args[1]) if len(args) > 1 else 8
+run = "--run" in sys.argv
+
+dmdt = feets.extractors.DeltamDeltat.get_features()
+space = feets.FeatureSpace(
+    only=["Mean", "Std", "Skew", "SlottedA_length"] + sorted(dmdt))
+
+# log-uniform lengths between 30 and 1500 observations, the long curves
+# clustered at the end of the catalog (as when it's sorted by survey)
+rand = np.random.RandomState(42)
+lengths = np.sort(np.exp(
+    rand.uniform(np.log(30), np.log(1500), n_curves)).astype(int))
+lcs = []
+for size in lengths:
+    t = np.sort(rand.uniform(0, 1000, size))
+    lcs.append({
+        "time": t, "magnitude": np.sin(t / 7.) + rand.normal(0, .1, size),
+        "error": rand.uniform(0.01, 0.1, size)})
+batch = LightCurveBatch.from_lightcurves(lcs)
+print("catalog: {} curves, {} observations, {} jobs".format(
+    n_curves, lengths.sum(), n_jobs))
+
+times = np.empty(n_curves)
+for idx in range(n_curves):
+    start = time.time()
+    space.extract_batch(batch[idx:idx + 1])
+    times[idx] = time.time() - start
+print("{:<26} {:8.2f} s".format("serial", times.sum()))
+print("{:<26} {:8.2f} s".format("ideal", times.sum() / n_jobs))
+
+
+def simulate(tasks):
+    # the tasks are dispatched in order to the first free worker; returns
+    # the finish time of every worker
+    workers = [0.] * n_jobs
+    for task in tasks:
+        heapq.heappush(workers, heapq.heappop(workers) + times[task].sum())
+    return sorted(workers)
+
+
+for schedule in ("contiguous", "cost"):
+    finish = simulate(space._schedule(batch, n_jobs, schedule))
+    print("{:<26} {:8.2f} s  (first worker idle at {:.2f} s)".format(
+        schedule + " (simulated)", finish[-1], finish[0]))
+
+if run:
+    # warm up the workers
+    space.extract_batch(batch[:n_jobs], n_jobs=n_jobs, backend="loky")
+    for schedule in ("contiguous", "cost"):
+        start = time.time()
+        space.extract_batch(
+            batch, n_jobs=n_jobs, backend="loky", schedule=schedule)
+        print("{:<26} {:8.2f} s".format(
+            schedule + " (loky)", time.time() - start))
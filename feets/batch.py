@@ -0,0 +1,970 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# The MIT License (MIT)
+
+# Copyright (c) 2017 Juan Cabral
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# =============================================================================
+# FUTURE
+# =============================================================================
+
+from __future__ import unicode_literals
+
+
+# =============================================================================
+# DOCS
+# =============================================================================
+
+__doc__ = """Ragged batches of light curves and segment reduction kernels.
+
+A batch stores every light curve of a catalog concatenated in one flat buffer
+per data vector (``time``, ``magnitude``, ``error``, etc.) plus an array of
+offsets that delimits every curve. Curve ``i`` of the data ``d`` lives in
+``buffer[offsets[i]:offsets[i + 1]]``, so no padding is needed for curves
+of different length.
+
+"""
+
+__all__ = [
+    "LightCurveBatch",
+    "segment_ids",
+    "segment_lengths",
+    "segment_broadcast",
+    "segment_sum",
+    "segment_mean",
+    "segment_std",
+    "segment_max",
+    "segment_min",
+    "segment_sort",
+    "segment_is_sorted",
+    "segment_take",
+    "segment_median",
+    "segment_slice_median",
+    "segment_percentile",
+    "segment_diff",
+    "window_bounds",
+    "window_source",
+    "window_sum",
+    "window_mean",
+    "window_moments",
+    "window_covariance",
+    "balanced_tasks",
+    "shared_folder"]
+
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+import os
+import tempfile
+
+import numpy as np
+
+import six
+
+from .extractors.core import (
+    DATAS, DATA_GROUPS, DATA_TIME, DATA_MAGNITUDE, DATA_ERROR,
+    DATA_ALIGNED_TIME)
+from .utils import is_narrow_dtype, is_sorted
+
+
+# =============================================================================
+# SEGMENT KERNELS
+# =============================================================================
+
+def segment_lengths(offsets):
+    """Number of elements of every segment."""
+    return np.diff(offsets)
+
+
+def segment_ids(offsets):
+    """The index of the segment of every element of the buffer."""
+    lengths = segment_lengths(offsets)
+    return np.repeat(np.arange(len(lengths)), lengths)
+
+
+def segment_broadcast(values, offsets):
+    """Repeat one value per segment to the size of the buffer."""
+    return np.repeat(values, segment_lengths(offsets))
+
+
+def segment_sum(values, offsets):
+    """Sum of every segment (all the segments must be non empty)."""
+    return np.add.reduceat(values, offsets[:-1])
+
+
+def segment_max(values, offsets):
+    """Maximum of every segment (all the segments must be non empty)."""
+    return np.maximum.reduceat(values, offsets[:-1])
+
+
+def segment_min(values, offsets):
+    """Minimum of every segment (all the segments must be non empty)."""
+    return np.minimum.reduceat(values, offsets[:-1])
+
+
+def segment_mean(values, offsets):
+    """Mean of every segment (all the segments must be non empty)."""
+    return segment_sum(values, offsets) / segment_lengths(offsets)
+
+
+def segment_std(values, offsets, ddof=0):
+    """Standard deviation of every segment (same semantic as ``np.std``,
+    all the segments must be non empty).
+
+    """
+    mean = segment_broadcast(segment_mean(values, offsets), offsets)
+    sqdev = segment_sum((values - mean) ** 2, offsets)
+    return np.sqrt(sqdev / (segment_lengths(offsets) - ddof))
+
+
+def segment_sort(values, offsets):
+    """Sort the values inside every segment. The segments keep their
+    position inside the buffer.
+
+    """
+    order = np.lexsort((values, segment_ids(offsets)))
+    return values[order]
+
+
+def segment_is_sorted(values, offsets):
+    """A boolean per segment, True if the values of the segment are sorted
+    in ascending order (a single pass over the buffer, without sorting).
+
+    """
+    ids = segment_ids(offsets)
+    unsorted = np.flatnonzero(~(values[1:] >= values[:-1]))
+    # the comparisons between the last value of a segment and the first
+    # of the next one are ignored
+    unsorted = unsorted[ids[unsorted] == ids[unsorted + 1]]
+    result = np.ones(len(offsets) - 1, dtype=bool)
+    result[ids[unsorted]] = False
+    return result
+
+
+def segment_take(values, offsets, positions):
+    """Take the element at ``positions`` (relative to the start of every
+    segment) of every segment.
+
+    """
+    return values[offsets[:-1] + positions]
+
+
+def segment_slice_median(sorted_values, offsets, start, size):
+    """Median of the ``size`` elements that begins at ``start`` (relative to
+    the start of every segment) of an already segment-sorted buffer.
+
+    """
+    low = segment_take(sorted_values, offsets, start + (size - 1) // 2)
+    high = segment_take(sorted_values, offsets, start + size // 2)
+    return (low + high) / 2.
+
+
+def segment_median(sorted_values, offsets):
+    """Median of every segment of an already segment-sorted buffer."""
+    return segment_slice_median(
+        sorted_values, offsets, 0, segment_lengths(offsets))
+
+
+def segment_percentile(sorted_values, offsets, q):
+    """The ``q``-th percentile of every segment of an already segment-sorted
+    buffer, with the same linear interpolation as ``np.percentile``.
+
+    """
+    lengths = segment_lengths(offsets)
+    position = (lengths - 1) * (q / 100.)
+    low = np.floor(position).astype(int)
+    high = np.ceil(position).astype(int)
+    fraction = position - low
+    vlow = segment_take(sorted_values, offsets, low)
+    vhigh = segment_take(sorted_values, offsets, high)
+    return vlow + (vhigh - vlow) * fraction
+
+
+def segment_diff(values, offsets):
+    """Consecutive differences inside every segment.
+
+    Returns
+    -------
+
+    diffs : ndarray
+        The differences ``values[i + 1] - values[i]`` that not cross the
+        boundary of a segment.
+    diff_offsets : ndarray
+        The offsets of the segments inside ``diffs`` (every segment loses
+        one element).
+
+    """
+    diffs = values[1:] - values[:-1]
+    valid = np.ones(len(diffs), dtype=bool)
+    valid[offsets[1:-1] - 1] = False
+    diff_offsets = offsets - np.arange(len(offsets))
+    return diffs[valid], diff_offsets
+
+
+def _gather(starts, lengths):
+    # the positions in a buffer of the ranges [start, start + length) one
+    # after the other, and the offsets of every range in the result
+    offsets = np.concatenate(([0], np.cumsum(lengths))).astype(np.int64)
+    positions = (
+        np.repeat(starts - offsets[:-1], lengths) + np.arange(offsets[-1]))
+    return positions, offsets
+
+
+def window_bounds(time, window, stride=None, by="time"):
+    """The observations of every sliding window over a light curve.
+
+    Parameters
+    ----------
+
+    time : array-like
+        The sorted times of the light curve.
+    window : float or int
+        The length of the windows, in time units or in number of
+        observations (see ``by``).
+    stride : float or int, optional
+        The distance between the begin of two consecutive windows. By
+        default is the same as ``window`` (non overlapped windows).
+    by : "time" or "points", default "time"
+        If the windows are measured in time or in observations. The
+        windows without observations are discarded.
+
+    Returns
+    -------
+
+    starts, stops : ndarray
+        The window ``i`` are the observations ``starts[i]:stops[i]``. The
+        windows are added until one reaches the last observation, so every
+        observation is in some window (unless ``stride`` is greater than
+        ``window``) and the last window can be shorter than the rest. If
+        the light curve is shorter than the window, there is only one
+        window with all the observations.
+
+    """
+    time = np.asarray(time)
+    stride = window if stride is None else stride
+    if by == "points":
+        window, stride = int(window), int(stride)
+    if window <= 0 or stride <= 0:
+        raise ValueError("'window' and 'stride' must be positive")
+
+    # the last window is the first one that reaches the end of the curve
+    if by == "points":
+        last = max(len(time) - window, 0)
+        n_windows = -(-last // stride) + 1
+        starts = np.arange(n_windows, dtype=np.int64) * stride
+        stops = np.minimum(starts + window, len(time))
+    elif by == "time" and not len(time):
+        starts = stops = np.empty(0, dtype=np.int64)
+    elif by == "time":
+        # the windows are half-open, the last one must begin after
+        # time[-1] - window
+        tmin, tmax = time[0], time[-1]
+        n_windows = max(int(np.floor((tmax - tmin - window) / stride)), -1) + 2
+        begins = tmin + stride * np.arange(n_windows)
+        starts = np.searchsorted(time, begins, side="left")
+        stops = np.searchsorted(time, begins + window, side="left")
+        stops[-1] = len(time)
+    else:
+        msg = "'by' must be 'time' or 'points'. Found '{}'"
+        raise ValueError(msg.format(by))
+
+    not_empty = stops > starts
+    return starts[not_empty], stops[not_empty]
+
+
+def window_source(lc):
+    """The data vectors of a light curve ready to be windowed.
+
+    Only ``time``, ``magnitude`` and ``error`` can be windowed. The
+    invalid observations (NaN, infinite or False in the optional ``mask``
+    of the light curve) are removed and the rest are sorted by time; if
+    nothing changes the original arrays are returned without copies.
+
+    Returns
+    -------
+
+    dict
+        ``{data_name: array}``.
+
+    """
+    names = [
+        d for d in (DATA_TIME, DATA_MAGNITUDE, DATA_ERROR)
+        if lc.get(d) is not None]
+    others = [
+        d for d in DATAS if d not in names and lc.get(d) is not None]
+    if others:
+        msg = "Only time, magnitude and error can be windowed. Found {}"
+        raise ValueError(msg.format(", ".join(others)))
+    if DATA_TIME not in names:
+        raise ValueError("The windows requires the time")
+
+    data = {d: np.asarray(lc[d]) for d in names}
+    valid = None
+    if lc.get("mask") is not None:
+        valid = np.asarray(lc["mask"], dtype=bool)
+    for values in data.values():
+        finite = np.isfinite(values)
+        if not finite.all():
+            valid = finite if valid is None else (valid & finite)
+    if valid is not None and not valid.all():
+        data = {d: v[valid] for d, v in data.items()}
+
+    time = data[DATA_TIME]
+    if not is_sorted(time):
+        order = np.argsort(time, kind="mergesort")
+        data = {d: v[order] for d, v in data.items()}
+    return data
+
+
+# =============================================================================
+# WINDOW KERNELS
+# =============================================================================
+
+def window_sum(values, starts, stops):
+    """Sum of every window ``values[starts[i]:stops[i]]``.
+
+    The sums are differences of a single prefix sum (in float64), so the
+    cost doesn't depend on the length or the overlap of the windows.
+
+    """
+    cumsum = np.concatenate(([0.], np.cumsum(values, dtype=np.float64)))
+    return cumsum[stops] - cumsum[starts]
+
+
+def window_mean(values, starts, stops):
+    """Mean of every (non empty) window."""
+    return window_sum(values, starts, stops) / (stops - starts)
+
+
+def window_moments(values, starts, stops, order=2):
+    """The mean and the central moments of every (non empty) window.
+
+    Returns
+    -------
+
+    mean : ndarray
+        The mean of every window.
+    moments : list of ndarray
+        The central moments ``mean((x - mean) ** k)`` of every window for
+        ``k`` from 2 to ``order`` (the population moments, like
+        ``np.var()`` for ``k == 2``).
+
+    Notes
+    -----
+
+    The moments are expanded from prefix sums of the powers of the
+    values, centered on their global mean to limit the cancellation
+    error. The second moments under the rounding noise of their window
+    are zero, so the constant windows have exactly zero variance.
+
+    """
+    values = np.asarray(values, dtype=np.float64)
+    shift = values.mean() if len(values) else 0.
+    centered = values - shift
+    n = (stops - starts).astype(np.float64)
+    raw = [np.ones(len(n))] + [
+        window_sum(centered ** k, starts, stops) / n
+        for k in range(1, order + 1)]
+
+    mean = raw[1]
+    moments = []
+    for k in range(2, order + 1):
+        moment = sum(
+            _binomial(k, j) * raw[j] * (-mean) ** (k - j)
+            for j in range(k + 1))
+        if k == 2:
+            noise = 16 * np.finfo(np.float64).eps * raw[2]
+            moment = np.where(moment <= noise, 0., moment)
+        moments.append(moment)
+    return mean + shift, moments
+
+
+def window_covariance(x, y, starts, stops):
+    """The covariance (population, like ``np.cov(..., bias=True)``)
+    between ``x`` and ``y`` inside every (non empty) window.
+
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    if len(x):
+        x, y = x - x.mean(), y - y.mean()
+    n = (stops - starts).astype(np.float64)
+    xmean = window_sum(x, starts, stops) / n
+    ymean = window_sum(y, starts, stops) / n
+    return window_sum(x * y, starts, stops) / n - xmean * ymean
+
+
+def _binomial(n, k):
+    result = 1
+    for idx in range(1, k + 1):
+        result = result * (n - k + idx) // idx
+    return result
+
+
+# =============================================================================
+# SCHEDULING
+# =============================================================================
+
+def balanced_tasks(costs, n_jobs, tasks_per_job=4):
+    """Group the light curves in tasks of similar cost, in decreasing order
+    of cost.
+
+    The curves are sorted by decreasing ``costs`` and grouped in tasks of
+    around ``sum(costs) / (n_jobs * tasks_per_job)``; the curves more
+    expensive than that are a task by themselves. Dispatching the tasks in
+    order to the first free job (longest processing time first) starts the
+    expensive curves first and packs the cheap ones together, so a few long
+    curves don't become stragglers at the end of the run.
+
+    Returns
+    -------
+
+    list
+        Of arrays with the (sorted) indexes of the curves of every task.
+
+    """
+    costs = np.asarray(costs, dtype=np.float64)
+    if not len(costs):
+        return []
+    order = np.argsort(-costs, kind="mergesort")
+    sorted_costs = costs[order]
+    target = sorted_costs.sum() / (n_jobs * tasks_per_job)
+    if target <= 0:
+        return [np.sort(order)]
+    # the task of every curve is given by the accumulated cost before it
+    starts = np.cumsum(sorted_costs) - sorted_costs
+    bins = np.floor(starts / target)
+    splits = np.flatnonzero(np.diff(bins)) + 1
+    return [np.sort(task) for task in np.split(order, splits)]
+
+
+# =============================================================================
+# SHARED MEMORY
+# =============================================================================
+
+def shared_folder(prefix="feets-"):
+    """Create a temporary folder to memory map batches (see
+    ``LightCurveBatch.memmap``), in ``/dev/shm`` if it is available.
+
+    """
+    shm = "/dev/shm"
+    folder = shm if os.path.isdir(shm) and os.access(shm, os.W_OK) else None
+    return tempfile.mkdtemp(prefix=prefix, dir=folder)
+
+
+# =============================================================================
+# BATCH
+# =============================================================================
+
+class LightCurveBatch(object):
+    """A ragged collection of light curves stored in flat buffers.
+
+    Parameters
+    ----------
+
+    offsets : array-like or dict-like
+        The ``n + 1`` boundaries of the ``n`` light curves inside the
+        buffers. If all the data vectors share the same boundaries a single
+        array is enough; otherwise a dict that maps every data name to
+        their own offsets (for example ``magnitude2`` usually has a
+        different length than ``magnitude``).
+    ids : array-like, optional
+        An identifier for every light curve.
+    time_offsets : array-like, optional
+        If the times of the batch are re-centered (see ``astype()``), the
+        epoch subtracted to every light curve.
+    periods : array-like, optional
+        A trusted period for every light curve (NaN if it's unknown) used
+        by the extractors instead of searching it (see
+        ``Extractor.accepts_period``).
+    data
+        The concatenated buffers. The names must be in ``feets.DATAS``.
+
+    Examples
+    --------
+
+    .. code-block:: pycon
+
+        >>> batch = LightCurveBatch.from_lightcurves([lc0, lc1, lc2])
+        >>> batch
+        LightCurveBatch(size=3, data=[time, magnitude, error])
+        >>> batch[0]["magnitude"]  # a view over the buffer
+        array([...])
+        >>> batch[1:]  # another batch, without copy the buffers
+        LightCurveBatch(size=2, data=[time, magnitude, error])
+
+    """
+
+    def __init__(self, offsets, ids=None, time_offsets=None, periods=None,
+                 **data):
+        if not data:
+            raise ValueError("At least one data vector is required")
+        for name in data:
+            if name not in DATAS:
+                msg = "Data names must be in {}. Found '{}'"
+                raise ValueError(msg.format(DATAS, name))
+
+        if not isinstance(offsets, dict):
+            shared = np.asarray(offsets, dtype=np.int64)
+            offsets = dict.fromkeys(data, shared)
+
+        self._data, self._offsets = {}, {}
+        size = None
+        for name, buff in data.items():
+            if name not in offsets:
+                raise ValueError("No offsets found for '{}'".format(name))
+            buff = np.asarray(buff)
+            offs = np.asarray(offsets[name], dtype=np.int64)
+            if buff.ndim != 1 or offs.ndim != 1:
+                msg = "Buffers and offsets must be 1D arrays ('{}')"
+                raise ValueError(msg.format(name))
+            if (
+                len(offs) < 1 or offs[0] != 0 or
+                offs[-1] != len(buff) or np.any(np.diff(offs) < 0)
+            ):
+                raise ValueError("Invalid offsets for '{}'".format(name))
+            if size is not None and len(offs) - 1 != size:
+                msg = "All the data must have the same number of curves"
+                raise ValueError(msg)
+            size = len(offs) - 1
+            self._data[name], self._offsets[name] = buff, offs
+
+        if ids is not None:
+            ids = np.asarray(ids)
+            if len(ids) != size:
+                raise ValueError("'ids' must have one value per curve")
+        self._ids = ids
+
+        if time_offsets is not None:
+            time_offsets = np.asarray(time_offsets, dtype=np.float64)
+            if len(time_offsets) != size:
+                msg = "'time_offsets' must have one value per curve"
+                raise ValueError(msg)
+        self._time_offsets = time_offsets
+
+        if periods is not None:
+            periods = np.asarray(periods, dtype=np.float64)
+            if len(periods) != size:
+                raise ValueError("'periods' must have one value per curve")
+        self._periods = periods
+        self._size = size
+
+    @classmethod
+    def from_lightcurves(cls, lcs, ids=None):
+        """Create a new batch from an iterable of dict-like light curves
+        (like ``feets.datasets.base.LightCurve``).
+
+        All the light curves must provide the same data vectors. The
+        optional ``time_offset`` and ``period`` of every light curve are
+        also collected, and the observations with NaN or infinite values
+        or marked as False by the optional ``mask`` of the light curve are
+        removed (like in ``FeatureSpace.extract()``, see
+        ``drop_invalid()``).
+
+        """
+        buffers, lengths, names = {}, {}, None
+        time_offsets, periods, masks = [], [], []
+        for lc in lcs:
+            time_offsets.append(lc.get("time_offset"))
+            periods.append(lc.get("period"))
+            masks.append(lc.get("mask"))
+            lc_names = frozenset(
+                k for k in DATAS if lc.get(k) is not None)
+            if names is None:
+                names = lc_names
+            elif names != lc_names:
+                msg = "All the light curves must have the same data: {} != {}"
+                raise ValueError(msg.format(sorted(names), sorted(lc_names)))
+            for name in names:
+                value = np.asarray(lc[name])
+                buffers.setdefault(name, []).append(value)
+                lengths.setdefault(name, []).append(len(value))
+        if not names:
+            raise ValueError("At least one light curve is required")
+
+        offsets, data = {}, {}
+        for name in names:
+            offsets[name] = np.concatenate(([0], np.cumsum(lengths[name])))
+            data[name] = np.concatenate(buffers[name])
+
+        if all(to is None for to in time_offsets):
+            time_offsets = None
+        else:
+            time_offsets = [to or 0. for to in time_offsets]
+
+        if all(p is None for p in periods):
+            periods = None
+        else:
+            periods = [np.nan if p is None else p for p in periods]
+
+        mask = None
+        if any(m is not None for m in masks):
+            first = next(d for d in DATA_GROUPS[0] if d in names)
+            mask = np.concatenate([
+                np.ones(size, dtype=bool) if m is None else
+                np.asarray(m, dtype=bool)
+                for m, size in zip(masks, lengths[first])])
+
+        batch = cls(
+            offsets=offsets, ids=ids, time_offsets=time_offsets,
+            periods=periods, **data)
+        return batch.drop_invalid(mask=mask)
+
+    @classmethod
+    def from_windows(cls, lc, window, stride=None, by="time"):
+        """Create a new batch with the sliding windows of a single light
+        curve (see ``window_bounds()``).
+
+        Only ``time``, ``magnitude`` and ``error`` are windowed, without
+        the invalid observations and sorted by time (see
+        ``window_source()``). The ids of the batch are the time of the
+        first observation of every window.
+
+        If the windows don't overlap (the default ``stride``) the buffers
+        of the batch are views over the light curve; otherwise the
+        observations of every window are copied, so prefer the window
+        kernels (``window_sum()``, ``window_moments()``, etc) for large
+        overlaps.
+
+        """
+        data = window_source(lc)
+        time = data[DATA_TIME]
+
+        starts, stops = window_bounds(time, window, stride=stride, by=by)
+        if len(starts) and np.all(stops[:-1] == starts[1:]):
+            # consecutive windows: the curve is already a batch
+            begin, end = starts[0], stops[-1]
+            offsets = np.append(starts, end) - begin
+            data = {d: v[begin:end] for d, v in data.items()}
+        else:
+            positions, offsets = _gather(starts, stops - starts)
+            data = {d: v[positions] for d, v in data.items()}
+
+        time_offset = lc.get("time_offset")
+        time_offsets = (
+            None if time_offset is None else
+            np.full(len(starts), time_offset, dtype=np.float64))
+        periods = (
+            None if lc.get("period") is None else
+            np.full(len(starts), lc["period"], dtype=np.float64))
+        return cls(
+            offsets=offsets, ids=time[starts], time_offsets=time_offsets,
+            periods=periods, **data)
+
+    @classmethod
+    def from_datas(cls, datas, band):
+        """Create a new batch with the light curves of one band of several
+        ``feets.datasets.base.Data`` objects (as returned by the loaders
+        of ``feets.datasets``). The ids of the batch are the ids of the
+        data objects.
+
+        """
+        datas = list(datas)
+        return cls.from_lightcurves(
+            (d.data[band] for d in datas), ids=[d.id for d in datas])
+
+    @classmethod
+    def from_dataframe(cls, df, id_column="id", columns=None,
+                       mask_column=None):
+        """Create a new batch from a long format ``pandas.DataFrame`` with
+        one row per observation.
+
+        The table is sorted once by source (and by time inside every
+        source) and the columns are splitted in contiguous segments by
+        offsets, without creating one DataFrame per source. The ids of the
+        batch are the sorted values of ``id_column``; the rows without id
+        are discarded, like the invalid observations (see
+        ``drop_invalid()``).
+
+        Parameters
+        ----------
+
+        df : pandas.DataFrame
+            The observations.
+        id_column : str, default "id"
+            The column with the id of the sources.
+        columns : dict or sequence, optional
+            The data vectors to read, as a ``{data_name: column}`` dict or
+            a sequence of data names (which are also the column names). By
+            default all the columns named as a data vector.
+        mask_column : str, optional
+            A boolean column with the quality mask of time, magnitude and
+            error (True for the valid observations).
+
+        """
+        import pandas as pd
+
+        if columns is None:
+            columns = [name for name in DATAS if name in df.columns]
+        if not isinstance(columns, dict):
+            columns = {name: name for name in columns}
+        if not columns:
+            raise ValueError("At least one data column is required")
+
+        codes, ids = pd.factorize(df[id_column].values, sort=True)
+        keys = [codes]
+        for name in (DATA_TIME, DATA_ALIGNED_TIME):
+            if name in columns:
+                keys.insert(0, df[columns[name]].values)
+                break
+        order = np.lexsort(keys)
+        order = order[codes[order] >= 0]
+
+        counts = np.bincount(codes[order], minlength=len(ids))
+        offsets = np.concatenate(([0], np.cumsum(counts)))
+        data = {
+            name: np.asarray(df[col].values[order], dtype=np.float64)
+            for name, col in columns.items()}
+        mask = (
+            None if mask_column is None else
+            np.asarray(df[mask_column].values[order], dtype=bool))
+        return cls(offsets=offsets, ids=ids, **data).drop_invalid(mask=mask)
+
+    def __repr__(self):
+        names = ", ".join(d for d in DATAS if d in self._data)
+        return "LightCurveBatch(size={}, data=[{}])".format(self._size, names)
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        for idx in range(self._size):
+            yield self[idx]
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return self._slice(idx)
+        if not isinstance(idx, six.integer_types + (np.integer,)):
+            raise TypeError("Batches only support integers and slices")
+        if idx < 0:
+            idx += self._size
+        if not 0 <= idx < self._size:
+            raise IndexError("batch index out of range")
+        curve = dict.fromkeys(DATAS)
+        for name, buff in self._data.items():
+            offs = self._offsets[name]
+            curve[name] = buff[offs[idx]:offs[idx + 1]]
+        return curve
+
+    def _slice(self, sl):
+        start, stop, step = sl.indices(self._size)
+        if step != 1:
+            raise ValueError("Only contiguous slices are supported")
+        stop = max(start, stop)
+        offsets, data = {}, {}
+        for name, buff in self._data.items():
+            offs = self._offsets[name]
+            data[name] = buff[offs[start]:offs[stop]]
+            offsets[name] = offs[start:stop + 1] - offs[start]
+        ids = None if self._ids is None else self._ids[start:stop]
+        time_offsets = (
+            None if self._time_offsets is None else
+            self._time_offsets[start:stop])
+        periods = (
+            None if self._periods is None else self._periods[start:stop])
+        return type(self)(
+            offsets=offsets, ids=ids, time_offsets=time_offsets,
+            periods=periods, **data)
+
+    def take(self, indices):
+        """Return a new batch with the light curves in ``indices`` (in that
+        order). Unlike the slices, the buffers are copied.
+
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        offsets, data = {}, {}
+        for name, buff in self._data.items():
+            offs = self._offsets[name]
+            positions, offsets[name] = _gather(
+                offs[indices], np.diff(offs)[indices])
+            data[name] = buff[positions]
+        ids = None if self._ids is None else self._ids[indices]
+        time_offsets = (
+            None if self._time_offsets is None else
+            self._time_offsets[indices])
+        periods = None if self._periods is None else self._periods[indices]
+        return type(self)(
+            offsets=offsets, ids=ids, time_offsets=time_offsets,
+            periods=periods, **data)
+
+    def drop_invalid(self, mask=None):
+        """Return a batch without the invalid observations.
+
+        An observation is invalid if any vector of their group (see
+        ``DATA_GROUPS``) is NaN or infinite, or if it's marked as False in
+        ``mask`` (a boolean buffer aligned with time, magnitude and
+        error), the same rules of ``FeatureSpace.extract()``. Some light
+        curves can become empty. If all the observations are valid the
+        same batch is returned without copies.
+
+        """
+        data, offsets = dict(self._data), dict(self._offsets)
+        for idx, group in enumerate(DATA_GROUPS):
+            names = [d for d in group if d in self._data]
+            valid = None
+            if idx == 0 and mask is not None:
+                if not names:
+                    raise ValueError(
+                        "'mask' requires time, magnitude or error")
+                valid = np.asarray(mask, dtype=bool)
+                shape = self._data[names[0]].shape
+                if valid.shape != shape:
+                    msg = "'mask' must have the shape {}. Found {}"
+                    raise ValueError(msg.format(shape, valid.shape))
+            for name in names:
+                finite = np.isfinite(self._data[name])
+                if not finite.all():
+                    valid = finite if valid is None else (valid & finite)
+            if valid is None or valid.all():
+                continue
+            ids = segment_ids(self._offsets[names[0]])
+            counts = np.bincount(ids[valid], minlength=self._size)
+            group_offsets = np.concatenate(([0], np.cumsum(counts)))
+            for name in names:
+                data[name] = self._data[name][valid]
+                offsets[name] = group_offsets
+        if all(data[name] is self._data[name] for name in data):
+            return self
+        return type(self)(
+            offsets=offsets, ids=self._ids, time_offsets=self._time_offsets,
+            periods=self._periods, **data)
+
+    def sort_by_time(self):
+        """Return a batch with the observations of every light curve sorted
+        by time (and by ``aligned_time`` the aligned data).
+
+        The order is verified first (a single pass over the buffers), so if
+        all the light curves are sorted the same batch is returned without
+        copies.
+
+        """
+        data = dict(self._data)
+        for group in (DATA_GROUPS[0], DATA_GROUPS[2]):
+            if group[0] not in self._data:
+                continue
+            time, offsets = self.segments(group[0])
+            if segment_is_sorted(time, offsets).all():
+                continue
+            order = np.lexsort((time, segment_ids(offsets)))
+            for name in group:
+                if (
+                    name in self._data and
+                    np.array_equal(self._offsets[name], offsets)
+                ):
+                    data[name] = self._data[name][order]
+        if all(data[name] is self._data[name] for name in data):
+            return self
+        return type(self)(
+            offsets=self._offsets, ids=self._ids,
+            time_offsets=self._time_offsets, periods=self._periods, **data)
+
+    def has(self, name):
+        """Return True if the batch has the data vector ``name``."""
+        return name in self._data
+
+    def segments(self, name):
+        """Return the tuple (buffer, offsets) of the data ``name``."""
+        return self._data[name], self._offsets[name]
+
+    def lengths(self, name):
+        """Return the number of observations of every curve for the data
+        ``name``.
+
+        """
+        return segment_lengths(self._offsets[name])
+
+    def astype(self, dtype):
+        """Return a copy of the batch with all the buffers casted to
+        ``dtype``.
+
+        If ``dtype`` is narrower than float64 the times of every curve are
+        re-centered on their own epoch (stored in ``time_offsets``) to
+        preserve their precision; otherwise the absolute times are
+        restored.
+
+        """
+        narrow = is_narrow_dtype(dtype)
+        time_offsets = self._time_offsets
+        if narrow and time_offsets is None:
+            name = DATA_TIME if DATA_TIME in self._data else DATA_ALIGNED_TIME
+            if name in self._data:
+                time, offsets = self.segments(name)
+                time_offsets = np.floor(segment_min(time, offsets))
+
+        data = {}
+        for name, buff in self._data.items():
+            is_time = name in (DATA_TIME, DATA_ALIGNED_TIME)
+            if is_time and time_offsets is not None:
+                offsets = self._offsets[name]
+                time = buff.astype(np.float64)
+                shift = segment_broadcast(time_offsets, offsets)
+                if narrow and self._time_offsets is None:
+                    time = time - shift
+                elif not narrow:
+                    time = time + shift
+                buff = time
+            data[name] = buff.astype(dtype)
+
+        return type(self)(
+            offsets=self._offsets, ids=self._ids,
+            time_offsets=time_offsets if narrow else None,
+            periods=self._periods, **data)
+
+    def memmap(self, folder):
+        """Return a copy of the batch whose buffers are read-only memory maps
+        of ``.npy`` files stored in ``folder``.
+
+        The slices of a memory mapped batch are views of the same files, so
+        when they are sent to worker processes (with joblib's ``loky`` or
+        ``multiprocessing`` backends) only the file name and the offsets
+        of every chunk are pickled, instead of a copy of the observations.
+        Place ``folder`` in a RAM backed filesystem (like ``/dev/shm``) to
+        avoid touching the disk. Removing the folder is responsibility of
+        the caller.
+
+        """
+        data = {}
+        for name, buff in self._data.items():
+            path = os.path.join(folder, "{}.npy".format(name))
+            np.save(path, buff)
+            data[name] = np.load(path, mmap_mode="r")
+        return type(self)(
+            offsets=self._offsets, ids=self._ids,
+            time_offsets=self._time_offsets, periods=self._periods, **data)
+
+    @property
+    def data(self):
+        return frozenset(self._data)
+
+    @property
+    def time_offsets(self):
+        return self._time_offsets
+
+    @property
+    def ids(self):
+        return self._ids
+
+    @property
+    def periods(self):
+        return self._periods
@@ -0,0 +1,178 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# The MIT License (MIT)
+
+# Copyright (c) 2017 Juan Cabral
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# =============================================================================
+# FUTURE
+# =============================================================================
+
+from __future__ import unicode_literals, print_function
+
+
+# =============================================================================
+# DOCS
+# =============================================================================
+
+__doc__ = """Command line interface of feets.
+
+The ``feets extract`` command extracts the features of a whole catalog of
+light curves and streams the results to a CSV, Parquet or NPY file, one
+chunk of light curves at a time (so the memory usage does not grow with
+the size of the catalog).
+
+The sources can be:
+
+- A directory: every file with the extension ``.dat``, ``.mjd`` or
+  ``.txt`` (or every member of the ``.tar``, ``.tar.gz`` and ``.tar.bz2``
+  archives inside, like the MACHO and OGLE-III layouts used by
+  ``feets.datasets``) is a light curve with the columns time, magnitude
+  and error.
+- A tarball with the same kind of members.
+- A ``.csv`` or ``.parquet`` table with one row per observation and a
+  column with the id of the source. The rows of every source must be
+  contiguous.
+
+The files named ``<id>.<band>.<ext>`` can be filtered by band with
+``--band``.
+
+With ``--checkpoint DIRECTORY`` the results are written in one shard per
+chunk and the progress is recorded in a manifest, so an interrupted run
+can be resumed with the same command (see ``feets.runs.CheckpointedRun``).
+
+.. code-block:: bash
+
+    $ feets extract feets/datasets/data/macho --band R \\
+        --only Mean Std PeriodLS -o features.csv
+
+"""
+
+__all__ = [
+    "main", "read_lightcurves", "extract", "CheckpointedRun", "RunError"]
+
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+import sys
+import json
+import argparse
+
+from . import VERSION
+from .core import FeatureSpace
+from .profiles import PROFILES
+from .runs import (
+    WRITERS, DEFAULT_COLUMNS, read_lightcurves, extract, CheckpointedRun,
+    RunError)
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+def create_parser():
+    parser = argparse.ArgumentParser(
+        prog="feets", description="feATURE eXTRACTOR FOR tIME sERIES")
+    parser.add_argument(
+        "--version", action="version", version="%(prog)s " + VERSION)
+    subparsers = parser.add_subparsers(dest="command")
+
+    ext = subparsers.add_parser(
+        "extract", help="extract the features of a catalog",
+        description=__doc__.split("\n\n", 1)[1].split(".. code-block")[0],
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    ext.add_argument(
+        "sources", nargs="+",
+        help="directories, tarballs or tables of light curves")
+    output = ext.add_mutually_exclusive_group(required=True)
+    output.add_argument(
+        "-o", "--output", help="the output file (.csv, .parquet or .npy)")
+    output.add_argument(
+        "--checkpoint", metavar="DIRECTORY",
+        help=("write the results in shards in a resumable run directory "
+              "(by default in csv format)"))
+    ext.add_argument("--format", dest="fmt",
+                     choices=sorted(w.lstrip(".") for w in WRITERS),
+                     help="the output format (by default from the extension)")
+    ext.add_argument("--band", help="only use the files of this band")
+    ext.add_argument(
+        "--columns", nargs="+", default=list(DEFAULT_COLUMNS),
+        help="the data vectors in the columns of the files or tables")
+    ext.add_argument(
+        "--id-column", default="id", help="the id column of the tables")
+    ext.add_argument("--only", nargs="+", help="features to extract")
+    ext.add_argument("--exclude", nargs="+", help="features to exclude")
+    ext.add_argument("--data", nargs="+", help="available data vectors")
+    ext.add_argument("--dtype", help="computation dtype (ex: float32)")
+    ext.add_argument("--profile", choices=list(PROFILES),
+                     help="speed/accuracy profile of the extractors")
+    ext.add_argument(
+        "--kwargs", type=json.loads, default={},
+        help=("parameters of the extractors as JSON "
+              "(ex: '{\"CAR\": {\"minimize_method\": \"powell\"}}')"))
+    ext.add_argument(
+        "--chunk-size", type=int, default=1000,
+        help="light curves extracted and written at once")
+    ext.add_argument(
+        "-j", "--n-jobs", type=int, default=None,
+        help="number of threads (-1 for all the CPUs)")
+    return parser
+
+
+def main(argv=None):
+    """Entry point of the ``feets`` console command."""
+    parser = create_parser()
+    args = parser.parse_args(argv)
+    if args.command != "extract":
+        parser.print_help()
+        return 1
+
+    space = FeatureSpace(
+        data=args.data, only=args.only, exclude=args.exclude,
+        dtype=args.dtype, profile=args.profile, **args.kwargs)
+
+    def lightcurves():
+        for source in args.sources:
+            for lc in read_lightcurves(
+                source, band=args.band, columns=args.columns,
+                id_column=args.id_column
+            ):
+                yield lc
+
+    if args.checkpoint:
+        run = CheckpointedRun(
+            space, args.checkpoint, chunk_size=args.chunk_size,
+            output_format=args.fmt or "csv", n_jobs=args.n_jobs)
+        total = run.run(lightcurves())
+        output = args.checkpoint
+        if run.quarantine:
+            print("{} light curves in quarantine (see {})".format(
+                len(run.quarantine), run.manifest_name), file=sys.stderr)
+    else:
+        total = extract(
+            space, lightcurves(), args.output, chunk_size=args.chunk_size,
+            n_jobs=args.n_jobs, output_format=args.fmt)
+        output = args.output
+    print("{} light curves -> {}".format(total, output), file=sys.stderr)
+    return 0
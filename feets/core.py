@@ -39,19 +39,37 @@ __doc__ = """core functionalities of feets"""
 __all__ = [
     "FeatureNotFound",
     "DataRequiredError",
-    "FeatureSpace"]
+    "FeatureSpace",
+    "FeatureSpaceUnion",
+    "Grid"]
 
 
 # =============================================================================
 # IMPORTS
 # =============================================================================
 
+import sys
+import shutil
 import logging
+import itertools
+from collections import namedtuple, OrderedDict
 
 import numpy as np
 
+import joblib
+
 from . import extractors
+from .batch import (
+    LightCurveBatch, balanced_tasks, shared_folder, window_bounds,
+    window_source)
+from .profiles import apply_profile
+from .utils import is_narrow_dtype, is_sorted, time_epoch, recenter_time
 from .extractors.core import (
+    FLAGS_DTYPE,
+    FLAG_NOT_FINITE,
+    FLAG_UNDEFINED,
+    FLAG_KNOWN_ISSUE,
+    FLAG_SKIPPED,
     DATA_MAGNITUDE,
     DATA_TIME,
     DATA_ERROR,
@@ -60,7 +78,8 @@ from .extractors.core import (
     DATA_ALIGNED_MAGNITUDE2,
     DATA_ALIGNED_TIME,
     DATA_ALIGNED_ERROR,
-    DATA_ALIGNED_ERROR2)
+    DATA_ALIGNED_ERROR2,
+    DATA_GROUPS)
 
 
 # =============================================================================
@@ -73,6 +92,21 @@ TABULATE_PARAMS = {
     "stralign": "center",
 }
 
+# a stage of the cascade of a FeatureSpace: the extractors to run, the
+# predicate that decides if the next stages run, the columns computed until
+# this stage and the columns of the next ones.
+_Stage = namedtuple("_Stage", ["plan", "predicate", "screened", "pending"])
+
+# the features of a grid extractor returned apart by
+# FeatureSpace.extract_batch(grids=...): the names of the cells, their
+# values and the flags of every light curve (the union of the flags of the
+# cells, or None).
+Grid = namedtuple("Grid", ["features", "values", "flags"])
+
+# light curves extracted at once when the grids are returned apart, so only
+# this number of rows of the grids is stored as float64 columns.
+GRID_CHUNK_SIZE = 1000
+
 
 # =============================================================================
 # LOG
@@ -95,6 +129,107 @@ class DataRequiredError(ValueError):
     pass
 
 
+# =============================================================================
+# SELECTION OF FEATURES
+# =============================================================================
+
+# the features and the sorted extractor classes of a space (see _select)
+_Selection = namedtuple("_Selection", [
+    "features_by_data", "only", "exclude", "features", "features_as_array",
+    "classes", "required_data"])
+
+# memoized selections by (registry, data, only, exclude)
+_selections = {}
+
+_MAX_SELECTIONS = 256
+
+
+def _select(data, only, exclude):
+    # resolve which features and extractors a space needs; the result
+    # depends only on the registered extractors and the filters, so it's
+    # shared by all the spaces created with the same filters
+    key = (
+        extractors.registry_key(),
+        frozenset(data) if data else None,
+        frozenset(only) if only else None,
+        frozenset(exclude) if exclude else None)
+    selection = _selections.get(key)
+    if selection is not None:
+        return selection
+    exts = extractors.registered_extractors()
+
+    # get all posible features by data
+    if data:
+        fbdata = []
+        for fname, f in exts.items():
+            if not f.get_data().difference(data):
+                fbdata.append(fname)
+    else:
+        fbdata = exts.keys()
+    features_by_data = frozenset(fbdata)
+
+    # validate the list of features or select all of them
+    if only:
+        for f in only:
+            if f not in exts:
+                raise FeatureNotFound(f)
+    only_features = frozenset(only or exts.keys())
+
+    # select the features to exclude or not exclude anything
+    if exclude:
+        for f in exclude:
+            if f not in exts:
+                raise FeatureNotFound(f)
+    exclude_features = frozenset(exclude or ())
+
+    # the candidate to be the features to be extracted
+    candidates = features_by_data.intersection(
+        only_features).difference(exclude_features)
+
+    # remove by dependencies
+    if only or exclude:
+        final = set()
+        for f in candidates:
+            fcls = exts[f]
+            dependencies = fcls.get_dependencies()
+            if dependencies.issubset(candidates):
+                final.add(f)
+    else:
+        final = candidates
+    features = frozenset(final)
+
+    # the extractors of the features in excecution order by dependencies
+    classes = sorted(
+        (fcls for fcls in set(exts.values())
+         if fcls.get_features().intersection(features)),
+        key=lambda fcls: fcls.__name__)
+    classes = extractors.sort_by_dependencies(classes)
+    required_data = frozenset().union(*(
+        fcls.get_data() for fcls in classes))
+
+    selection = _Selection(
+        features_by_data=features_by_data, only=only_features,
+        exclude=exclude_features, features=features,
+        features_as_array=tuple(sorted(features)), classes=classes,
+        required_data=required_data)
+    if len(_selections) >= _MAX_SELECTIONS:
+        _selections.clear()
+    _selections[key] = selection
+    return selection
+
+
+# the compiled layout of a space, with the extractors referenced by their
+# position in the execution plan, so it can be mapped onto new instances
+# (see FeatureSpace._compiled_layout)
+_Compiled = namedtuple("_Compiled", [
+    "params", "requested", "columns", "providers", "layouts", "stages",
+    "base_flags", "feature_index"])
+
+# memoized layouts by (registry, data, only, exclude, profile, parameters,
+# cascade features)
+_compiled = {}
+
+
 # =============================================================================
 # FEATURE EXTRACTORS
 # =============================================================================
@@ -121,10 +256,47 @@ class FeatureSpace(object):
     exclude : array-like, optional, default ``None``
         List of features, which will not output
 
+    dtype : numpy dtype, optional, default ``None``
+        The floating point type used to compute the features. If is
+        ``None`` the data is used as is. With a narrower type than float64
+        (like ``numpy.float32``) the times are re-centered on an epoch to
+        keep their precision, and the extractors that need it
+        (``requires_float64``) still receive float64 data with the absolute
+        times.
+
+    profile : str, optional, default ``None``
+        A named speed/accuracy profile (``"exact"``, ``"balanced"`` or
+        ``"fast"``, see ``feets.profiles``) that configures the expensive
+        extractors at once. The parameters given in ``kwargs`` take
+        precedence over the ones of the profile.
+
+    cascade : list of (features, predicate), optional, default ``None``
+        Extract the features in stages to avoid the expensive ones when
+        they are not needed. After computing the ``features`` of a stage
+        (and the ones of the previous stages) ``predicate`` receives a dict
+        ``{feature: value}`` with all the features computed so far and
+        decides if the next stages run. The features not listed in any
+        stage are the last one. The skipped features are NaN with the
+        ``skipped`` flag. In ``extract_batch()`` the values of the dict
+        are columns, so the predicate must return one bool per light curve
+        (numpy comparisons like ``lambda f: f["Std"] > 0.1`` work in both
+        cases).
+
     kwargs
         Extra configuration for the feature extractors.
         format is ``Feature_name={param1: value, param2: value, ...}``
 
+    Notes
+    -----
+
+    A FeatureSpace is thread-safe: it's not modified by the extractions and
+    every call keeps their state in local variables, so the same instance
+    can serve concurrent ``extract()`` and ``extract_batch()`` calls. The
+    extractors must not store per light curve data in the instance; the
+    ones that can't avoid it (for example using ``setup()`` and
+    ``teardown()``) are executed by one thread at a time (see
+    ``Extractor.thread_safe``).
+
     Examples
     --------
 
@@ -169,80 +341,128 @@ class FeatureSpace(object):
         >>> dict(zip(features, values))
         {"Mean": 23}
 
+    **Cascade**
+
+    .. code-block:: pycon
+
+        >>> fs = feets.FeatureSpace(
+        ...     only=["Std", "StetsonK", "PeriodLS", "CAR_sigma"],
+        ...     cascade=[(["Std", "StetsonK"],
+        ...               lambda f: (f["Std"] > 0.1) & (f["StetsonK"] < 0.8))])
+        >>> features, values = fs.extract(**non_variable_lc)
+        >>> dict(zip(features, values))
+        {"CAR_sigma": nan, "PeriodLS": nan, "Std": 0.03, "StetsonK": 0.79}
+
     """
-    def __init__(self, data=None, only=None, exclude=None, **kwargs):
-        # retrieve all the extractors
-        exts = extractors.registered_extractors()
+    def __init__(self, data=None, only=None, exclude=None, dtype=None,
+                 profile=None, cascade=None, **kwargs):
+        # the arguments, to pickle the space compactly (see __reduce_ex__)
+        self._config = {
+            "data": data, "only": only, "exclude": exclude, "dtype": dtype,
+            "profile": profile, "cascade": cascade, "kwargs": kwargs}
+
+        # the precision policy
+        if dtype is not None:
+            dtype = np.dtype(dtype)
+            if not np.issubdtype(dtype, np.floating):
+                msg = "'dtype' must be a floating point type. Found {}"
+                raise ValueError(msg.format(dtype))
+        self._dtype = dtype
 
         # store all the parameters for the extractors
         self._kwargs = kwargs
+        self._profile = profile
+        params_by_extractor = (
+            kwargs if profile is None else apply_profile(profile, kwargs))
 
-        # get all posible features by data
-        if data:
-            fbdata = []
-            for fname, f in exts.items():
-                if not f.get_data().difference(data):
-                    fbdata.append(fname)
-        else:
-            fbdata = exts.keys()
+        # the features and the sorted extractors (memoized)
+        selection = _select(data, only, exclude)
         self._data = frozenset(data or extractors.DATAS)
-        self._features_by_data = frozenset(fbdata)
-
-        # validate the list of features or select all of them
-        if only:
-            for f in only:
-                if f not in exts:
-                    raise FeatureNotFound(f)
-        self._only = frozenset(only or exts.keys())
-
-        # select the features to exclude or not exclude anything
-        if exclude:
-            for f in exclude:
-                if f not in exts:
-                    raise FeatureNotFound(f)
-        self._exclude = frozenset(exclude or ())
-
-        # the candidate to be the features to be extracted
-        candidates = self._features_by_data.intersection(
-            self._only).difference(self._exclude)
-
-        # remove by dependencies
-        if only or exclude:
-            final = set()
-            for f in candidates:
-                fcls = exts[f]
-                dependencies = fcls.get_dependencies()
-                if dependencies.issubset(candidates):
-                    final.add(f)
-        else:
-            final = candidates
-
-        # the final features
-        self._features = frozenset(final)
-
-        # create a ndarray for all the results
-        self._features_as_array = np.array(sorted(self._features))
-
-        # initialize the extractors and determine the required data only
-        features_extractors, features_extractors_names = set(), set()
-        required_data = set()
-        for fcls in set(exts.values()):
-            if fcls.get_features().intersection(self._features):
-
-                params = self._kwargs.get(fcls.__name__, {})
-                fext = fcls(**params)
-
-                features_extractors.add(fext)
-                features_extractors_names.add(fext.name)
-                required_data.update(fext.get_data())
-
-        self._features_extractors = frozenset(features_extractors)
-        self._features_extractors_names = frozenset(features_extractors_names)
-        self._required_data = frozenset(required_data)
-
-        # excecution order by dependencies
-        self._execution_plan = extractors.sort_by_dependencies(
-            features_extractors)
+        self._features_by_data = selection.features_by_data
+        self._only = selection.only
+        self._exclude = selection.exclude
+        self._features = selection.features
+        self._features_as_array = np.array(selection.features_as_array)
+
+        # validate the stages of the cascade
+        cascade = [tuple(stage) for stage in (cascade or ())]
+        for stage in cascade:
+            if len(stage) != 2:
+                raise ValueError(
+                    "Every stage of the cascade must be a tuple "
+                    "(features, predicate)")
+            features, predicate = stage
+            not_selected = set(features).difference(self._features)
+            if not_selected:
+                msg = "The feature(s) {} of the cascade are not in the space"
+                raise FeatureNotFound(msg.format(", ".join(not_selected)))
+            if not callable(predicate):
+                msg = "The predicates of the cascade must be callables"
+                raise TypeError(msg)
+        self._cascade = cascade
+
+        # the spaces of extract_multiband() (created on demand)
+        self._multiband = None
+
+        # the same space was already compiled: only the extractors are
+        # created again
+        key = (
+            extractors.registry_key(),
+            frozenset(data) if data else None,
+            frozenset(only) if only else None,
+            frozenset(exclude) if exclude else None,
+            profile, _freeze(kwargs),
+            tuple(tuple(features) for features, _ in cascade))
+        compiled = _compiled.get(key)
+        if compiled is not None:
+            self._from_compiled(selection, compiled)
+            return
+
+        # initialize the extractors in the execution order
+        plan = []
+        for fcls in selection.classes:
+            params = params_by_extractor.get(fcls.__name__, {})
+            plan.append(fcls(**params))
+        features_extractors = frozenset(plan)
+        features_extractors_names = frozenset(fext.name for fext in plan)
+        required_data = selection.required_data
+
+        # every extractor only computes the selected features and the
+        # dependencies of the others
+        dependencies = set()
+        for fext in features_extractors:
+            dependencies.update(fext.get_dependencies())
+        for fext in features_extractors:
+            fext.set_requested_features(fext.get_features().intersection(
+                self._features.union(dependencies)))
+
+        self._requires_float64 = any(
+            fext.requires_float64 for fext in features_extractors)
+        self._requires_sorted_time = any(
+            fext.requires_sorted_time for fext in features_extractors)
+
+        self._features_extractors = features_extractors
+        self._features_extractors_names = features_extractors_names
+        self._required_data = required_data
+        self._execution_plan = tuple(plan)
+
+        # the column of every feature in the results and the extractor
+        # that provides every dependency
+        self._feature_index = {
+            fname: idx
+            for idx, fname in enumerate(selection.features_as_array)}
+        providers = {
+            fname: fext for fext in self._execution_plan
+            for fname in fext.get_features()}
+
+        self._compile(
+            columns={
+                (providers[fname], fname): idx
+                for fname, idx in self._feature_index.items()},
+            providers={
+                fext: {d: providers[d] for d in fext.get_dependencies()}
+                for fext in self._execution_plan},
+            cascade=cascade)
 
         not_found = set(self._kwargs).difference(
             self._features_extractors_names)
@@ -253,15 +473,279 @@ class FeatureSpace(object):
             ).format(", ".join(not_found))
             raise FeatureNotFound(msg)
 
+        if len(_compiled) >= _MAX_SELECTIONS:
+            _compiled.clear()
+        _compiled[key] = self._compiled_layout()
+
     def __repr__(self):
         return str(self)
 
+    def __reduce_ex__(self, protocol):
+        # only the arguments are pickled; the space is rebuilt once per
+        # process and then copied (see _restore_space)
+        if self._config is None:
+            return super(FeatureSpace, self).__reduce_ex__(protocol)
+        return (_restore_space, (self._config,))
+
     def __str__(self):
-        if not hasattr(self, "__str"):
-            extractors = [str(extractor) for extractor in self._execution_plan]
-            space = ", ".join(extractors)
-            self.__str = "<FeatureSpace: {}>".format(space)
-        return self.__str
+        extractors = [str(extractor) for extractor in self._execution_plan]
+        space = ", ".join(extractors)
+        return "<FeatureSpace: {}>".format(space)
+
+    @classmethod
+    def _from_plan(cls, plan, labels, columns, providers, dtype,
+                   required_data):
+        # a space that executes an already resolved plan (used to run
+        # several spaces at once, see FeatureSpaceUnion)
+        space = cls.__new__(cls)
+        space._config = None
+        space._kwargs = {}
+        space._profile = None
+        space._cascade = []
+        space._multiband = None
+        space._dtype = dtype
+        space._execution_plan = list(plan)
+        space._features_extractors = frozenset(plan)
+        space._features_as_array = np.array(labels)
+        space._features = frozenset(labels)
+        space._feature_index = {
+            label: idx for idx, label in enumerate(labels)}
+        space._required_data = frozenset(required_data)
+        space._requires_float64 = any(
+            fext.requires_float64 for fext in plan)
+        space._requires_sorted_time = any(
+            fext.requires_sorted_time for fext in plan)
+        space._compile(columns=columns, providers=providers)
+        return space
+
+    def _compile(self, columns, providers, cascade=None):
+        """Precompute where every extractor of the plan writes their
+        features and reads their dependencies, and the stages of the
+        cascade.
+
+        Parameters
+        ----------
+
+        columns : dict
+            ``{(extractor, feature): column}`` for every feature in the
+            results.
+        providers : dict
+            ``{extractor: {dependency: extractor}}`` the extractor that
+            computes every dependency.
+        cascade : list of (features, predicate), optional
+            The stages of the cascade.
+
+        """
+        self._columns = columns
+        self._providers = providers
+        self._layouts = {
+            fext: self._extractor_layout(fext)
+            for fext in self._execution_plan}
+        self._stages = self._cascade_stages(cascade or [])
+
+        # the flags that every feature has always
+        self._base_flags = np.zeros(
+            len(self._features_as_array), dtype=FLAGS_DTYPE)
+        for fext in self._execution_plan:
+            if fext.get_warnings():
+                ext_columns = self._layouts[fext][0]
+                self._base_flags[
+                    ext_columns[ext_columns >= 0]] |= FLAG_KNOWN_ISSUE
+
+    def _compiled_layout(self):
+        """The compiled layout of the space with the extractors replaced by
+        their position in the execution plan (see ``_from_compiled()``).
+
+        The arrays are made read-only because they are shared by all the
+        spaces created with the same arguments.
+
+        """
+        position = {
+            fext: idx for idx, fext in enumerate(self._execution_plan)}
+        self._base_flags.setflags(write=False)
+        for columns, _ in self._layouts.values():
+            columns.setflags(write=False)
+        for stage in self._stages:
+            stage.pending.setflags(write=False)
+        return _Compiled(
+            params=tuple(
+                (type(fext), dict(fext.params))
+                for fext in self._execution_plan),
+            requested=tuple(
+                fext.get_requested_features()
+                for fext in self._execution_plan),
+            columns={
+                (position[fext], fname): column
+                for (fext, fname), column in self._columns.items()},
+            providers=tuple(
+                {d: position[p] for d, p in self._providers[fext].items()}
+                for fext in self._execution_plan),
+            layouts=tuple(
+                self._layouts[fext] for fext in self._execution_plan),
+            stages=tuple(
+                (tuple(position[fext] for fext in stage.plan),
+                 stage.screened, stage.pending)
+                for stage in self._stages),
+            base_flags=self._base_flags,
+            feature_index=self._feature_index)
+
+    def _from_compiled(self, selection, compiled):
+        """Create the extractors of the plan and map the memoized layout
+        of the space onto them.
+
+        """
+        plan = []
+        for (fcls, params), requested in zip(
+            compiled.params, compiled.requested
+        ):
+            fext = fcls(**params)
+            fext.set_requested_features(requested)
+            plan.append(fext)
+
+        self._execution_plan = tuple(plan)
+        self._features_extractors = frozenset(plan)
+        self._features_extractors_names = frozenset(
+            fext.name for fext in plan)
+        self._required_data = selection.required_data
+        self._requires_float64 = any(
+            fext.requires_float64 for fext in plan)
+        self._requires_sorted_time = any(
+            fext.requires_sorted_time for fext in plan)
+
+        self._feature_index = compiled.feature_index
+        self._columns = {
+            (plan[idx], fname): column
+            for (idx, fname), column in compiled.columns.items()}
+        self._providers = {
+            fext: {d: plan[idx] for d, idx in providers.items()}
+            for fext, providers in zip(plan, compiled.providers)}
+        self._layouts = dict(zip(plan, compiled.layouts))
+        last = len(self._cascade)
+        self._stages = [
+            _Stage(
+                plan=[plan[idx] for idx in positions],
+                predicate=self._cascade[sidx][1] if sidx < last else None,
+                screened=screened, pending=pending)
+            for sidx, (positions, screened, pending) in enumerate(
+                compiled.stages)]
+        self._base_flags = compiled.base_flags
+
+    def _extractor_layout(self, fextractor):
+        """Columns of the results where the features of the extractor (in
+        the order of ``get_ordered_features()``) are stored.
+
+        Returns
+        -------
+
+        columns : ndarray
+            The column of every feature or -1 if the feature is not
+            selected in the space.
+        block : slice or None
+            If all the features are selected and stored in consecutive
+            columns, the slice of the results where the extractor can
+            write directly.
+
+        """
+        columns = [
+            self._columns.get((fextractor, fname), -1)
+            for fname in fextractor.get_ordered_features()]
+        block = None
+        if columns and columns[0] >= 0:
+            start = columns[0]
+            if columns == list(range(start, start + len(columns))):
+                block = slice(start, start + len(columns))
+        return np.array(columns, dtype=int), block
+
+    def _cascade_stages(self, cascade):
+        """Split the execution plan in the stages of the cascade.
+
+        Every extractor runs in the first stage that needs one of their
+        features, and their providers run in the same stage or before.
+        The features not listed in the cascade are in the last stage.
+
+        """
+        last = len(cascade)
+        if not last:
+            # without cascade everything runs in a single stage
+            return [_Stage(
+                plan=list(self._execution_plan), predicate=None,
+                screened=dict(
+                    (fname, column)
+                    for (_, fname), column in self._columns.items()),
+                pending=np.array([], dtype=int))]
+
+        first_stage = {}
+        for sidx, (features, _) in enumerate(cascade):
+            for fname in features:
+                first_stage.setdefault(fname, sidx)
+
+        ext_stage = {}
+        for (fext, fname) in self._columns:
+            sidx = first_stage.get(fname, last)
+            ext_stage[fext] = min(ext_stage.get(fext, sidx), sidx)
+
+        # the plan is sorted by dependencies, so in reverse order every
+        # extractor is processed before their providers
+        for fext in reversed(self._execution_plan):
+            sidx = ext_stage.setdefault(fext, last)
+            for provider in self._providers[fext].values():
+                ext_stage[provider] = min(
+                    ext_stage.get(provider, last), sidx)
+
+        stages = []
+        for sidx in range(last + 1):
+            plan = [
+                fext for fext in self._execution_plan
+                if ext_stage[fext] == sidx]
+            screened = {
+                fname: column
+                for (fext, fname), column in self._columns.items()
+                if ext_stage[fext] <= sidx}
+            pending = np.array(sorted(
+                column for (fext, _), column in self._columns.items()
+                if ext_stage[fext] > sidx), dtype=int)
+            predicate = cascade[sidx][1] if sidx < last else None
+            stages.append(_Stage(
+                plan=plan, predicate=predicate,
+                screened=screened, pending=pending))
+        return stages
+
+    def _dependencies(self, fextractor, results, extra):
+        """The values of the dependencies of an extractor taken from the
+        results (or from ``extra`` if the feature is not in the space).
+
+        """
+        dependencies = {}
+        for k, provider in self._providers[fextractor].items():
+            column = self._columns.get((provider, k))
+            dependencies[k] = (
+                extra[(provider, k)] if column is None else
+                results.T[column])
+        return dependencies
+
+    def _check_out(self, out, shape):
+        if out is None:
+            return np.empty(shape)
+        if out.shape != shape:
+            msg = "'out' must have the shape {}. Found {}"
+            raise ValueError(msg.format(shape, out.shape))
+        return out
+
+    def _finish_flags(self, values, flags):
+        flags |= self._base_flags
+        flags[~np.isfinite(values)] |= FLAG_NOT_FINITE
+        return flags
+
+    def as_dict(self, values):
+        """Convenience view of the results of ``extract()`` or
+        ``extract_batch()`` as a dict ``{feature: value}`` (or
+        ``{feature: column}`` for a batch).
+
+        """
+        values = np.asarray(values)
+        return {
+            fname: values.T[idx]
+            for fname, idx in self._feature_index.items()}
 
     def dict_data_as_array(self, d):
         array_data = {}
@@ -271,11 +755,182 @@ class FeatureSpace(object):
             array_data[k] = v if v is None else np.asarray(v)
         return array_data
 
+    def valid_masks(self, data, mask=None):
+        """Determine the valid observations of every data vector.
+
+        An observation is invalid if any vector of their group (see
+        ``DATA_GROUPS``) is NaN or infinite; the ``mask`` (True for the
+        valid observations) is also applied to time, magnitude and error.
+
+        Returns
+        -------
+
+        dict
+            A boolean array for every data vector, or None if all the
+            observations of the vector are valid.
+
+        """
+        valids = dict.fromkeys(data)
+        for idx, group in enumerate(DATA_GROUPS):
+            arrays = [data[d] for d in group if data.get(d) is not None]
+            valid = None
+            if idx == 0 and mask is not None:
+                if not arrays:
+                    raise ValueError(
+                        "'mask' requires time, magnitude or error")
+                valid = np.asarray(mask, dtype=bool)
+                if valid.shape != arrays[0].shape:
+                    msg = "'mask' must have the shape {}. Found {}"
+                    raise ValueError(
+                        msg.format(arrays[0].shape, valid.shape))
+            for arr in arrays:
+                finite = np.isfinite(arr)
+                if not finite.all():
+                    valid = finite if valid is None else (valid & finite)
+            for d in group:
+                if d in valids:
+                    valids[d] = valid
+        return valids
+
+    def sort_by_time(self, data, mask=None):
+        """Sort the observations of the light curve by time.
+
+        The vectors of the first group of ``DATA_GROUPS`` (and the
+        ``mask``) are sorted by ``time`` and the aligned vectors by
+        ``aligned_time``. The order is verified first, so a sorted light
+        curve costs a single pass and is returned without copies.
+
+        Returns
+        -------
+
+        data : dict
+            The data vectors sorted by time.
+        mask : array-like or None
+            The mask in the same order of the data.
+
+        """
+        sorted_data = dict(data)
+        for idx, group in ((0, DATA_GROUPS[0]), (2, DATA_GROUPS[2])):
+            time = data.get(group[0])
+            if time is None or time.ndim != 1 or is_sorted(time):
+                continue
+            order = np.argsort(time, kind="mergesort")
+            for d in group:
+                v = data.get(d)
+                if v is not None and v.shape == time.shape:
+                    sorted_data[d] = v[order]
+            if idx == 0 and mask is not None:
+                mask = np.asarray(mask)
+                if mask.shape == time.shape:
+                    mask = mask[order]
+        return sorted_data, mask
+
+    def precision_views(self, data, time_offset=None):
+        """Create the versions of the data required by the precision policy.
+
+        Returns
+        -------
+
+        compute : dict
+            The data in the ``dtype`` of the space; if the dtype is narrow
+            the times are re-centered.
+        absolute : dict
+            The data in float64 with the absolute times, for the extractors
+            that requires float64. Is the same object as ``compute`` when
+            no conversion is needed.
+
+        """
+        if self._dtype is None and time_offset is None:
+            return data, data
+
+        times = (DATA_TIME, DATA_ALIGNED_TIME)
+
+        compute = data
+        if self._dtype is not None:
+            epoch = time_offset
+            if epoch is None and is_narrow_dtype(self._dtype):
+                ref = next(
+                    (data[t] for t in times if data.get(t) is not None),
+                    None)
+                epoch = None if ref is None else time_epoch(ref)
+            compute = {}
+            for k, v in data.items():
+                recenter = time_offset is None and epoch is not None
+                if v is not None and k in times and recenter:
+                    v = recenter_time(v, self._dtype, epoch)[0]
+                compute[k] = v if v is None else v.astype(self._dtype)
+
+        absolute = compute
+        if self._requires_float64:
+            absolute = {}
+            for k, v in data.items():
+                if v is not None:
+                    v = v.astype(np.float64)
+                    if k in times and time_offset is not None:
+                        v = v + time_offset
+                absolute[k] = v
+
+        return compute, absolute
+
     def extract(self, time=None, magnitude=None, error=None,
                 magnitude2=None, aligned_time=None,
                 aligned_magnitude=None, aligned_magnitude2=None,
-                aligned_error=None, aligned_error2=None):
-
+                aligned_error=None, aligned_error2=None, mask=None,
+                time_offset=None, period=None, out=None, return_flags=False,
+                time_sorted=False):
+        """Extract the features of a single light curve.
+
+        Parameters
+        ----------
+
+        time, magnitude, error, magnitude2, aligned_time, aligned_magnitude,
+        aligned_magnitude2, aligned_error, aligned_error2 : array-like
+            The data vectors of the light curve. The observations with
+            NaN or infinite values are ignored.
+        mask : array-like of bool, optional
+            Quality mask for time, magnitude and error. Only the
+            observations marked as True are used.
+        time_offset : float, optional
+            If the times are re-centered, the epoch to add to obtain the
+            absolute times (like ``LightCurve.time_offset``).
+        period : float, optional
+            A trusted period of the light curve (for example from a
+            catalog). The extractors that support it (see
+            ``Extractor.accepts_period``) use it instead of searching the
+            period with a periodogram.
+        out : ndarray, optional
+            A float array with one value per feature where the results are
+            stored. Usefull to fill the rows of a preallocated matrix.
+        return_flags : bool, default False
+            If True also return the quality flags of the features.
+        time_sorted : bool, default False
+            If True the caller guarantees that the observations are already
+            sorted by time (and by ``aligned_time`` the aligned data), so
+            the order is not verified. Otherwise, if some extractor of the
+            space requires the time order (see
+            ``Extractor.requires_sorted_time``), the light curve is sorted
+            once (see ``sort_by_time()``).
+
+        Returns
+        -------
+
+        features : ndarray
+            The names of the features (the same as ``features_as_array_``).
+        values : ndarray
+            The values of the features (``out`` if is provided).
+        flags : ndarray
+            Only if ``return_flags`` is True. The quality flags of every
+            feature as an uint8 with the bits of ``feets.FLAGS``.
+
+        Notes
+        -----
+
+        The extractors that implement ``fit_masked()`` receive masked views
+        of the vectors; for the rest the valid observations are copied
+        only once and shared between all of them. So the same buffers can
+        be reused with several quality masks.
+
+        """
         kwargs = self.dict_data_as_array({
             DATA_TIME: time,
             DATA_MAGNITUDE: magnitude,
@@ -287,20 +942,870 @@ class FeatureSpace(object):
             DATA_ALIGNED_ERROR: aligned_error,
             DATA_ALIGNED_ERROR2: aligned_error2})
 
-        features = {}
+        # all the extractors receive the same (time sorted) light curve
+        if self._requires_sorted_time and not time_sorted:
+            kwargs, mask = self.sort_by_time(kwargs, mask=mask)
+
+        valids = self.valid_masks(kwargs, mask=mask)
+        masked = {d for d, v in valids.items() if v is not None}
+
+        # the invalid observations of time, magnitude and error for the
+        # extractors that support masked arrays
+        valid = valids[DATA_MAGNITUDE]
+        invalid = None if valid is None else ~valid
+
+        # the data in the computation dtype and in float64
+        views = dict(zip(
+            (False, True), self.precision_views(kwargs, time_offset)))
+
+        values = self._check_out(out, self._features_as_array.shape)
+        flags = np.zeros(values.shape, FLAGS_DTYPE) if return_flags else None
+
+        # scratch buffers and features not selected in the space
+        compressed, extra = {}, {}
+        for stage in self._stages:
+            for fextractor in stage.plan:
+                ext_data = fextractor.get_data()
+                view = views[fextractor.requires_float64]
+                ext_kwargs = {
+                    "features": self._dependencies(fextractor, values, extra),
+                    "period": period}
+                if not masked.intersection(ext_data):
+                    ext_kwargs.update(view)
+                elif (
+                    fextractor.is_mask_capable() and
+                    ext_data.issubset(DATA_GROUPS[0])
+                ):
+                    ext_kwargs.update(view, invalid=invalid)
+                else:
+                    if fextractor.requires_float64 not in compressed:
+                        compressed[fextractor.requires_float64] = {
+                            k: (v if k not in masked else v[valids[k]])
+                            for k, v in view.items()}
+                    ext_kwargs.update(compressed[fextractor.requires_float64])
+
+                columns, block = self._layouts[fextractor]
+                if block is not None:
+                    fextractor.extract_into(
+                        values[block],
+                        flags=None if flags is None else flags[block],
+                        **ext_kwargs)
+                else:
+                    scratch_flags = None
+                    if flags is not None:
+                        scratch_flags = np.zeros(len(columns), FLAGS_DTYPE)
+                    scratch = fextractor.extract_into(
+                        np.empty(len(columns)), flags=scratch_flags,
+                        **ext_kwargs)
+                    selected = columns >= 0
+                    values[columns[selected]] = scratch[selected]
+                    if flags is not None:
+                        flags[columns[selected]] = scratch_flags[selected]
+                    extra.update(
+                        ((fextractor, fname), scratch[idx])
+                        for idx, fname in enumerate(
+                            fextractor.get_ordered_features())
+                        if not selected[idx])
+
+            if stage.predicate is None or stage.predicate({
+                fname: values[column]
+                for fname, column in stage.screened.items()
+            }):
+                continue
+            values[stage.pending] = np.nan
+            if flags is not None:
+                flags[stage.pending] |= FLAG_SKIPPED
+            break
+
+        if return_flags:
+            flags = self._finish_flags(values, flags)
+            return self._features_as_array, values, flags
+        return self._features_as_array, values
+
+    def extract_batch(self, batch, out=None, return_flags=False,
+                      n_jobs=None, backend="threading", schedule="cost",
+                      grids="columns", time_sorted=False):
+        """Extract the features of several light curves at once.
+
+        Parameters
+        ----------
+
+        batch : LightCurveBatch or iterable of dict-like
+            A ``feets.batch.LightCurveBatch`` or any iterable of light
+            curves that can be converted with
+            ``LightCurveBatch.from_lightcurves()``. The known periods are
+            taken from ``LightCurveBatch.periods``.
+        out : ndarray, optional
+            A float array with shape ``(len(batch), n_features)`` where the
+            results are stored.
+        return_flags : bool, default False
+            If True also return the quality flags of the features.
+        n_jobs : int, optional
+            Number of threads (with the joblib convention, -1 means all the
+            CPUs). The batch is splitted in tasks (see ``schedule``)
+            extracted concurrently by this same space.
+        backend : str, default "threading"
+            The joblib backend used when ``n_jobs`` is greater than one.
+            With the process based backends (``"loky"`` or
+            ``"multiprocessing"``) the batch is first memory mapped in a
+            temporary folder (see ``LightCurveBatch.memmap()``), so the
+            workers receive only the location of their chunk instead of a
+            pickled copy of the observations.
+        schedule : "cost" or "contiguous", default "cost"
+            How the batch is splitted between the jobs. ``"cost"`` estimates
+            the cost of every light curve from their length and the
+            ``complexity`` of the extractors and dispatches tasks of
+            similar cost, the most expensive first (see
+            ``feets.batch.balanced_tasks()``). ``"contiguous"`` splits the
+            batch in ``n_jobs`` contiguous chunks of the same number of
+            curves, without copying the buffers.
+        grids : "columns", "compact" or "sparse", default "columns"
+            How the features of the grid extractors (``DeltamDeltat`` and
+            ``Signature``, see ``Extractor.grid_shape``) are returned. With
+            ``"columns"`` they are columns of ``values`` like the rest. With
+            ``"compact"`` and ``"sparse"`` they are removed from ``values``
+            and returned in an extra dict (see ``grids_`` in Returns). The
+            grids without a lossless compact dtype (``Signature``, whose
+            cells are densities) stay in ``values`` with ``"compact"``.
+        time_sorted : bool, default False
+            If True the caller guarantees that the observations of every
+            light curve are already sorted by time, so the order is not
+            verified. Otherwise, if some extractor of the space requires
+            the time order, the unsorted light curves are sorted once (see
+            ``LightCurveBatch.sort_by_time()``).
+
+        Returns
+        -------
+
+        features : ndarray
+            The names of the features (the same as ``features_as_array_``).
+        values : ndarray
+            A 2D array with one row per light curve and one column per
+            feature (``out`` if is provided).
+        flags : ndarray
+            Only if ``return_flags`` is True. The quality flags with the
+            same shape of ``values``.
+        grids_ : OrderedDict
+            Only if ``grids`` is not "columns". ``{extractor_name: Grid}``
+            where every ``Grid`` has the ``features`` of the cells, their
+            ``values`` and their ``flags`` (one per light curve, the union
+            of the flags of the cells; None without ``return_flags``). The
+            values are an array with shape ``(len(batch), rows, cols)`` of
+            the ``grid_dtype`` of the extractor (for example uint8 for
+            ``DeltamDeltat``) with ``"compact"``, or a
+            ``scipy.sparse.csr_matrix`` with shape
+            ``(len(batch), rows * cols)`` with ``"sparse"``. The grids are
+            extracted by chunks of ``GRID_CHUNK_SIZE`` light curves, so they
+            are never stored whole as float64. The non-finite cells are
+            stored as zero in the compact blocks (the flags report them).
+
+        Notes
+        -----
+
+        The extractors that implement ``fit_batch()`` compute the features
+        of the whole batch with segment reductions over the concatenated
+        buffers; the rest are executed once per light curve.
+
+        As in ``extract()`` the observations with NaN or infinite values
+        are ignored (see ``LightCurveBatch.drop_invalid()``). The light
+        curves left without observations have all their features NaN with
+        the ``FLAG_UNDEFINED`` flag.
+
+        Threads are useful because most of the time is spent in NumPy and
+        SciPy routines that release the GIL. The process backends only pay
+        off for the extractors that hold the GIL (pure Python loops) on
+        large batches.
+
+        """
+        if not isinstance(batch, LightCurveBatch):
+            batch = LightCurveBatch.from_lightcurves(batch)
+
+        for d in self._required_data:
+            if not batch.has(d):
+                raise DataRequiredError(d)
+
+        # the same observations that extract() uses for every curve
+        batch = batch.drop_invalid()
+        if self._requires_sorted_time and not time_sorted:
+            batch = batch.sort_by_time()
+
+        if grids != "columns":
+            return self._extract_batch_grids(
+                batch, out, return_flags, grids,
+                n_jobs=n_jobs, backend=backend, schedule=schedule)
+
+        values = self._check_out(
+            out, (len(batch), len(self._features_as_array)))
+        flags = np.zeros(values.shape, FLAGS_DTYPE) if return_flags else None
+        if not len(batch):
+            if return_flags:
+                return self._features_as_array, values, flags
+            return self._features_as_array, values
+
+        n_jobs = 1 if n_jobs is None else joblib.effective_n_jobs(n_jobs)
+        n_jobs = min(n_jobs, len(batch))
+        if n_jobs > 1:
+            tasks = self._schedule(batch, n_jobs, schedule)
+            if backend == "threading":
+                joblib.Parallel(
+                    n_jobs=n_jobs, backend=backend, batch_size=1)(
+                        joblib.delayed(self._extract_task)(
+                            batch, task, values, flags)
+                        for task in tasks)
+            else:
+                self._extract_batch_processes(
+                    batch, values, flags, tasks, n_jobs, backend)
+        else:
+            self._extract_batch(batch, values, flags)
+
+        if return_flags:
+            flags = self._finish_flags(values, flags)
+            return self._features_as_array, values, flags
+        return self._features_as_array, values
+
+    def _grid_blocks(self, grids):
+        # {extractor name: (extractor, columns)} of the grid extractors
+        # with all their cells in the space (and with a compact dtype for
+        # the "compact" grids)
+        blocks = OrderedDict()
         for fextractor in self._execution_plan:
-            result = fextractor.extract(features=features, **kwargs)
-            features.update(result)
-
-        fvalues = np.array([
-            features[fname] for fname in self._features_as_array])
-
-        return self._features_as_array, fvalues
+            columns, block = self._layouts[fextractor]
+            if fextractor.grid_shape is None or block is None:
+                continue
+            if grids == "compact" and fextractor.grid_dtype is None:
+                continue
+            blocks[fextractor.name] = (fextractor, block)
+        return blocks
+
+    def _extract_batch_grids(self, batch, out, return_flags, grids,
+                             **kwargs):
+        if grids not in ("compact", "sparse"):
+            msg = (
+                "'grids' must be 'columns', 'compact' or 'sparse'. "
+                "Found '{}'")
+            raise ValueError(msg.format(grids))
+        if grids == "sparse":
+            from scipy import sparse
+
+        size = len(batch)
+        blocks = self._grid_blocks(grids)
+        scalars = np.ones(len(self._features_as_array), dtype=bool)
+        for fextractor, block in blocks.values():
+            scalars[block] = False
+        features = self._features_as_array[scalars]
+
+        values = self._check_out(out, (size, len(features)))
+        flags = np.zeros(values.shape, FLAGS_DTYPE) if return_flags else None
+        grid_values, grid_flags = {}, {}
+        for name, (fextractor, block) in blocks.items():
+            if grids == "compact":
+                grid_values[name] = np.zeros(
+                    (size,) + tuple(fextractor.grid_shape),
+                    dtype=fextractor.grid_dtype)
+            else:
+                grid_values[name] = []
+            if return_flags:
+                grid_flags[name] = np.zeros(size, FLAGS_DTYPE)
+
+        for start in range(0, size, GRID_CHUNK_SIZE):
+            stop = min(start + GRID_CHUNK_SIZE, size)
+            result = self.extract_batch(
+                batch[start:stop], return_flags=return_flags, **kwargs)
+            chunk = result[1]
+            values[start:stop] = chunk[:, scalars]
+            if return_flags:
+                flags[start:stop] = result[2][:, scalars]
+            for name, (fextractor, block) in blocks.items():
+                cells = chunk[:, block]
+                if return_flags:
+                    grid_flags[name][start:stop] = np.bitwise_or.reduce(
+                        result[2][:, block], axis=1)
+                if grids == "compact":
+                    cells = np.where(np.isfinite(cells), cells, 0)
+                    grid_values[name][start:stop] = cells.reshape(
+                        (-1,) + tuple(fextractor.grid_shape))
+                else:
+                    grid_values[name].append(sparse.csr_matrix(cells))
+
+        result_grids = OrderedDict()
+        for name, (fextractor, block) in blocks.items():
+            cells = grid_values[name]
+            if grids == "sparse":
+                n_cells = block.stop - block.start
+                cells = (
+                    sparse.vstack(cells, format="csr") if cells else
+                    sparse.csr_matrix((0, n_cells)))
+            result_grids[name] = Grid(
+                features=self._features_as_array[block], values=cells,
+                flags=grid_flags.get(name))
+
+        if return_flags:
+            return features, values, flags, result_grids
+        return features, values, result_grids
+
+    def extract_windows(self, window, stride=None, by="time", time=None,
+                        magnitude=None, error=None, time_offset=None,
+                        period=None, mask=None, out=None, return_flags=False,
+                        n_jobs=None):
+        """Extract the features over sliding windows of a light curve.
+
+        If every extractor of the space implements ``fit_windows()``
+        (``Mean``, ``Std``, ``Skew``, ``SmallKurtosis``, ``Meanvariance``
+        and ``LinearTrend``) the features of all the windows are computed
+        from prefix sums in a few passes over the light curve, whatever
+        the overlap of the windows. Otherwise the windows are extracted
+        together as a batch (see ``LightCurveBatch.from_windows()``), so
+        the extractors with ``fit_batch()`` compute all of them at once
+        with segment reductions instead of one call per window.
+
+        Parameters
+        ----------
+
+        window : float or int
+            The length of the windows, in time units or in number of
+            observations (see ``by``).
+        stride : float or int, optional
+            The distance between the begin of two consecutive windows. By
+            default is the same as ``window``.
+        by : "time" or "points", default "time"
+            If the windows are measured in time or in observations.
+        time, magnitude, error : array-like
+            The data vectors of the light curve. Only these vectors can be
+            windowed.
+        time_offset, period, mask : optional
+            Same as in ``extract()``. The invalid observations are removed
+            before the windows are computed.
+        out, return_flags, n_jobs
+            Same as in ``extract_batch()``.
+
+        Returns
+        -------
+
+        features : ndarray
+            The names of the features (the same as ``features_as_array_``).
+        values : ndarray
+            A 2D array with one row per window (in the order of
+            ``feets.batch.window_bounds()``, the last window can be
+            shorter than the rest) and one column per feature.
+        flags : ndarray
+            Only if ``return_flags`` is True.
+
+        """
+        lc = {
+            DATA_TIME: time, DATA_MAGNITUDE: magnitude, DATA_ERROR: error,
+            "time_offset": time_offset, "period": period, "mask": mask}
+        missing = self._required_data.difference(
+            d for d in (DATA_TIME, DATA_MAGNITUDE, DATA_ERROR)
+            if lc[d] is not None)
+        if missing:
+            raise DataRequiredError(", ".join(sorted(missing)))
+
+        if len(self._stages) > 1 or not all(
+            fextractor.is_window_capable()
+            for fextractor in self._execution_plan
+        ):
+            batch = LightCurveBatch.from_windows(
+                lc, window, stride=stride, by=by)
+            return self.extract_batch(
+                batch, out=out, return_flags=return_flags, n_jobs=n_jobs,
+                time_sorted=True)
+
+        source = window_source(lc)
+        starts, stops = window_bounds(
+            source[DATA_TIME], window, stride=stride, by=by)
+        values = self._check_out(
+            out, (len(starts), len(self._features_as_array)))
+        flags = np.zeros(values.shape, FLAGS_DTYPE) if return_flags else None
+        for fextractor in self._execution_plan:
+            columns, block = self._layouts[fextractor]
+            ext_values = values[:, block] if block is not None else None
+            ext_flags = None
+            if flags is not None:
+                ext_flags = (
+                    flags[:, block] if block is not None else
+                    np.zeros((len(starts), len(columns)), FLAGS_DTYPE))
+            result = fextractor.extract_windows(
+                source, starts, stops, out=ext_values, flags=ext_flags)
+            if block is None:
+                for idx, (fname, column) in enumerate(zip(
+                    fextractor.get_ordered_features(), columns
+                )):
+                    if column >= 0:
+                        values[:, column] = result[fname]
+                        if flags is not None:
+                            flags[:, column] = ext_flags[:, idx]
+
+        if return_flags:
+            flags = self._finish_flags(values, flags)
+            return self._features_as_array, values, flags
+        return self._features_as_array, values
+
+    def extract_dataframe(self, df, id_column="id", columns=None,
+                          band_column=None, bands=None, return_flags=False,
+                          n_jobs=None, backend="threading",
+                          mask_column=None):
+        """Extract the features of the sources of a long format table with
+        one row per observation.
+
+        The table is sorted once and splitted by offsets (see
+        ``LightCurveBatch.from_dataframe()``), so no per source DataFrame
+        is created as with ``df.groupby(id_column).apply(...)``.
+
+        Parameters
+        ----------
+
+        df : pandas.DataFrame
+            The observations.
+        id_column : str, default "id"
+            The column with the id of the sources.
+        columns : dict or sequence, optional
+            The data vectors to read, as a ``{data_name: column}`` dict
+            (like ``{"magnitude": "mag", "error": "err"}``) or a sequence of
+            data names that are also the column names. By default all the
+            columns named as a data vector.
+        band_column : str, optional
+            The column with the band of every observation. If is provided
+            the features of every band are extracted and named
+            ``<feature>_<band>``.
+        bands : sequence, optional
+            The bands to extract (only with ``band_column``). By default
+            all the bands of the table.
+        return_flags, n_jobs, backend
+            Same as in ``extract_batch()``.
+        mask_column : str, optional
+            A boolean column with the quality mask of the observations
+            (True for the valid ones).
+
+        Returns
+        -------
+
+        values : pandas.DataFrame
+            One row per source (indexed by the sorted ids) and one column
+            per feature.
+        flags : pandas.DataFrame
+            Only if ``return_flags`` is True. The sources without
+            observations in a band have the ``FLAG_UNDEFINED`` and
+            ``FLAG_NOT_FINITE`` flags in the features of that band (and
+            ``FLAG_KNOWN_ISSUE`` in the ones that always have it).
+
+        """
+        import pandas as pd
+
+        if band_column is None:
+            if bands is not None:
+                raise ValueError("'bands' requires a 'band_column'")
+            parts = [(None, df)]
+        else:
+            if bands is None:
+                bands = np.sort(df[band_column].dropna().unique())
+            band_values = df[band_column].values
+            parts = [(band, df[band_values == band]) for band in bands]
+
+        values_frames, flags_frames = [], []
+        for band, part in parts:
+            batch = LightCurveBatch.from_dataframe(
+                part, id_column=id_column, columns=columns,
+                mask_column=mask_column)
+            names = self._features_as_array
+            if band is not None:
+                names = ["{}_{}".format(f, band) for f in names]
+            index = pd.Index(batch.ids, name=id_column)
+            result = self.extract_batch(
+                batch, return_flags=return_flags, n_jobs=n_jobs,
+                backend=backend)
+            values_frames.append(
+                pd.DataFrame(result[1], index=index, columns=names))
+            if return_flags:
+                flags_frames.append(
+                    pd.DataFrame(result[2], index=index, columns=names))
+
+        values = pd.concat(values_frames, axis=1, sort=True)
+        if not return_flags:
+            return values
+        # the same flags as the undefined features of extract()
+        missing = self._base_flags | FLAG_NOT_FINITE | FLAG_UNDEFINED
+        flags = pd.concat([
+            f.reindex(values.index)
+             .fillna(pd.Series(missing, index=f.columns))
+             .astype(FLAGS_DTYPE)
+            for f in flags_frames], axis=1)
+        return values, flags
+
+    def _multiband_spaces(self):
+        """The spaces with the features of a single band and with the
+        features of a pair of bands.
+
+        """
+        if self._multiband is None:
+            single_band = frozenset(DATA_GROUPS[0])
+            band_features, pair_features = set(), set()
+            for fext in self._execution_plan:
+                features = fext.get_requested_features().intersection(
+                    self._features)
+                if fext.get_data().issubset(single_band):
+                    band_features.update(features)
+                else:
+                    pair_features.update(features)
+                    pair_features.update(fext.get_dependencies())
+
+            spaces = []
+            for only in (band_features, pair_features):
+                space = None
+                if only:
+                    names = {
+                        fext.name for fext in self._execution_plan
+                        if fext.get_features().intersection(only)}
+                    space = FeatureSpace(
+                        only=only, dtype=self._dtype, profile=self._profile,
+                        **{k: v for k, v in self._kwargs.items()
+                           if k in names})
+                spaces.append(space)
+            self._multiband = tuple(spaces)
+        return self._multiband
+
+    def extract_multiband(self, bands, pairs=None, return_flags=False,
+                          n_jobs=None):
+        """Extract the features of a light curve observed in several bands.
+
+        The features that only need ``time``, ``magnitude`` and ``error``
+        are extracted for every band, and the ones that need a second band
+        (like ``Color`` or ``StetsonJ``) for every pair of bands. All the
+        bands are extracted in one batch, and all the pairs in another one
+        after a single alignment of the times of all the bands (the
+        aligned observations of a pair are the ones with the same time in
+        both bands, as in ``feets.preprocess.align()``, sorted by time).
+
+        Parameters
+        ----------
+
+        bands : mapping or iterable of (name, light curve)
+            The light curves (dict-like with ``time``, ``magnitude`` and
+            optionally ``error``) of every band, for example the ``data``
+            of a ``feets.datasets.base.Data``.
+        pairs : iterable of (band, band), optional
+            The pairs of bands for the features of two bands. By default
+            all the combinations of the bands in their order. The first
+            band of the pair is the ``magnitude`` and the second one the
+            ``magnitude2``.
+        return_flags : bool, default False
+            If True also return the quality flags of the features.
+        n_jobs : int, optional
+            Number of threads (see ``extract_batch()``).
+
+        Returns
+        -------
+
+        features : ndarray
+            The names of the features: ``<feature>_<band>`` for the
+            features of a band and ``<feature>_<band>_<band>`` for the
+            features of a pair.
+        values : ndarray
+            The values of the features.
+        flags : ndarray
+            Only if ``return_flags`` is True.
+
+        """
+        if self._cascade:
+            raise ValueError("extract_multiband() doesn't support cascades")
+        bands = list(bands.items() if hasattr(bands, "items") else bands)
+        names = [name for name, _ in bands]
+        lcs = dict(bands)
+        pairs = list(
+            itertools.combinations(names, 2) if pairs is None else pairs)
+        for pair in pairs:
+            for name in pair:
+                if name not in lcs:
+                    raise ValueError("Unknown band '{}'".format(name))
+
+        band_space, pair_space = self._multiband_spaces()
+
+        features, results = [], []
+        if band_space is not None:
+            result = band_space.extract_batch(
+                [lcs[name] for name in names], return_flags=return_flags,
+                n_jobs=n_jobs)
+            for name in names:
+                features.extend(
+                    "{}_{}".format(fname, name)
+                    for fname in band_space.features_as_array_)
+            results.append(result[1:])
+
+        if pair_space is not None and pairs:
+            batch = self._align_pairs(
+                lcs, pairs, pair_space.required_data_)
+            result = pair_space.extract_batch(
+                batch, return_flags=return_flags, n_jobs=n_jobs)
+            for first, second in pairs:
+                features.extend(
+                    "{}_{}_{}".format(fname, first, second)
+                    for fname in pair_space.features_as_array_)
+            results.append(result[1:])
+
+        features = np.array(features)
+        values = np.concatenate(
+            [r[0].ravel() for r in results] or [np.empty(0)])
+        if return_flags:
+            flags = np.concatenate(
+                [r[1].ravel() for r in results] or
+                [np.empty(0, FLAGS_DTYPE)])
+            return features, values, flags
+        return features, values
+
+    def _align_pairs(self, lcs, pairs, required_data):
+        """A batch with the data of every pair of bands; the times of all
+        the bands are aligned at once.
+
+        """
+        names = sorted({name for pair in pairs for name in pair})
+        data = {}
+        for name in names:
+            lc = lcs[name]
+            time = np.asarray(lc[DATA_TIME])
+            magnitude = np.asarray(lc[DATA_MAGNITUDE])
+            error = lc.get(DATA_ERROR)
+            error = np.zeros(time.shape) if error is None else np.asarray(
+                error)
+            data[name] = (time, magnitude, error)
+
+        # the position of every observation of every band in the union of
+        # all the times (-1 if the band has not that time)
+        times = np.unique(np.concatenate([data[n][0] for n in names]))
+        positions = {}
+        for name in names:
+            pos = np.full(len(times), -1, dtype=np.int64)
+            pos[np.searchsorted(times, data[name][0])] = np.arange(
+                len(data[name][0]))
+            positions[name] = pos
+
+        pair_lcs = []
+        for first, second in pairs:
+            time, magnitude, error = data[first]
+            _, magnitude2, error2 = data[second]
+            common = (positions[first] >= 0) & (positions[second] >= 0)
+            idx, idx2 = positions[first][common], positions[second][common]
+            pair_lc = {
+                DATA_TIME: time,
+                DATA_MAGNITUDE: magnitude,
+                DATA_ERROR: error,
+                DATA_MAGNITUDE2: magnitude2,
+                DATA_ALIGNED_TIME: times[common],
+                DATA_ALIGNED_MAGNITUDE: magnitude[idx],
+                DATA_ALIGNED_MAGNITUDE2: magnitude2[idx2],
+                DATA_ALIGNED_ERROR: error[idx],
+                DATA_ALIGNED_ERROR2: error2[idx2]}
+            pair_lcs.append(
+                {k: v for k, v in pair_lc.items() if k in required_data})
+        return LightCurveBatch.from_lightcurves(pair_lcs)
+
+    def union(self, *others):
+        """Combine this space with others to extract all of them at once
+        sharing the common extractors (see ``FeatureSpaceUnion``).
+
+        """
+        return FeatureSpaceUnion((self,) + others)
+
+    def extract_async(self, batcher=None, **kwargs):
+        """Awaitable version of ``extract()`` for asyncio applications.
+
+        The light curves submitted concurrently are grouped in
+        micro-batches and extracted with ``extract_batch()`` in a pool (see
+        ``feets.service.MicroBatcher``). Requires Python 3.5+.
+
+        Parameters
+        ----------
+
+        batcher : feets.service.MicroBatcher, optional
+            The batcher to use. By default the one returned by
+            ``feets.service.get_batcher()``.
+        kwargs
+            The data vectors of the light curve.
+
+        Returns
+        -------
+
+        awaitable
+            Resolves to ``(features, values)``.
+
+        """
+        if sys.version_info < (3, 5):
+            raise RuntimeError("extract_async() requires Python 3.5+")
+        from . import service
+        if batcher is None:
+            batcher = service.get_batcher(self)
+        return batcher.extract(**kwargs)
+
+    def batch_costs(self, batch):
+        """Estimate the relative cost of extracting every light curve of
+        ``batch`` as the sum of ``n ** complexity`` of the extractors (the
+        batch capable extractors count as linear).
+
+        """
+        name = (
+            DATA_MAGNITUDE if batch.has(DATA_MAGNITUDE) else
+            sorted(batch.data)[0])
+        lengths = batch.lengths(name).astype(np.float64)
+        costs = np.zeros(len(batch))
+        for fextractor in self._execution_plan:
+            complexity = (
+                1 if fextractor.is_batch_capable() else
+                fextractor.complexity)
+            costs += lengths ** complexity
+        return costs
+
+    def _schedule(self, batch, n_jobs, schedule):
+        # slices (views) or arrays of indexes (copies) of every task
+        if schedule == "contiguous":
+            bounds = np.linspace(0, len(batch), n_jobs + 1).astype(int)
+            return [slice(*b) for b in zip(bounds[:-1], bounds[1:])]
+        elif schedule == "cost":
+            return balanced_tasks(self.batch_costs(batch), n_jobs)
+        msg = "'schedule' must be 'cost' or 'contiguous'. Found '{}'"
+        raise ValueError(msg.format(schedule))
+
+    def _extract_task(self, batch, task, values, flags):
+        if isinstance(task, slice):
+            self._extract_batch(
+                batch[task], values[task],
+                None if flags is None else flags[task])
+            return
+        task_values, task_flags = _extract_chunk(
+            self, batch, task, flags is not None)
+        values[task] = task_values
+        if flags is not None:
+            flags[task] = task_flags
+
+    def _extract_batch_processes(self, batch, values, flags, tasks, n_jobs,
+                                 backend):
+        # the workers can't write in values/flags so every one returns
+        # its own rows
+        folder = shared_folder()
+        try:
+            shared = batch.memmap(folder)
+            results = joblib.Parallel(
+                n_jobs=n_jobs, backend=backend, batch_size=1)(
+                    joblib.delayed(_extract_chunk)(
+                        self, shared, task, flags is not None)
+                    for task in tasks)
+        finally:
+            shutil.rmtree(folder, ignore_errors=True)
+        for task, (task_values, task_flags) in zip(tasks, results):
+            values[task] = task_values
+            if flags is not None:
+                flags[task] = task_flags
+
+    def _extract_batch(self, batch, values, flags, first_stage=0,
+                       extra=None):
+        # the empty light curves (for example without valid observations)
+        # are undefined; the segment kernels only work with the rest
+        empty = np.zeros(len(batch), dtype=bool)
+        for d in self._required_data:
+            if batch.has(d):
+                empty |= batch.lengths(d) == 0
+        if empty.any():
+            values[empty] = np.nan
+            if flags is not None:
+                flags[empty] |= FLAG_UNDEFINED
+            filled = np.flatnonzero(~empty)
+            if len(filled):
+                filled_values = values[filled]
+                filled_flags = None if flags is None else flags[filled]
+                filled_extra = (
+                    None if extra is None else
+                    {k: np.asarray(v)[filled] for k, v in extra.items()})
+                self._extract_batch(
+                    batch.take(filled), filled_values, filled_flags,
+                    first_stage=first_stage, extra=filled_extra)
+                values[filled] = filled_values
+                if flags is not None:
+                    flags[filled] = filled_flags
+            return
+
+        # the batch in the computation dtype and in float64
+        compute = batch if self._dtype is None else batch.astype(self._dtype)
+        absolute = compute
+        if self._requires_float64 and (
+            self._dtype is not None or batch.time_offsets is not None
+        ):
+            absolute = batch.astype(np.float64)
+        views = {False: compute, True: absolute}
+
+        extra = {} if extra is None else extra
+        for sidx in range(first_stage, len(self._stages)):
+            stage = self._stages[sidx]
+            for fextractor in stage.plan:
+                self._extract_batch_extractor(
+                    fextractor, views, values, flags, extra)
+            if stage.predicate is None:
+                break
+
+            keep = np.broadcast_to(np.asarray(stage.predicate({
+                fname: values[:, column]
+                for fname, column in stage.screened.items()
+            }), dtype=bool), (len(batch),))
+            if keep.all():
+                continue
+
+            skipped = np.ix_(np.flatnonzero(~keep), stage.pending)
+            values[skipped] = np.nan
+            if flags is not None:
+                flags[skipped] |= FLAG_SKIPPED
+
+            # the next stages only with the light curves that pass
+            kept = np.flatnonzero(keep)
+            if len(kept):
+                kept_values = values[kept]
+                kept_flags = None if flags is None else flags[kept]
+                kept_extra = {
+                    k: np.asarray(v)[kept] for k, v in extra.items()}
+                self._extract_batch(
+                    batch.take(kept), kept_values, kept_flags,
+                    first_stage=sidx + 1, extra=kept_extra)
+                values[kept] = kept_values
+                if flags is not None:
+                    flags[kept] = kept_flags
+            break
+
+    def _extract_batch_extractor(self, fextractor, views, values, flags,
+                                 extra):
+        view = views[fextractor.requires_float64]
+        dependencies = self._dependencies(fextractor, values, extra)
+        columns, block = self._layouts[fextractor]
+        if block is not None:
+            fextractor.extract_batch(
+                view, dependencies, out=values[:, block],
+                flags=None if flags is None else flags[:, block])
+            return
+        ext_flags = None
+        if flags is not None:
+            ext_flags = np.zeros((len(values), len(columns)), FLAGS_DTYPE)
+        result = fextractor.extract_batch(
+            view, dependencies, flags=ext_flags)
+        for idx, (fname, column) in enumerate(zip(
+            fextractor.get_ordered_features(), columns
+        )):
+            if column >= 0:
+                values[:, column] = result[fname]
+                if flags is not None:
+                    flags[:, column] = ext_flags[:, idx]
+            else:
+                extra[(fextractor, fname)] = result[fname]
 
     @property
     def kwargs(self):
         return dict(self._kwargs)
 
+    @property
+    def dtype(self):
+        return self._dtype
+
+    @property
+    def profile(self):
+        return self._profile
+
+    @property
+    def cascade(self):
+        return list(self._cascade)
+
     @property
     def data(self):
         return self._data
@@ -336,3 +1841,201 @@ class FeatureSpace(object):
     @property
     def required_data_(self):
         return self._required_data
+
+
+def _extract_chunk(space, batch, task, with_flags):
+    # the rows of one task (a slice or an array of indexes); also executed
+    # in the worker processes of FeatureSpace.extract_batch
+    batch = batch[task] if isinstance(task, slice) else batch.take(task)
+    shape = (len(batch), len(space.features_as_array_))
+    values = np.empty(shape)
+    flags = np.zeros(shape, FLAGS_DTYPE) if with_flags else None
+    space._extract_batch(batch, values, flags)
+    return values, flags
+
+
+# spaces already built in this process by their pickled arguments
+_templates = {}
+
+
+def _restore_space(config):
+    # unpickle a FeatureSpace. The first time is built and the next ones
+    # are shallow copies that share the extractors (the spaces are
+    # thread-safe, so sharing the extractors is like sharing the space)
+    key = (extractors.registry_key(), _freeze(config))
+    template = _templates.get(key)
+    if template is None:
+        kwargs = dict(config)
+        kwargs.update(kwargs.pop("kwargs"))
+        template = FeatureSpace(**kwargs)
+        if len(_templates) >= _MAX_SELECTIONS:
+            _templates.clear()
+        _templates[key] = template
+    space = FeatureSpace.__new__(FeatureSpace)
+    space.__dict__.update(template.__dict__)
+    return space
+
+
+# =============================================================================
+# UNION OF SPACES
+# =============================================================================
+
+def _freeze(obj):
+    # hashable version of the parameters of an extractor
+    if isinstance(obj, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in obj.items()))
+    elif isinstance(obj, (list, tuple)):
+        return tuple(_freeze(v) for v in obj)
+    elif isinstance(obj, np.ndarray):
+        return ("ndarray", obj.dtype.str, obj.shape, obj.tobytes())
+    try:
+        hash(obj)
+    except TypeError:
+        return repr(obj)
+    return obj
+
+
+class FeatureSpaceUnion(object):
+    """Extract the features of several spaces over the same light curves
+    running only once the extractors that they share.
+
+    Two extractors are shared if they have the same class, the same
+    parameters and their dependencies are computed by shared extractors;
+    every shared extractor computes all the features requested by any of
+    the spaces. The extractors configured in another way (for example a
+    ``LombScargle`` with other ``lscargle_kwds``) run once per variant.
+
+    Parameters
+    ----------
+
+    spaces : iterable of FeatureSpace
+        The spaces must have the same ``dtype`` and no ``cascade``.
+
+    Examples
+    --------
+
+    .. code-block:: pycon
+
+        >>> union = feets.FeatureSpaceUnion([fs_classifier1, fs_classifier2])
+        >>> (f1, v1), (f2, v2) = union.extract(**lc)
+
+    """
+
+    def __init__(self, spaces):
+        self._spaces = tuple(spaces)
+        if not self._spaces:
+            raise ValueError("At least one FeatureSpace is required")
+        for space in self._spaces:
+            if not isinstance(space, FeatureSpace):
+                msg = "Only FeatureSpace instances are allowed. Found {}"
+                raise TypeError(msg.format(type(space)))
+            if space.cascade:
+                raise ValueError(
+                    "The spaces with a cascade can't be combined")
+        dtypes = {space.dtype for space in self._spaces}
+        if len(dtypes) > 1:
+            msg = "All the spaces must have the same dtype. Found {}"
+            raise ValueError(msg.format(", ".join(map(str, dtypes))))
+
+        # deduplicate the extractors. The plan of every space is sorted by
+        # dependencies, so the providers are always processed first
+        keys, nodes, requested = {}, {}, {}
+        plan, node_of = [], {}
+        for sidx, space in enumerate(self._spaces):
+            for fext in space._execution_plan:
+                key = (type(fext), _freeze(fext.params), tuple(sorted(
+                    (dep, keys[(sidx, provider)])
+                    for dep, provider in space._providers[fext].items())))
+                keys[(sidx, fext)] = key
+                if key not in nodes:
+                    nodes[key] = type(fext)(**fext.params)
+                    requested[key] = set()
+                    plan.append(nodes[key])
+                requested[key].update(fext.get_requested_features())
+                node_of[(sidx, fext)] = nodes[key]
+        for key, node in nodes.items():
+            node.set_requested_features(requested[key])
+
+        # the columns of the combined results and of every space on them
+        columns, labels, self._space_columns = {}, [], []
+        providers = {}
+        for sidx, space in enumerate(self._spaces):
+            space_columns = np.empty(
+                len(space.features_as_array_), dtype=int)
+            for (fext, fname), column in space._columns.items():
+                node = node_of[(sidx, fext)]
+                if (node, fname) not in columns:
+                    columns[(node, fname)] = len(labels)
+                    labels.append("{}[{}].{}".format(
+                        node.name, plan.index(node), fname))
+                space_columns[column] = columns[(node, fname)]
+            self._space_columns.append(space_columns)
+            for fext, ext_providers in space._providers.items():
+                providers[node_of[(sidx, fext)]] = {
+                    dep: node_of[(sidx, provider)]
+                    for dep, provider in ext_providers.items()}
+
+        required_data = set()
+        for space in self._spaces:
+            required_data.update(space.required_data_)
+
+        self._combined = FeatureSpace._from_plan(
+            plan=plan, labels=labels, columns=columns, providers=providers,
+            dtype=self._spaces[0].dtype, required_data=required_data)
+
+    def __repr__(self):
+        return str(self)
+
+    def __str__(self):
+        return "<FeatureSpaceUnion: {} spaces, {} extractors>".format(
+            len(self._spaces), len(self._combined.excecution_plan_))
+
+    def _split(self, result):
+        splitted = []
+        for space, columns in zip(self._spaces, self._space_columns):
+            splitted.append((space.features_as_array_,) + tuple(
+                arr[..., columns] for arr in result[1:]))
+        return splitted
+
+    def extract(self, **kwargs):
+        """Extract the features of all the spaces from a light curve.
+
+        Accepts the same parameters as ``FeatureSpace.extract()``
+        (except ``out``).
+
+        Returns
+        -------
+
+        list
+            One ``(features, values)`` (or ``(features, values, flags)``)
+            tuple for every space.
+
+        """
+        return self._split(self._combined.extract(**kwargs))
+
+    def extract_batch(self, batch, **kwargs):
+        """Extract the features of all the spaces from a batch of light
+        curves.
+
+        Accepts the same parameters as ``FeatureSpace.extract_batch()``
+        (except ``out`` and ``grids``).
+
+        Returns
+        -------
+
+        list
+            One ``(features, values)`` (or ``(features, values, flags)``)
+            tuple for every space.
+
+        """
+        if kwargs.get("grids", "columns") != "columns":
+            raise ValueError("The grids can't be splitted between spaces")
+        return self._split(self._combined.extract_batch(batch, **kwargs))
+
+    @property
+    def spaces(self):
+        return self._spaces
+
+    @property
+    def excecution_plan_(self):
+        return self._combined.excecution_plan_
@@ -0,0 +1,214 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# The MIT License (MIT)
+
+# Copyright (c) 2017 Juan Cabral
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# =============================================================================
+# FUTURE
+# =============================================================================
+
+from __future__ import absolute_import, unicode_literals
+
+
+# =============================================================================
+# DOCS
+# =============================================================================
+
+__doc__ = """Dask integration to extract the features of catalogs larger than
+the memory.
+
+The extraction is mapped over the partitions of a Dask DataFrame in long
+format (one row per observation) or of a Dask bag of light curves, with
+``FeatureSpace.extract_batch()`` inside every partition. The columns and
+dtypes of the result are known from ``features_as_array_``, so the feature
+table is built lazily and can be written (or spilled) partition by
+partition:
+
+.. code-block:: python
+
+    import dask.dataframe as dd
+
+    obs = dd.read_parquet("observations/*.parquet")
+    obs = obs.set_index("source_id")  # all the rows of a source together
+    features = feets.dask.extract_partitions(
+        fs, obs, id_column="source_id",
+        columns={"time": "mjd", "magnitude": "mag", "error": "err"})
+    features.to_parquet("features/")
+
+Any Dask scheduler works, including the local threaded and process ones
+(``dask.config.set(scheduler="processes")``); no external cluster is
+needed.
+
+This module requires dask (``pip install "dask[dataframe]"``).
+
+"""
+
+__all__ = [
+    "extract_partitions",
+    "extract_bag",
+    "features_meta"]
+
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+import numpy as np
+
+import pandas as pd
+
+
+# =============================================================================
+# FUNCTIONS
+# =============================================================================
+
+def features_meta(space, index_name="id", bands=None, index_dtype=object):
+    """Return an empty ``pandas.DataFrame`` with the columns and dtypes of
+    the features extracted by ``space`` (the Dask ``meta``).
+
+    With ``bands`` the columns are named ``<feature>_<band>``. The index
+    has the dtype of the ids (``index_dtype``).
+
+    """
+    names = list(space.features_as_array_)
+    if bands is not None:
+        names = ["{}_{}".format(f, b) for b in bands for f in names]
+    index = pd.Index([], name=index_name, dtype=index_dtype)
+    return pd.DataFrame(
+        {name: np.array([], dtype=np.float64) for name in names},
+        index=index, columns=names)
+
+
+def _id_dtype(df, id_column):
+    # the dtype of the ids, in a column or in the index
+    if id_column in df.columns:
+        return df[id_column].dtype
+    if df.index.name == id_column:
+        return df.index.dtype
+    return np.dtype(object)
+
+
+def _extract_partition(df, space, id_column, columns, band_column, bands,
+                       n_jobs):
+    index_dtype = _id_dtype(df, id_column)
+    # the id can be the index of the partition (after a set_index)
+    if id_column not in df.columns and df.index.name == id_column:
+        df = df.reset_index()
+    meta = features_meta(space, id_column, bands, index_dtype)
+    if not len(df):
+        return meta
+    values = space.extract_dataframe(
+        df, id_column=id_column, columns=columns, band_column=band_column,
+        bands=bands, n_jobs=n_jobs)
+    # the partitions without observations in some band lack its columns
+    values = values.reindex(columns=meta.columns)
+    values.index = values.index.astype(index_dtype)
+    return values
+
+
+def extract_partitions(space, ddf, id_column="id", columns=None,
+                       band_column=None, bands=None, n_jobs=None):
+    """Lazily extract the features of a long format Dask DataFrame.
+
+    Every partition is processed with ``FeatureSpace.extract_dataframe()``
+    so all the observations of a source must be in the same partition
+    (for example after ``ddf.set_index(id_column)`` or reading files
+    splitted by source).
+
+    Parameters
+    ----------
+
+    space : feets.FeatureSpace
+        The space used to extract the features.
+    ddf : dask.dataframe.DataFrame
+        The observations, one per row. ``id_column`` can be a column or
+        the index.
+    id_column, columns, band_column
+        Same as in ``FeatureSpace.extract_dataframe()``.
+    bands : sequence, optional
+        The bands to extract (required with ``band_column``, the columns
+        of the result must be known before reading the partitions).
+    n_jobs : int, optional
+        Threads used inside every partition. Usually the parallelism is
+        given by the Dask scheduler.
+
+    Returns
+    -------
+
+    dask.dataframe.DataFrame
+        One row per source, indexed by ``id_column``, and one column per
+        feature.
+
+    """
+    if band_column is not None and bands is None:
+        raise ValueError("'bands' is required with 'band_column'")
+    bands = None if bands is None else list(bands)
+    return ddf.map_partitions(
+        _extract_partition, space, id_column, columns, band_column, bands,
+        n_jobs, meta=features_meta(
+            space, id_column, bands, _id_dtype(ddf, id_column)))
+
+
+def _extract_bag_partition(lcs, space, id_key, n_jobs):
+    lcs = list(lcs)
+    meta = features_meta(space, id_key)
+    if not lcs:
+        return meta
+    ids = [lc.get(id_key) for lc in lcs]
+    features, values = space.extract_batch(lcs, n_jobs=n_jobs)
+    index = pd.Index(ids, name=id_key, dtype=object)
+    return pd.DataFrame(values, index=index, columns=meta.columns)
+
+
+def extract_bag(space, bag, id_key="id", n_jobs=None):
+    """Lazily extract the features of a Dask bag of light curves.
+
+    Parameters
+    ----------
+
+    space : feets.FeatureSpace
+        The space used to extract the features.
+    bag : dask.bag.Bag
+        Of dict-like light curves (see
+        ``LightCurveBatch.from_lightcurves()``). Every partition is
+        extracted as one batch.
+    id_key : str, default "id"
+        The key of the id of every light curve (None if it is missing).
+    n_jobs : int, optional
+        Threads used inside every partition.
+
+    Returns
+    -------
+
+    dask.dataframe.DataFrame
+        One row per light curve, indexed by ``id_key``, and one column per
+        feature.
+
+    """
+    from dask import delayed
+    import dask.dataframe as dd
+
+    parts = [
+        delayed(_extract_bag_partition)(part, space, id_key, n_jobs)
+        for part in bag.to_delayed()]
+    return dd.from_delayed(parts, meta=features_meta(space, id_key))
@@ -39,6 +39,7 @@
 
 import os
 import shutil
+import collections
 from collections import Mapping
 
 import numpy as np
@@ -47,7 +48,8 @@ import requests
 
 import attr
 
-from ..extractors.core import DATAS
+from ..extractors.core import DATAS, DATA_TIME, DATA_ALIGNED_TIME
+from ..utils import is_narrow_dtype, time_epoch
 
 
 # =============================================================================
@@ -174,33 +176,52 @@ class Bunch(Mapping):  # THANKS SKLEARN
         return self._data.keys()
 
     def __getattr__(self, key):
+        # _data is missing while the object is unpickled
+        if key == "_data":
+            raise AttributeError(key)
         try:
             return self._data[key]
         except KeyError:
             raise AttributeError(key)
 
     def __setstate__(self, state):
-        pass
+        self._data = state["_data"]
 
 
 # This ugly code creates a LightCurve object based on the extractor constants
 # and ad som validations and a custom repr, as
 
+def _lc_attributes():
+    attrs = collections.OrderedDict(
+        (k, attr.ib(default=attr.NOTHING if k in DATAS[:2] else None,
+                    converter=attr.converters.optional(np.asarray)))
+        for k in DATAS)
+    attrs["time_offset"] = attr.ib(
+        default=None, converter=attr.converters.optional(float))
+    return attrs
+
+
 LightCurveBase = attr.make_class(
-    'LightCurveBase', {
-        k: attr.ib(default=attr.NOTHING if k in DATAS[:2] else None,
-                   converter=attr.converters.optional(np.asarray))
-        for k in DATAS}, frozen=True)
+    'LightCurveBase', _lc_attributes(), frozen=True)
 
 
 class LightCurve(LightCurveBase, Mapping):
+    """A light curve.
+
+    If ``time_offset`` is not None, the times of the light curve are
+    re-centered and the absolute time is ``time + time_offset``
+    (see ``astype()``).
+
+    """
 
     def __repr__(self):
         fields = []
         for a in attr.fields(LightCurveBase):
             v = getattr(self, a.name)
-            if v is not None:
+            if v is not None and a.name in DATAS:
                 fields.append("{}[{}]".format(a.name, len(v)))
+        if self.time_offset is not None:
+            fields.append("time_offset={}".format(self.time_offset))
         fields_str = ", ".join(fields)
         return "LightCurve({})".format(fields_str)
 
@@ -216,6 +237,46 @@ class LightCurve(LightCurveBase, Mapping):
     def __len__(self):
         return len(attr.fields(LightCurveBase))
 
+    def astype(self, dtype):
+        """Return a copy of the light curve with all the vectors casted to
+        ``dtype``.
+
+        If ``dtype`` is narrower than float64 the times are re-centered on an
+        epoch (stored in ``time_offset``) so large values like MJD keep their
+        precision; otherwise the absolute times are restored.
+
+        Examples
+        --------
+
+        .. code-block:: pycon
+
+            >>> lc = ds.data.I.astype(np.float32)
+            >>> lc.time_offset
+            52322.0
+            >>> fs = feets.FeatureSpace(dtype=np.float32)
+            >>> features, values = fs.extract(**lc)
+
+        """
+        narrow = is_narrow_dtype(dtype)
+        epoch = self.time_offset
+        if narrow and epoch is None:
+            times = self.time if self.time is not None else self.aligned_time
+            epoch = None if times is None else time_epoch(times)
+
+        values = {}
+        for name in DATAS:
+            value = getattr(self, name)
+            if value is None:
+                continue
+            if name in (DATA_TIME, DATA_ALIGNED_TIME) and epoch is not None:
+                value = value.astype(np.float64)
+                if narrow and self.time_offset is None:
+                    value = value - epoch
+                elif not narrow:
+                    value = value + epoch
+            values[name] = value.astype(dtype)
+        return LightCurve(time_offset=epoch if narrow else None, **values)
+
 
 # The real dataset object
 
@@ -261,3 +322,11 @@ class Data(Mapping):
 
     def __len__(self):
         return len(attr.fields(Data))
+
+    def astype(self, dtype):
+        """Return a copy of the data with all the light curves casted to
+        ``dtype`` (see ``LightCurve.astype()``).
+
+        """
+        return attr.evolve(self, data={
+            k: v.astype(dtype) for k, v in self.data.items()})
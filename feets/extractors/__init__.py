@@ -38,8 +38,12 @@ __doc__ = """Features extractors classes and register utilities"""
 
 __all__ = [
     "DATAS",
+    "FLAGS",
+    "describe_flags",
+    "count_flags",
     "register_extractor",
     "registered_extractors",
+    "registry_key",
     "is_registered",
     "available_features",
     "extractor_of",
@@ -53,13 +57,15 @@ __all__ = [
 # IMPORTS
 # =============================================================================
 
+import heapq
 import inspect
+import warnings
 
 import six
 
 from .core import (
     Extractor, ExtractorBadDefinedError, ExtractorContractError,
-    ExtractorWarning, DATAS)  # noqa
+    ExtractorWarning, DATAS, FLAGS, describe_flags, count_flags)  # noqa
 
 
 # =============================================================================
@@ -68,6 +74,9 @@ from .core import (
 
 _extractors = {}
 
+# changes every time an extractor is registered
+_version = 0
+
 
 def register_extractor(cls):
     if not inspect.isclass(cls) or not issubclass(cls, Extractor):
@@ -78,7 +87,9 @@ def register_extractor(cls):
             msg = "Dependency '{}' from extractor {}".format(d, cls)
             raise ExtractorBadDefinedError(msg)
 
+    global _version
     _extractors.update((f, cls) for f in cls.get_features())
+    _version += 1
     return cls
 
 
@@ -86,6 +97,14 @@ def registered_extractors():
     return dict(_extractors)
 
 
+def registry_key():
+    """A cheap hashable that changes when the registered extractors
+    change (to memoize what depends on them).
+
+    """
+    return id(_extractors), _version
+
+
 def is_registered(obj):
     if isinstance(obj, six.string_types):
         features = [obj]
@@ -108,26 +127,57 @@ def extractor_of(feature):
 def sort_by_dependencies(exts, retry=None):
     """Calculate the Feature Extractor Resolution Order.
 
-    """
-    sorted_ext, features_from_sorted = [], set()
-    pending = [(e, 0) for e in exts]
-    retry = len(exts) * 100 if retry is None else retry
-    while pending:
-        ext, cnt = pending.pop(0)
+    A topological sort of the extractors (classes or instances) by their
+    dependencies; the extractors that don't depend on each other keep the
+    given order.
+
+    ``retry`` is deprecated: the sort is not iterative anymore, so the
+    parameter has no effect and will be removed in a future release.
 
+    """
+    if retry is not None:
+        warnings.warn(
+            "The 'retry' parameter of sort_by_dependencies is deprecated, "
+            "has no effect and will be removed", DeprecationWarning,
+            stacklevel=2)
+    exts = list(exts)
+    providers = {}
+    for idx, ext in enumerate(exts):
         if not isinstance(ext, Extractor) and not issubclass(ext, Extractor):
             msg = "Only Extractor instances are allowed. Found {}."
             raise TypeError(msg.format(type(ext)))
-
-        deps = ext.get_dependencies()
-        if deps.difference(features_from_sorted):
-            if cnt + 1 > retry:
-                msg = "Maximun retry ({}) to sort achieved from extractor {}."
-                raise RuntimeError(msg.format(retry, type(ext)))
-            pending.append((ext, cnt + 1))
-        else:
-            sorted_ext.append(ext)
-            features_from_sorted.update(ext.get_features())
+        for fname in ext.get_features():
+            providers[fname] = idx
+
+    # the extractors that every extractor waits for and the inverse
+    waiting = [set() for _ in exts]
+    dependants = [[] for _ in exts]
+    for idx, ext in enumerate(exts):
+        missing = ext.get_dependencies().difference(providers)
+        if missing:
+            msg = "Can't sort the extractor {}, dependencies not found: {}"
+            raise RuntimeError(msg.format(ext, ", ".join(sorted(missing))))
+        for dep in ext.get_dependencies():
+            provider = providers[dep]
+            if provider != idx and provider not in waiting[idx]:
+                waiting[idx].add(provider)
+                dependants[provider].append(idx)
+
+    ready = [idx for idx, deps in enumerate(waiting) if not deps]
+    heapq.heapify(ready)
+    sorted_ext = []
+    while ready:
+        idx = heapq.heappop(ready)
+        sorted_ext.append(exts[idx])
+        for dependant in dependants[idx]:
+            waiting[dependant].discard(idx)
+            if not waiting[dependant]:
+                heapq.heappush(ready, dependant)
+
+    if len(sorted_ext) != len(exts):
+        cycle = [exts[idx] for idx, deps in enumerate(waiting) if deps]
+        msg = "Circular dependencies between the extractors {}"
+        raise RuntimeError(msg.format(", ".join(map(str, cycle))))
     return tuple(sorted_ext)
 
 
@@ -41,8 +41,11 @@ __doc__ = """Features extractors base classes classes"""
 # IMPORTS
 # =============================================================================
 
+import threading
 import warnings
-from collections import namedtuple
+from collections import namedtuple, OrderedDict
+
+import numpy as np
 
 import six
 
@@ -73,6 +76,30 @@ DATAS = (
     DATA_ALIGNED_ERROR2
 )
 
+# the data vectors that are observed together; the invalid observations of
+# every group are removed together.
+DATA_GROUPS = (
+    (DATA_TIME, DATA_MAGNITUDE, DATA_ERROR),
+    (DATA_MAGNITUDE2,),
+    (DATA_ALIGNED_TIME, DATA_ALIGNED_MAGNITUDE, DATA_ALIGNED_MAGNITUDE2,
+     DATA_ALIGNED_ERROR, DATA_ALIGNED_ERROR2))
+
+# quality flags of the features (bits of an uint8)
+FLAG_NOT_FINITE = 1  # the value is NaN or infinite
+FLAG_UNDEFINED = 2  # the feature can't be computed for this light curve
+FLAG_DIVERGED = 4  # a numerical optimization diverged
+FLAG_KNOWN_ISSUE = 8  # the extractor has documented warnings
+FLAG_SKIPPED = 16  # not computed by a cascade of the FeatureSpace
+
+FLAGS = OrderedDict([
+    ("not_finite", FLAG_NOT_FINITE),
+    ("undefined", FLAG_UNDEFINED),
+    ("diverged", FLAG_DIVERGED),
+    ("known_issue", FLAG_KNOWN_ISSUE),
+    ("skipped", FLAG_SKIPPED)])
+
+FLAGS_DTYPE = np.uint8
+
 
 # =============================================================================
 # EXCEPTIONS
@@ -105,13 +132,54 @@ warnings.simplefilter("always", ExtractorWarning)
 warnings.simplefilter("always", FeatureExtractionWarning)
 
 
+# =============================================================================
+# FLAGS FUNCTIONS
+# =============================================================================
+
+def describe_flags(flags):
+    """Return the names (see ``FLAGS``) of the quality flags setted in
+    the integer ``flags``.
+
+    """
+    return tuple(name for name, bit in FLAGS.items() if int(flags) & bit)
+
+
+def count_flags(flags, axis=0):
+    """Count how many times every quality flag is setted in an array of
+    flags (as the returned by ``FeatureSpace.extract()``).
+
+    The counts of several batches can be added to aggregate them.
+
+    Returns
+    -------
+
+    dict
+        ``{flag_name: counts}`` with the counts along ``axis`` (by default
+        one count per feature for a 2D array of flags).
+
+    """
+    flags = np.asarray(flags)
+    return {
+        name: np.count_nonzero(flags & bit, axis=axis)
+        for name, bit in FLAGS.items()}
+
+
 # =============================================================================
 # BASE CLASSES
 # =============================================================================
 
+# the extractors classes that already reported their warnings
+_warned = set()
+
+# state of the extraction in progress in every thread (the quality flags);
+# the extractors instances are shared and must not store per call data.
+_local = threading.local()
+
+
 ExtractorConf = namedtuple(
     "ExtractorConf",
-    ["data", "dependencies", "params", "features", "warnings"])
+    ["data", "dependencies", "params", "features", "ordered_features",
+     "warnings"])
 
 
 class ExtractorMeta(type):
@@ -188,6 +256,7 @@ class ExtractorMeta(type):
             dependencies=frozenset(cls.dependencies),
             params=tuple(cls.params.items()),
             features=frozenset(cls.features),
+            ordered_features=tuple(cls.features),
             warnings=tuple(cls.warnings))
 
         if not cls.__doc__:
@@ -207,6 +276,43 @@ class Extractor(object):
 
     _conf = None
 
+    # if it's True the extractor always receives the data in float64 (with
+    # the absolute times) even when the FeatureSpace computes in a narrower
+    # dtype; needed by the periodograms, phase folding and likelihoods.
+    requires_float64 = False
+
+    # if it's False the calls to the extractor (setup, fit and teardown) are
+    # serialized when the extractor is shared by several threads. None
+    # means that the extractor is thread-safe unless it redefines setup()
+    # or teardown().
+    thread_safe = None
+
+    # if it's True fit() also receives a ``period`` with the trusted period
+    # of the light curve (for example from a catalog) or None if it's
+    # unknown; the periodic extractors use it instead of searching it.
+    accepts_period = False
+
+    # if it's True the features depend on the order of the observations,
+    # which must be sorted by time (and by aligned_time the aligned data);
+    # the FeatureSpace verifies the order (and sorts the light curve once
+    # if it's needed) before running the extractor. Unless its docstring
+    # says otherwise the extractor doesn't sort them by itself, so a
+    # direct call to fit() needs a sorted light curve.
+    requires_sorted_time = False
+
+    # the time of fit() grows approximately as ``n ** complexity`` with the
+    # number of observations; FeatureSpace.extract_batch() uses it to
+    # balance the light curves between the jobs.
+    complexity = 1
+
+    # if it's not None the features are the cells of a 2D grid (an
+    # histogram) with this shape, in row-major order; the batch extraction
+    # can return them as a sparse matrix or, if ``grid_dtype`` is not None,
+    # as a compact block of that dtype (which must represent the values of
+    # the cells without loss and be narrower than float64).
+    grid_shape = None
+    grid_dtype = None
+
     @classmethod
     def get_data(cls):
         return cls._conf.data
@@ -223,6 +329,14 @@ class Extractor(object):
     def get_features(cls):
         return cls._conf.features
 
+    @classmethod
+    def get_ordered_features(cls):
+        """The features in the same order as they were declared. This is the
+        order used by ``fit_into()`` and ``extract_into()``.
+
+        """
+        return cls._conf.ordered_features
+
     @classmethod
     def get_warnings(cls):
         return cls._conf.warnings
@@ -232,8 +346,13 @@ class Extractor(object):
         return not cls._conf.warnings
 
     def __init__(self, **cparams):
-        for w in self.get_warnings():
-            warnings.warn(w, ExtractorWarning)
+        # the documented warnings are reported only once per class; every
+        # feature extracted then carries the FLAG_KNOWN_ISSUE flag
+        cls = type(self)
+        if cls not in _warned:
+            for w in self.get_warnings():
+                warnings.warn(w, ExtractorWarning)
+            _warned.add(cls)
 
         self.name = type(self).__name__
 
@@ -249,19 +368,68 @@ class Extractor(object):
         # here all is ok
         self.params.update(cparams)
 
+        self._lock = None if self.is_thread_safe() else threading.RLock()
+
+        # all the features are computed until a FeatureSpace requests
+        # only some of them
+        self._requested = self.get_features()
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state["_lock"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = None if self.is_thread_safe() else threading.RLock()
+
     def __repr__(self):
         return str(self)
 
     def __str__(self):
-        if not hasattr(self, "__str"):
-            params = self.params
-            if params:
-                params = ", ".join([
-                    "{}={}".format(k, v) for k, v in params.items()])
-            else:
-                params = ""
-            self.__str = "{}({})".format(self.name, params)
-        return self.__str
+        params = self.params
+        if params:
+            params = ", ".join([
+                "{}={}".format(k, v) for k, v in params.items()])
+        else:
+            params = ""
+        return "{}({})".format(self.name, params)
+
+    def set_requested_features(self, features):
+        """Restrict the features that this instance must compute.
+
+        ``fit()`` can check ``get_requested_features()`` (or
+        ``is_requested()``) to skip the work of the features not
+        requested; the values of these features can be omitted from the
+        result (they are reported as NaN).
+
+        """
+        features = frozenset(features)
+        unknown = features.difference(self.get_features())
+        if unknown or not features:
+            msg = "Extractor '{}' can't compute the features [{}]".format(
+                self.name, ", ".join(unknown))
+            raise ExtractorContractError(msg)
+        self._requested = features
+
+    def get_requested_features(self):
+        return self._requested
+
+    def is_requested(self, *features):
+        """Return True if any of the features is requested."""
+        return not self._requested.isdisjoint(features)
+
+    @classmethod
+    def is_thread_safe(cls):
+        """Return True if the same instance of the extractor can run in
+        several threads at the same time.
+
+        """
+        if cls.thread_safe is not None:
+            return cls.thread_safe
+        return (
+            cls.setup == Extractor.setup and
+            cls.teardown == Extractor.teardown)
 
     def setup(self):
         """This method will be executed before the feature is calculated"""
@@ -274,7 +442,156 @@ class Extractor(object):
         """This method will be executed after the feature is calculated"""
         pass
 
-    def extract(self, **kwargs):
+    def fit_batch(self, batch, **kwargs):
+        """Optional vectorized version of ``fit()``.
+
+        Receives a ``feets.batch.LightCurveBatch``, the dependencies as
+        arrays with one value per light curve and the configured parameters,
+        and must return a dict with one array (of ``len(batch)``) per
+        feature. The quality flags of the light curves are reported with
+        ``flag_batch()``.
+
+        """
+        raise NotImplementedError()
+
+    @classmethod
+    def is_batch_capable(cls):
+        """Return True if the extractor redefines ``fit_batch()``."""
+        return cls.fit_batch != Extractor.fit_batch
+
+    def fit_windows(self, lc, starts, stops, **kwargs):
+        """Optional version of ``fit_batch()`` for the sliding windows of a
+        single light curve.
+
+        Receives the light curve as ``{data_name: array}`` (without
+        invalid observations and sorted by time, see
+        ``feets.batch.window_source()``), the bounds of the windows
+        ``lc[d][starts[i]:stops[i]]`` and the configured parameters, and
+        must return a dict with one array (of ``len(starts)``) per
+        feature. The windows are never copied, so the features are
+        computed with the window kernels of ``feets.batch`` (prefix sums)
+        in a single pass over the light curve.
+
+        """
+        raise NotImplementedError()
+
+    @classmethod
+    def is_window_capable(cls):
+        """Return True if the extractor redefines ``fit_windows()`` (and
+        has no dependencies).
+
+        """
+        return (
+            cls.fit_windows != Extractor.fit_windows and
+            not cls.get_dependencies())
+
+    def fit_masked(self, **kwargs):
+        """Optional version of ``fit()`` that ignore masked observations.
+
+        Receives the same parameters as ``fit()`` but the data are
+        ``numpy.ma.MaskedArray`` views over the original buffers, so the
+        light curves are never copied to drop the invalid observations.
+
+        """
+        raise NotImplementedError()
+
+    @classmethod
+    def is_mask_capable(cls):
+        """Return True if the extractor redefines ``fit_masked()``."""
+        return cls.fit_masked != Extractor.fit_masked
+
+    def fit_into(self, out, **kwargs):
+        """Optional version of ``fit()`` that writes the values of the
+        features directly in ``out`` (a float array with one slot per
+        feature, in the order of ``get_ordered_features()``) instead of
+        creating a dict.
+
+        """
+        raise NotImplementedError()
+
+    @classmethod
+    def is_inplace_capable(cls):
+        """Return True if the extractor redefines ``fit_into()``."""
+        return cls.fit_into != Extractor.fit_into
+
+    def flag(self, flag, *features):
+        """Set a quality flag (``FLAG_*``) to some features (or to all the
+        features of the extractor if no one is given) of the light curve
+        currently in extraction.
+
+        This is the cheap alternative to ``warnings.warn()`` to report
+        problems inside ``fit()``.
+
+        """
+        current = _local.__dict__.setdefault("flags", {})
+        for fname in (features or self.get_ordered_features()):
+            current[fname] = current.get(fname, 0) | flag
+
+    def flag_batch(self, flag, curves, *features):
+        """Same as ``flag()`` inside ``fit_batch()``: set a quality flag to
+        some features (or to all the features of the extractor) of the
+        light curves selected by ``curves`` (a boolean array with one
+        value per light curve of the batch, or their indexes).
+
+        Inside ``fit_batch()`` the calls to ``flag()`` apply to all the
+        light curves of the batch.
+
+        """
+        current = _local.__dict__.setdefault("batch_flags", [])
+        current.append(
+            (flag, np.asarray(curves),
+             features or self.get_ordered_features()))
+
+    def _write_flags(self, flags):
+        # write the flags of the last extraction of this thread in the
+        # order of get_ordered_features()
+        current = _local.__dict__.get("flags", {})
+        for idx, fname in enumerate(self.get_ordered_features()):
+            flags[idx] = current.get(fname, 0)
+
+    def _write_batch_flags(self, flags):
+        # write the flags of the last fit_batch() of this thread in a
+        # matrix with one row per light curve
+        self._write_flags(flags.T)
+        ordered = self.get_ordered_features()
+        for flag, curves, fnames in _local.__dict__.get("batch_flags", []):
+            if curves.dtype == bool:
+                curves = np.flatnonzero(curves)
+            columns = [ordered.index(fname) for fname in fnames]
+            flags[np.ix_(curves, columns)] |= flag
+
+    def _execute(self, fit, *args, **kwargs):
+        # run fit between setup() and teardown(); the calls are serialized
+        # if the extractor is not thread-safe
+        if self._lock is not None:
+            self._lock.acquire()
+        _local.flags, _local.batch_flags = {}, []
+        try:
+            self.setup()
+            return fit(*args, **kwargs)
+        finally:
+            try:
+                self.teardown()
+            finally:
+                if self._lock is not None:
+                    self._lock.release()
+
+    def _check_result(self, result):
+        # validate if the extractors generates the expected features: all
+        # the requested ones and nothing unknown
+        expected = self._requested  # the expected features
+        diff = (
+            expected.difference(result.keys()) or
+            set(result).difference(self.get_features()))  # some diff
+        if diff:
+            cls = type(self)
+            estr, fstr = ", ".join(expected), ", ".join(result.keys())
+            msg = (
+                "The extractor '{}' expect the features [{}], "
+                "and found: [{}]").format(cls, estr, fstr)
+            raise ExtractorContractError(msg)
+
+    def _fit_kwargs(self, kwargs):
         # create the besel for the parameters
         fit_kwargs = {}
 
@@ -282,29 +599,144 @@ class Extractor(object):
         dependencies = kwargs["features"]
         fit_kwargs = {k: dependencies[k] for k in self.get_dependencies()}
 
+        # the invalid observations (with the numpy.ma convention) if the
+        # data must be masked
+        invalid = kwargs.get("invalid")
+
         # add the required data as parameters to fit()
         for d in self.get_data():
-            fit_kwargs[d] = kwargs[d]
+            fit_kwargs[d] = (
+                kwargs[d] if invalid is None else
+                np.ma.MaskedArray(kwargs[d], mask=invalid))
 
         # add the configured parameters as parameters to fit()
         fit_kwargs.update(self.params)
-        try:
-            # setup & run te extractor
-            self.setup()
-            result = self.fit(**fit_kwargs)
-
-            # validate if the extractors generates the expected features
-            expected = self.get_features()  # the expected features
-            diff = (
-                expected.difference(result.keys()) or
-                set(result).difference(expected))  # some diff
-            if diff:
-                cls = type(self)
-                estr, fstr = ", ".join(expected), ", ".join(result.keys())
-                msg = (
-                    "The extractor '{}' expect the features [{}], "
-                    "and found: [{}]").format(cls, estr, fstr)
-                raise ExtractorContractError(msg)
-            return dict(result)
-        finally:
-            self.teardown()
+
+        # the known period (NaN is also unknown)
+        if self.accepts_period:
+            period = kwargs.get("period")
+            if period is not None and not np.isfinite(period):
+                period = None
+            fit_kwargs["period"] = period
+        return fit_kwargs, invalid
+
+    def extract(self, **kwargs):
+        fit_kwargs, invalid = self._fit_kwargs(kwargs)
+
+        # setup & run te extractor
+        fit = self.fit if invalid is None else self.fit_masked
+        result = self._execute(fit, **fit_kwargs)
+        self._check_result(result)
+        return dict(result)
+
+    def extract_into(self, out, flags=None, **kwargs):
+        """Same as ``extract()`` but the values of the features are written
+        in ``out`` following the order of ``get_ordered_features()``.
+
+        If the extractor implements ``fit_into()`` no intermediate dict is
+        created. If ``flags`` is provided the quality flags of every
+        feature are written there in the same order.
+
+        """
+        if self.is_inplace_capable() and kwargs.get("invalid") is None:
+            fit_kwargs = self._fit_kwargs(kwargs)[0]
+            self._execute(self.fit_into, out, **fit_kwargs)
+        else:
+            result = self.extract(**kwargs)
+            for idx, fname in enumerate(self.get_ordered_features()):
+                out[idx] = result.get(fname, np.nan)
+        if flags is not None:
+            self._write_flags(flags)
+        return out
+
+    def extract_batch(self, batch, features, out=None, flags=None):
+        """Extract the features of every light curve of a
+        ``feets.batch.LightCurveBatch``.
+
+        If the extractor is batch capable all the curves are processed with
+        a single call to ``fit_batch()``; otherwise ``extract_into()`` is
+        called once per curve.
+
+        Parameters
+        ----------
+
+        batch : LightCurveBatch
+        features : dict
+            The values of the dependencies, one array per feature.
+        out : ndarray, optional
+            A float array with shape ``(len(batch), n_features)`` where the
+            features are stored, with the columns in the order of
+            ``get_ordered_features()``.
+        flags : ndarray, optional
+            An array with the same shape of ``out`` for the quality flags
+            (see ``flag()`` and ``flag_batch()``).
+
+        Returns
+        -------
+
+        dict
+            One array with ``len(batch)`` values for every feature (views
+            over the columns of ``out``).
+
+        """
+        dependencies = {k: features[k] for k in self.get_dependencies()}
+
+        ordered = self.get_ordered_features()
+        if out is None:
+            out = np.empty((len(batch), len(ordered)))
+        elif out.shape != (len(batch), len(ordered)):
+            msg = "'out' must have the shape {}. Found {}"
+            raise ValueError(msg.format((len(batch), len(ordered)), out.shape))
+
+        if self.is_batch_capable():
+            fit_kwargs = dict(dependencies)
+            fit_kwargs.update(self.params)
+            result = self._execute(self.fit_batch, batch, **fit_kwargs)
+            self._check_result(result)
+            for idx, fname in enumerate(ordered):
+                out[:, idx] = result.get(fname, np.nan)
+            if flags is not None:
+                self._write_batch_flags(flags)
+        else:
+            periods = batch.periods
+            for idx, curve in enumerate(batch):
+                curve_deps = {k: v[idx] for k, v in dependencies.items()}
+                self.extract_into(
+                    out[idx], features=curve_deps,
+                    flags=None if flags is None else flags[idx],
+                    period=None if periods is None else periods[idx],
+                    **curve)
+
+        return {fname: out[:, idx] for idx, fname in enumerate(ordered)}
+
+    def extract_windows(self, lc, starts, stops, out=None, flags=None):
+        """Extract the features of the sliding windows of a light curve
+        with ``fit_windows()``.
+
+        ``out`` and ``flags`` are the same as in ``extract_batch()`` with
+        one row per window.
+
+        Returns
+        -------
+
+        dict
+            One array with ``len(starts)`` values for every feature (views
+            over the columns of ``out``).
+
+        """
+        ordered = self.get_ordered_features()
+        shape = (len(starts), len(ordered))
+        if out is None:
+            out = np.empty(shape)
+        elif out.shape != shape:
+            msg = "'out' must have the shape {}. Found {}"
+            raise ValueError(msg.format(shape, out.shape))
+
+        result = self._execute(
+            self.fit_windows, lc, starts, stops, **self.params)
+        self._check_result(result)
+        for idx, fname in enumerate(ordered):
+            out[:, idx] = result.get(fname, np.nan)
+        if flags is not None:
+            self._write_batch_flags(flags)
+        return {fname: out[:, idx] for idx, fname in enumerate(ordered)}
@@ -46,6 +46,7 @@ import math
 
 import numpy as np
 
+from ..batch import segment_lengths, segment_slice_median, segment_sort
 from .core import Extractor
 
 
@@ -82,3 +83,24 @@ class Amplitude(Extractor):
         amplitude = (np.median(sorted_mag[-int(math.ceil(0.05 * N)):]) -
                      np.median(sorted_mag[0:int(math.ceil(0.05 * N))])) / 2.0
         return {"Amplitude": amplitude}
+
+    def fit_masked(self, magnitude):
+        N = magnitude.count()
+
+        # the masked values are sorted at the end
+        sorted_mag = np.ma.sort(magnitude).data[:N]
+
+        amplitude = (np.median(sorted_mag[-int(math.ceil(0.05 * N)):]) -
+                     np.median(sorted_mag[0:int(math.ceil(0.05 * N))])) / 2.0
+        return {"Amplitude": amplitude}
+
+    def fit_batch(self, batch):
+        magnitude, offsets = batch.segments("magnitude")
+        N = segment_lengths(offsets)
+        sorted_mag = segment_sort(magnitude, offsets)
+
+        size = np.ceil(0.05 * N).astype(int)
+        amplitude = (
+            segment_slice_median(sorted_mag, offsets, N - size, size) -
+            segment_slice_median(sorted_mag, offsets, 0, size)) / 2.0
+        return {"Amplitude": amplitude}
@@ -91,6 +91,7 @@ class AutocorLength(Extractor):
     data = ['magnitude']
     features = ['Autocor_length']
     params = {"nlags": 100}
+    requires_sorted_time = True
 
     def fit(self, magnitude, nlags):
 
@@ -44,6 +44,7 @@ __doc__ = """"""
 
 import numpy as np
 
+from ..batch import segment_broadcast, segment_lengths, segment_sum
 from .core import Extractor
 
 
@@ -93,3 +94,34 @@ class Beyond1Std(Extractor):
                                      magnitude < weighted_mean - std))
 
         return {"Beyond1Std": float(count) / n}
+
+    def fit_masked(self, magnitude, error):
+        n = magnitude.count()
+        weighted_mean = np.ma.average(magnitude, weights=1 / error ** 2)
+
+        # Standard deviation with respect to the weighted mean
+        var = ((magnitude - weighted_mean) ** 2).sum()
+        std = np.sqrt((1.0 / (n - 1)) * var)
+
+        count = np.ma.logical_or(magnitude > weighted_mean + std,
+                                 magnitude < weighted_mean - std).sum()
+
+        return {"Beyond1Std": float(count) / n}
+
+    def fit_batch(self, batch):
+        magnitude, offsets = batch.segments("magnitude")
+        error = batch.segments("error")[0]
+        n = segment_lengths(offsets)
+        weights = 1 / error ** 2
+        weighted_mean = segment_broadcast(
+            segment_sum(magnitude * weights, offsets) /
+            segment_sum(weights, offsets), offsets)
+
+        # Standard deviation with respect to the weighted mean
+        var = segment_sum((magnitude - weighted_mean) ** 2, offsets)
+        std = segment_broadcast(np.sqrt((1.0 / (n - 1)) * var), offsets)
+
+        beyond = np.logical_or(magnitude > weighted_mean + std,
+                               magnitude < weighted_mean - std)
+        count = segment_sum(beyond.astype(int), offsets)
+        return {"Beyond1Std": count.astype(float) / n}
@@ -41,13 +41,16 @@ __doc__ = """"""
 # IMPORTS
 # =============================================================================
 
-import warnings
+import re
 
 import numpy as np
 
+import scipy
 from scipy.optimize import minimize
 
-from .core import Extractor, FeatureExtractionWarning
+import six
+
+from .core import Extractor, FLAG_DIVERGED
 
 
 # =============================================================================
@@ -58,6 +61,18 @@ EPSILON = 1e-300
 
 CTE_NEG = -np.infty
 
+# the methods of minimize() that support bounds (the rest warns every time
+# that they are ignored)
+BOUNDED_METHODS = {"l-bfgs-b", "tnc", "slsqp", "trust-constr"}
+
+# major and minor (distutils is gone in python 3.12)
+SCIPY_VERSION = tuple(
+    int(part) for part in re.findall(r"\d+", scipy.__version__)[:2])
+if SCIPY_VERSION >= (1, 5):
+    BOUNDED_METHODS.add("powell")
+if SCIPY_VERSION >= (1, 7):
+    BOUNDED_METHODS.add("nelder-mead")
+
 
 # =============================================================================
 # FUNCTIONS
@@ -100,8 +115,6 @@ def _car_like(parameters, t, x, error_vars):
         loglik = loglik + loglik_inter
 
         if loglik <= CTE_NEG:
-            warnings.warn(
-                "CAR log-likelihood to inf", FeatureExtractionWarning)
             return -np.infty
 
     # the minus one is to perfor maximization using the minimize function
@@ -187,26 +200,37 @@ class CAR(Extractor):
     """
     data = ['magnitude', 'time', 'error']
     features = ["CAR_sigma", "CAR_tau", "CAR_mean"]
-    params = {"minimize_method": "nelder-mead"}
+    params = {"minimize_method": "nelder-mead", "minimize_tol": None}
+    requires_float64 = True
+    requires_sorted_time = True
 
-    def _calculate_CAR(self, time, magnitude, error, minimize_method):
+    def _calculate_CAR(self, time, magnitude, error,
+                       minimize_method, minimize_tol):
         magnitude = magnitude.copy()
         time = time.copy()
         error = error.copy() ** 2
 
         x0 = [10, 0.5]
         bnds = ((0, 100), (0, 100))
-        with warnings.catch_warnings():
-            warnings.filterwarnings('ignore')
+        if (
+            isinstance(minimize_method, six.string_types) and
+            minimize_method.lower() not in BOUNDED_METHODS
+        ):
+            bnds = None
+        with np.errstate(all="ignore"):
             res = minimize(_car_like, x0,
                            args=(time, magnitude, error),
-                           method=minimize_method, bounds=bnds)
+                           method=minimize_method, bounds=bnds,
+                           tol=minimize_tol)
+        if not np.isfinite(res.fun):
+            # the log-likelihood goes to infinite
+            self.flag(FLAG_DIVERGED)
         sigma, tau = res.x[0], res.x[1]
         return sigma, tau
 
-    def fit(self, magnitude, time, error, minimize_method):
+    def fit(self, magnitude, time, error, minimize_method, minimize_tol):
         sigma, tau = self._calculate_CAR(
-            time, magnitude, error, minimize_method)
+            time, magnitude, error, minimize_method, minimize_tol)
         mean = np.mean(magnitude) / tau
 
         return {"CAR_sigma": sigma, "CAR_tau": tau, "CAR_mean": mean}
@@ -44,6 +44,7 @@ __doc__ = """"""
 
 import numpy as np
 
+from ..batch import segment_mean
 from .core import Extractor
 
 
@@ -81,3 +82,10 @@ class Color(Extractor):
 
     def fit(self, magnitude, magnitude2):
         return {"Color": np.mean(magnitude) - np.mean(magnitude2)}
+
+    def fit_batch(self, batch):
+        magnitude, offsets = batch.segments("magnitude")
+        magnitude2, offsets2 = batch.segments("magnitude2")
+        return {"Color": (
+            segment_mean(magnitude, offsets) -
+            segment_mean(magnitude2, offsets2))}
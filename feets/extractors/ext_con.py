@@ -87,6 +87,7 @@ class Con(Extractor):
     data = ['magnitude']
     features = ["Con"]
     params = {"consecutiveStar": 3}
+    requires_sorted_time = True
 
     def fit(self, magnitude, consecutiveStar):
 
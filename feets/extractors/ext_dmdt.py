@@ -47,6 +47,42 @@ import numpy as np
 from .core import Extractor
 
 
+# =============================================================================
+# FUNCTIONS
+# =============================================================================
+
+def _sample_pairs(size, n_pairs, random):
+    """Draw ``n_pairs`` distinct pairs ``i < j`` of ``range(size)``.
+
+    The pairs are drawn as linear indexes of the upper triangle (row by
+    row) and mapped to ``(i, j)`` in closed form, so the memory is linear
+    in ``n_pairs`` instead of quadratic in ``size``.
+
+    """
+    n_vals = size * (size - 1) // 2
+    if n_pairs > n_vals // 2:
+        # dense sample, the rejection would need too many rounds
+        sample = np.sort(random.choice(n_vals, n_pairs, replace=False))
+    else:
+        sample = np.empty(0, dtype=np.int64)
+        while len(sample) < n_pairs:
+            draw = random.randint(0, n_vals, n_pairs - len(sample))
+            sample = np.union1d(sample, draw)
+
+    # the row i begins at the linear index i * (2 * size - i - 1) / 2
+    def row_start(i):
+        return i * (2 * size - i - 1) // 2
+
+    b = 2. * size - 1.
+    first = np.floor((b - np.sqrt(b * b - 8. * sample)) / 2.)
+    first = first.astype(np.int64)
+    # fix the rounding errors of the square root
+    first -= row_start(first) > sample
+    first += row_start(first + 1) <= sample
+    second = sample - row_start(first) + first + 1
+    return first, second
+
+
 # =============================================================================
 # EXTRACTOR CLASS
 # =============================================================================
@@ -73,12 +109,26 @@ class DeltamDeltat(Extractor):
     ----------
     Mahabal et. al 2017 (arxiv:1709.06257)
 
+    **Parameters**
+
+    - ``dt_bins``, ``dm_bins``: the edges of the bins of the map.
+    - ``max_pairs``: if the light curve has more pairs of observations,
+      only a random (but reproducible) sample of this size is used to build
+      the map; ``None`` (default) uses all the pairs.
+
     """
     data = ['magnitude', 'time']
     params = {"dt_bins": np.hstack([0., np.logspace(-3., 3.5, num=23)]),
               "dm_bins": np.hstack([-1.*np.logspace(1, -1, num=12), 0,
-                                    np.logspace(-1, 1, num=12)])}
+                                    np.logspace(-1, 1, num=12)]),
+              "max_pairs": None}
     parallel = True
+    complexity = 2
+    requires_sorted_time = True
+
+    # the counts are quantized to 0-255
+    grid_shape = (len(params["dt_bins"]) - 1, len(params["dm_bins"]) - 1)
+    grid_dtype = np.uint8
 
     features = []
     for i in range(len(params["dt_bins"]) - 1):
@@ -92,7 +142,7 @@ class DeltamDeltat(Extractor):
 
     del i, j
 
-    def fit(self, magnitude, time, dt_bins, dm_bins):
+    def counts(self, magnitude, time, dt_bins, dm_bins, max_pairs=None):
 
         def delta_calc(idx):
             t0 = time[idx]
@@ -108,17 +158,29 @@ class DeltamDeltat(Extractor):
         lc_len = len(time)
         n_vals = int(0.5 * lc_len * (lc_len - 1))
 
-        deltas = np.vstack(
-            delta_calc(idx) for idx in range(lc_len - 1))
+        if max_pairs is not None and n_vals > max_pairs:
+            # a fixed seed so the same light curve always has the same map
+            random = np.random.RandomState(42)
+            first, second = _sample_pairs(lc_len, max_pairs, random)
+            deltat = np.abs(time[second] - time[first])
+            deltam = magnitude[second] - magnitude[first]
+            n_vals = max_pairs
+        else:
+            deltas = np.vstack(
+                delta_calc(idx) for idx in range(lc_len - 1))
 
-        deltat = deltas[:, 0]
-        deltam = deltas[:, 1]
+            deltat = deltas[:, 0]
+            deltam = deltas[:, 1]
 
         bins = [dt_bins, dm_bins]
         counts = np.histogram2d(deltat, deltam, bins=bins, normed=False)[0]
         counts = np.fix(255. * counts/n_vals + 0.999).astype(int)
 
-        result = zip(self.sorted_features,
-                     counts.reshape((len(dt_bins) - 1) * (len(dm_bins) - 1)))
+        return counts.reshape((len(dt_bins) - 1) * (len(dm_bins) - 1))
+
+    def fit(self, magnitude, time, dt_bins, dm_bins, max_pairs):
+        counts = self.counts(magnitude, time, dt_bins, dm_bins, max_pairs)
+        return dict(zip(self.sorted_features, counts))
 
-        return dict(result)
+    def fit_into(self, out, magnitude, time, dt_bins, dm_bins, max_pairs):
+        out[:] = self.counts(magnitude, time, dt_bins, dm_bins, max_pairs)
@@ -78,6 +78,7 @@ class EtaColor(Extractor):
 
     data = ['aligned_magnitude', 'aligned_time', 'aligned_magnitude2']
     features = ["Eta_color"]
+    requires_sorted_time = True
 
     def fit(self, aligned_magnitude, aligned_time, aligned_magnitude2):
         N = len(aligned_magnitude)
@@ -44,6 +44,9 @@ __doc__ = """"""
 
 import numpy as np
 
+from ..batch import (
+    segment_diff, segment_lengths, segment_mean, segment_std,
+    segment_sum)
 from .core import Extractor
 
 
@@ -110,6 +113,7 @@ class Eta_e(Extractor):
 
     data = ['magnitude', 'time']
     features = ["Eta_e"]
+    requires_sorted_time = True
 
     def fit(self, magnitude, time):
         w = 1.0 / np.power(np.subtract(time[1:], time[:-1]), 2)
@@ -125,3 +129,22 @@ class Eta_e(Extractor):
                  time[0], 2) * S1 / (sigma2 * S2 * N ** 2))
 
         return {"Eta_e": eta_e}
+
+    def fit_batch(self, batch):
+        magnitude, offsets = batch.segments("magnitude")
+        time = batch.segments("time")[0]
+
+        dtime, doffsets = segment_diff(time, offsets)
+        dmag = segment_diff(magnitude, offsets)[0]
+
+        w = 1.0 / np.power(dtime, 2)
+        w_mean = segment_mean(w, doffsets)
+        N = segment_lengths(offsets)
+        sigma2 = segment_std(magnitude, offsets) ** 2
+        S1 = segment_sum(w * dmag ** 2, doffsets)
+        S2 = segment_sum(w, doffsets)
+        span = time[offsets[1:] - 1] - time[offsets[:-1]]
+
+        eta_e = (w_mean * np.power(span, 2) * S1 /
+                 (sigma2 * S2 * N.astype(float) ** 2))
+        return {"Eta_e": eta_e}
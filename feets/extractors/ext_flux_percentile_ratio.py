@@ -46,6 +46,7 @@ import math
 
 import numpy as np
 
+from ..batch import segment_lengths, segment_sort, segment_take
 from .core import Extractor
 
 
@@ -94,6 +95,28 @@ References
 """
 
 
+# =============================================================================
+# FUNCTIONS
+# =============================================================================
+
+def _flux_percentile_ratio_batch(batch, low, high):
+    """Compute the ratio F_{low, high} / F_{5, 95} for every light curve of
+    a batch.
+
+    """
+    magnitude, offsets = batch.segments("magnitude")
+    sorted_data = segment_sort(magnitude, offsets)
+    lc_length = segment_lengths(offsets)
+
+    def value_at(q):
+        index = np.ceil(q * lc_length).astype(int)
+        return segment_take(sorted_data, offsets, index)
+
+    F_low_high = value_at(high) - value_at(low)
+    F_5_95 = value_at(0.95) - value_at(0.05)
+    return F_low_high / F_5_95
+
+
 # =============================================================================
 # EXTRACTOR CLASS
 # =============================================================================
@@ -119,6 +142,10 @@ class FluxPercentileRatioMid20(Extractor):
 
         return {"FluxPercentileRatioMid20": F_mid20}
 
+    def fit_batch(self, batch):
+        return {"FluxPercentileRatioMid20": _flux_percentile_ratio_batch(
+            batch, 0.40, 0.60)}
+
 
 class FluxPercentileRatioMid35(Extractor):
     __doc__ = COMMON_DOC
@@ -141,6 +168,10 @@ class FluxPercentileRatioMid35(Extractor):
 
         return {"FluxPercentileRatioMid35": F_mid35}
 
+    def fit_batch(self, batch):
+        return {"FluxPercentileRatioMid35": _flux_percentile_ratio_batch(
+            batch, 0.325, 0.675)}
+
 
 class FluxPercentileRatioMid50(Extractor):
     __doc__ = COMMON_DOC
@@ -163,6 +194,10 @@ class FluxPercentileRatioMid50(Extractor):
 
         return {"FluxPercentileRatioMid50": F_mid50}
 
+    def fit_batch(self, batch):
+        return {"FluxPercentileRatioMid50": _flux_percentile_ratio_batch(
+            batch, 0.25, 0.75)}
+
 
 class FluxPercentileRatioMid65(Extractor):
     __doc__ = COMMON_DOC
@@ -185,6 +220,10 @@ class FluxPercentileRatioMid65(Extractor):
 
         return {"FluxPercentileRatioMid65": F_mid65}
 
+    def fit_batch(self, batch):
+        return {"FluxPercentileRatioMid65": _flux_percentile_ratio_batch(
+            batch, 0.175, 0.825)}
+
 
 class FluxPercentileRatioMid80(Extractor):
     __doc__ = COMMON_DOC
@@ -206,3 +245,7 @@ class FluxPercentileRatioMid80(Extractor):
         F_mid80 = F_10_90 / F_5_95
 
         return {"FluxPercentileRatioMid80": F_mid80}
+
+    def fit_batch(self, batch):
+        return {"FluxPercentileRatioMid80": _flux_percentile_ratio_batch(
+            batch, 0.10, 0.90)}
@@ -131,6 +131,10 @@ class FourierComponents(Extractor):
     3. Find peak in :math:`P_f(f)`, subtract that model from data.
     4. Update :math:`\chi_{\circ}^2`, return to *Step 1*.
 
+    If the ``FeatureSpace`` receives a trusted ``period`` for the light
+    curve, :math:`f_1 = 1 / period` and the periodogram is only computed to
+    find :math:`f_2` and :math:`f_3`.
+
     Then, the features extracted are given as an amplitude and a phase:
 
     .. math::
@@ -192,6 +196,14 @@ class FourierComponents(Extractor):
                 "normalization": "standard",
                 "nyquist_factor": 100}}
     }
+    requires_float64 = True
+    accepts_period = True
+
+    # Freq<i>_harmonics_<kind>_<j> -> (i - 1, kind, j)
+    _feature_components = {
+        "Freq{}_harmonics_{}_{}".format(i + 1, kind, j): (i, kind, j)
+        for kind in ("amplitude", "rel_phase")
+        for i in range(3) for j in range(4)}
 
     def _model(self, x, a, b, c, Freq):
         return (a * np.sin(2 * np.pi * Freq * x) +
@@ -203,69 +215,57 @@ class FourierComponents(Extractor):
                     b * np.cos(2 * np.pi * Freq * x) + c)
         return func
 
-    def _components(self, magnitude, time, lscargle_kwds):
+    def _components(self, magnitude, time, lscargle_kwds,
+                    n_freqs=3, last_harmonics=(0, 1, 2, 3), period=None):
+        # the prewhitening stops after n_freqs frequencies and only the
+        # last_harmonics are fitted for the last one (the harmonics not
+        # computed are NaN). If the period is known is used as the first
+        # frequency instead of search it.
         time = time - np.min(time)
-        A, PH = [], []
-        for i in range(3):
-            frequency, power, fmax = lscargle(time, magnitude, **lscargle_kwds)
-
-            fundamental_Freq = frequency[fmax]
-            Atemp, PHtemp = [], []
+        A = np.full((n_freqs, 4), np.nan)
+        PH = np.full((n_freqs, 4), np.nan)
+        for i in range(n_freqs):
+            last = i == n_freqs - 1
+            if i == 0 and period is not None:
+                fundamental_Freq = 1. / period
+            else:
+                frequency, power, fmax = lscargle(
+                    time, magnitude, **lscargle_kwds)
+                fundamental_Freq = frequency[fmax]
             omagnitude = magnitude
-
             for j in range(4):
+                if last and j not in last_harmonics:
+                    continue
                 function_to_fit = self._yfunc_maker((j + 1) * fundamental_Freq)
                 popt0, popt1, popt2 = curve_fit(
                     function_to_fit, time, omagnitude)[0][:3]
 
-                Atemp.append(np.sqrt(popt0 ** 2 + popt1 ** 2))
-                PHtemp.append(np.arctan(popt1 / popt0))
+                A[i, j] = np.sqrt(popt0 ** 2 + popt1 ** 2)
+                PH[i, j] = np.arctan(popt1 / popt0)
 
-                model = self._model(
-                    time, popt0, popt1, popt2,
-                    (j+1) * fundamental_Freq)
-                magnitude = np.array(magnitude) - model
+                if not last:
+                    model = self._model(
+                        time, popt0, popt1, popt2,
+                        (j+1) * fundamental_Freq)
+                    magnitude = np.array(magnitude) - model
 
-            A.append(Atemp)
-            PH.append(PHtemp)
-
-        PH = np.asarray(PH)
         scaledPH = PH - PH[:, 0].reshape((len(PH), 1))
-
         return A, scaledPH
 
-    def fit(self, magnitude, time, lscargle_kwds):
+    def fit(self, magnitude, time, lscargle_kwds, period):
         lscargle_kwds = lscargle_kwds or {}
 
-        A, sPH = self._components(magnitude, time, lscargle_kwds)
-        result = {
-            "Freq1_harmonics_amplitude_0": A[0][0],
-            "Freq1_harmonics_amplitude_1": A[0][1],
-            "Freq1_harmonics_amplitude_2": A[0][2],
-            "Freq1_harmonics_amplitude_3": A[0][3],
-
-            "Freq2_harmonics_amplitude_0": A[1][0],
-            "Freq2_harmonics_amplitude_1": A[1][1],
-            "Freq2_harmonics_amplitude_2": A[1][2],
-            "Freq2_harmonics_amplitude_3": A[1][3],
-
-            "Freq3_harmonics_amplitude_0": A[2][0],
-            "Freq3_harmonics_amplitude_1": A[2][1],
-            "Freq3_harmonics_amplitude_2": A[2][2],
-            "Freq3_harmonics_amplitude_3": A[2][3],
-
-            "Freq1_harmonics_rel_phase_0": sPH[0][0],
-            "Freq1_harmonics_rel_phase_1": sPH[0][1],
-            "Freq1_harmonics_rel_phase_2": sPH[0][2],
-            "Freq1_harmonics_rel_phase_3": sPH[0][3],
-
-            "Freq2_harmonics_rel_phase_0": sPH[1][0],
-            "Freq2_harmonics_rel_phase_1": sPH[1][1],
-            "Freq2_harmonics_rel_phase_2": sPH[1][2],
-            "Freq2_harmonics_rel_phase_3": sPH[1][3],
-
-            "Freq3_harmonics_rel_phase_0": sPH[2][0],
-            "Freq3_harmonics_rel_phase_1": sPH[2][1],
-            "Freq3_harmonics_rel_phase_2": sPH[2][2],
-            "Freq3_harmonics_rel_phase_3": sPH[2][3]}
-        return result
+        requested = [
+            (f,) + self._feature_components[f]
+            for f in self.get_requested_features()]
+        n_freqs = max(i for _, i, _, _ in requested) + 1
+        last = [(kind, j) for _, i, kind, j in requested if i == n_freqs - 1]
+        last_harmonics = {j for _, j in last}
+        if any(kind == "rel_phase" for kind, _ in last):
+            last_harmonics.add(0)  # the reference of the phases
+
+        A, sPH = self._components(
+            magnitude, time, lscargle_kwds, n_freqs, last_harmonics, period)
+
+        values = {"amplitude": A, "rel_phase": sPH}
+        return {f: values[kind][i, j] for f, i, kind, j in requested}
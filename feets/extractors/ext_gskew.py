@@ -44,6 +44,9 @@ __doc__ = """"""
 
 import numpy as np
 
+from ..batch import (
+    segment_broadcast, segment_lengths, segment_median,
+    segment_percentile, segment_slice_median, segment_sort, segment_sum)
 from .core import Extractor
 
 
@@ -79,3 +82,26 @@ class Gskew(Extractor):
         skew = (np.median(magnitude[magnitude <= F_3_value]) +
                 np.median(magnitude[magnitude >= F_97_value]) - 2 * median_mag)
         return {"Gskew": skew}
+
+    def fit_batch(self, batch):
+        magnitude, offsets = batch.segments("magnitude")
+        sorted_mag = segment_sort(magnitude, offsets)
+        median_mag = segment_median(sorted_mag, offsets)
+        F_3_value = segment_percentile(sorted_mag, offsets, 3)
+        F_97_value = segment_percentile(sorted_mag, offsets, 97)
+
+        # the values under the 3rd percentile are a prefix of every sorted
+        # segment, and the values over the 97th percentile are a suffix
+        n_low = segment_sum(
+            (magnitude <= segment_broadcast(F_3_value, offsets)).astype(int),
+            offsets)
+        n_high = segment_sum(
+            (magnitude >= segment_broadcast(F_97_value, offsets)).astype(int),
+            offsets)
+        N = segment_lengths(offsets)
+
+        skew = (
+            segment_slice_median(sorted_mag, offsets, 0, n_low) +
+            segment_slice_median(sorted_mag, offsets, N - n_high, n_high) -
+            2 * median_mag)
+        return {"Gskew": skew}
@@ -44,6 +44,8 @@ __doc__ = """"""
 
 from scipy import stats
 
+from ..batch import (
+    segment_broadcast, segment_mean, segment_sum, window_covariance)
 from .core import Extractor
 
 
@@ -81,3 +83,21 @@ class LinearTrend(Extractor):
     def fit(self, magnitude, time):
         regression_slope = stats.linregress(time, magnitude)[0]
         return {"LinearTrend": regression_slope}
+
+    def fit_batch(self, batch):
+        magnitude, offsets = batch.segments("magnitude")
+        time = batch.segments("time")[0]
+        tdev = time - segment_broadcast(segment_mean(time, offsets), offsets)
+        mdev = magnitude - segment_broadcast(
+            segment_mean(magnitude, offsets), offsets)
+        regression_slope = (
+            segment_sum(tdev * mdev, offsets) /
+            segment_sum(tdev ** 2, offsets))
+        return {"LinearTrend": regression_slope}
+
+    def fit_windows(self, lc, starts, stops):
+        time, magnitude = lc["time"], lc["magnitude"]
+        regression_slope = (
+            window_covariance(time, magnitude, starts, stops) /
+            window_covariance(time, time, starts, stops))
+        return {"LinearTrend": regression_slope}
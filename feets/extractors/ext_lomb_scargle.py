@@ -125,6 +125,13 @@ class LombScargle(Extractor):
 
     :math:`\eta^e`  index calculated from the folded light curve.
 
+    **Known period**
+
+    If the ``FeatureSpace`` receives a trusted ``period`` for the light
+    curve, it's used as **PeriodLS** and to fold the light curve, and the
+    periodogram is only computed for **Period_fit** (the significance of
+    the highest peak of the periodogram).
+
 
     References
     ----------
@@ -155,6 +162,8 @@ class LombScargle(Extractor):
             "normalization": "standard",
             "method": "simple"}
     }
+    requires_float64 = True
+    accepts_period = True
 
     def _compute_ls(self, magnitude, time, lscargle_kwds):
         frequency, power, fmax = lscargle(time, magnitude, **lscargle_kwds)
@@ -177,23 +186,30 @@ class LombScargle(Extractor):
                    np.sum(np.power(folded_data[1:] - folded_data[:-1], 2)))
         return Psi_eta
 
-    def fit(self, magnitude, time, lscargle_kwds, fap_kwds):
+    def fit(self, magnitude, time, lscargle_kwds, fap_kwds, period):
         # first we retrieve the frequencies, power,
-        # max frequency and best_period
-        frequency, power, fmax, best_period = self._compute_ls(
-            magnitude, time, lscargle_kwds)
+        # max frequency and best_period (if is not known)
+        if period is None or self.is_requested("Period_fit"):
+            frequency, power, fmax, best_period = self._compute_ls(
+                magnitude, time, lscargle_kwds)
+        if period is not None:
+            best_period = period
+
+        result = {"PeriodLS": best_period}
 
         # false alarm probability
-        fap = self._compute_fap(power, fmax, time, magnitude, fap_kwds)
+        if self.is_requested("Period_fit"):
+            result["Period_fit"] = self._compute_fap(
+                power, fmax, time, magnitude, fap_kwds)
 
-        # fold the data
-        new_time = np.mod(time, 2 * best_period) / (2 * best_period)
-        folded_data = magnitude[np.argsort(new_time)]
-        N = len(folded_data)
+        if self.is_requested("Psi_CS", "Psi_eta"):
+            # fold the data
+            new_time = np.mod(time, 2 * best_period) / (2 * best_period)
+            folded_data = magnitude[np.argsort(new_time)]
+            N = len(folded_data)
 
-        # CS and Psi_eta
-        R = self._compute_cs(folded_data, N)
-        Psi_eta = self._compute_eta(folded_data, N)
+            # CS and Psi_eta
+            result["Psi_CS"] = self._compute_cs(folded_data, N)
+            result["Psi_eta"] = self._compute_eta(folded_data, N)
 
-        return {"PeriodLS": best_period, "Period_fit": fap,
-                "Psi_CS": R, "Psi_eta": Psi_eta}
+        return result
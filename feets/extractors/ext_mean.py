@@ -44,6 +44,7 @@ __doc__ = """"""
 
 import numpy as np
 
+from ..batch import segment_mean, window_mean
 from .core import Extractor
 
 
@@ -81,3 +82,13 @@ class Mean(Extractor):
     def fit(self, magnitude):
         B_mean = np.mean(magnitude)
         return {"Mean": B_mean}
+
+    def fit_masked(self, magnitude):
+        return {"Mean": magnitude.mean()}
+
+    def fit_batch(self, batch):
+        magnitude, offsets = batch.segments("magnitude")
+        return {"Mean": segment_mean(magnitude, offsets)}
+
+    def fit_windows(self, lc, starts, stops):
+        return {"Mean": window_mean(lc["magnitude"], starts, stops)}
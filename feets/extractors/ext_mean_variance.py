@@ -44,6 +44,7 @@ __doc__ = """"""
 
 import numpy as np
 
+from ..batch import segment_mean, segment_std, window_moments
 from .core import Extractor
 
 
@@ -88,3 +89,16 @@ class MeanVariance(Extractor):
 
     def fit(self, magnitude):
         return {"Meanvariance": np.std(magnitude) / np.mean(magnitude)}
+
+    def fit_masked(self, magnitude):
+        return {"Meanvariance": magnitude.std() / magnitude.mean()}
+
+    def fit_batch(self, batch):
+        magnitude, offsets = batch.segments("magnitude")
+        return {"Meanvariance": (
+            segment_std(magnitude, offsets) /
+            segment_mean(magnitude, offsets))}
+
+    def fit_windows(self, lc, starts, stops):
+        mean, (m2,) = window_moments(lc["magnitude"], starts, stops)
+        return {"Meanvariance": np.sqrt(m2) / mean}
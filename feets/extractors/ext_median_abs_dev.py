@@ -44,6 +44,7 @@ __doc__ = """"""
 
 import numpy as np
 
+from ..batch import segment_broadcast, segment_median, segment_sort
 from .core import Extractor
 
 
@@ -90,3 +91,15 @@ class MedianAbsDev(Extractor):
         median = np.median(magnitude)
         devs = abs(magnitude - median)
         return {"MedianAbsDev": np.median(devs)}
+
+    def fit_masked(self, magnitude):
+        median = np.ma.median(magnitude)
+        devs = abs(magnitude - median)
+        return {"MedianAbsDev": np.ma.median(devs)}
+
+    def fit_batch(self, batch):
+        magnitude, offsets = batch.segments("magnitude")
+        median = segment_median(segment_sort(magnitude, offsets), offsets)
+        devs = abs(magnitude - segment_broadcast(median, offsets))
+        return {"MedianAbsDev": segment_median(
+            segment_sort(devs, offsets), offsets)}
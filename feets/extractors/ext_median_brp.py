@@ -44,6 +44,9 @@ __doc__ = """"""
 
 import numpy as np
 
+from ..batch import (
+    segment_broadcast, segment_lengths, segment_max, segment_median,
+    segment_min, segment_sort, segment_sum)
 from .core import Extractor
 
 
@@ -88,3 +91,18 @@ class MedianBRP(Extractor):
                                       magnitude > median - amplitude))
 
         return {"MedianBRP": float(count) / n}
+
+    def fit_batch(self, batch):
+        magnitude, offsets = batch.segments("magnitude")
+        median = segment_median(segment_sort(magnitude, offsets), offsets)
+        amplitude = (
+            segment_max(magnitude, offsets) -
+            segment_min(magnitude, offsets)) / 10
+        n = segment_lengths(offsets)
+
+        median = segment_broadcast(median, offsets)
+        amplitude = segment_broadcast(amplitude, offsets)
+        inside = np.logical_and(magnitude < median + amplitude,
+                                magnitude > median - amplitude)
+        count = segment_sum(inside.astype(int), offsets)
+        return {"MedianBRP": count.astype(float) / n}
@@ -78,6 +78,7 @@ class PairSlopeTrend(Extractor):
     """
     data = ['magnitude']
     features = ["PairSlopeTrend"]
+    requires_sorted_time = True
 
     def fit(self, magnitude):
         data_last = magnitude[-30:]
@@ -44,6 +44,8 @@ __doc__ = """"""
 
 import numpy as np
 
+from ..batch import (
+    segment_broadcast, segment_max, segment_median, segment_sort)
 from .core import Extractor
 
 
@@ -87,3 +89,12 @@ class PercentAmplitude(Extractor):
         percent_amplitude = max_distance / median_data
 
         return {"PercentAmplitude": percent_amplitude}
+
+    def fit_batch(self, batch):
+        magnitude, offsets = batch.segments("magnitude")
+        median_data = segment_median(
+            segment_sort(magnitude, offsets), offsets)
+        distance_median = np.abs(
+            magnitude - segment_broadcast(median_data, offsets))
+        max_distance = segment_max(distance_median, offsets)
+        return {"PercentAmplitude": max_distance / median_data}
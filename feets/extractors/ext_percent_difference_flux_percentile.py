@@ -46,6 +46,8 @@ import math
 
 import numpy as np
 
+from ..batch import (
+    segment_lengths, segment_median, segment_sort, segment_take)
 from .core import Extractor
 
 
@@ -92,3 +94,17 @@ class PercentDifferenceFluxPercentile(Extractor):
         percent_difference = F_5_95 / median_data
 
         return {"PercentDifferenceFluxPercentile": percent_difference}
+
+    def fit_batch(self, batch):
+        magnitude, offsets = batch.segments("magnitude")
+        sorted_data = segment_sort(magnitude, offsets)
+        median_data = segment_median(sorted_data, offsets)
+        lc_length = segment_lengths(offsets)
+
+        F_5_index = np.ceil(0.05 * lc_length).astype(int)
+        F_95_index = np.ceil(0.95 * lc_length).astype(int)
+        F_5_95 = (segment_take(sorted_data, offsets, F_95_index) -
+                  segment_take(sorted_data, offsets, F_5_index))
+
+        percent_difference = F_5_95 / median_data
+        return {"PercentDifferenceFluxPercentile": percent_difference}
@@ -44,6 +44,7 @@ __doc__ = """"""
 
 import numpy as np
 
+from ..batch import segment_percentile, segment_sort
 from .core import Extractor
 
 
@@ -84,6 +85,13 @@ class Q31(Extractor):
         q31 = np.percentile(magnitude, 75) - np.percentile(magnitude, 25)
         return {"Q31": q31}
 
+    def fit_batch(self, batch):
+        magnitude, offsets = batch.segments("magnitude")
+        sorted_mag = segment_sort(magnitude, offsets)
+        q31 = (segment_percentile(sorted_mag, offsets, 75) -
+               segment_percentile(sorted_mag, offsets, 25))
+        return {"Q31": q31}
+
 
 class Q31Color(Extractor):
     r"""
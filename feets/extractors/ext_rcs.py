@@ -44,6 +44,9 @@ __doc__ = """"""
 
 import numpy as np
 
+from ..batch import (
+    segment_broadcast, segment_lengths, segment_max, segment_mean,
+    segment_min, segment_std)
 from .core import Extractor
 
 
@@ -90,6 +93,7 @@ class RCS(Extractor):
 
     data = ['magnitude']
     features = ['Rcs']
+    requires_sorted_time = True
 
     def fit(self, magnitude):
         sigma = np.std(magnitude)
@@ -98,3 +102,31 @@ class RCS(Extractor):
         s = np.cumsum(magnitude - m) * 1.0 / (N * sigma)
         R = np.max(s) - np.min(s)
         return {"Rcs": R}
+
+    def fit_masked(self, magnitude):
+        sigma = magnitude.std()
+        N = magnitude.count()
+        m = magnitude.mean()
+
+        # the masked observations don't move the cumulative sum, so they
+        # only repeat the previous value
+        s = np.cumsum((magnitude - m).filled(0)) * 1.0 / (N * sigma)
+        R = np.max(s) - np.min(s)
+        return {"Rcs": R}
+
+    def fit_batch(self, batch):
+        magnitude, offsets = batch.segments("magnitude")
+        sigma = segment_std(magnitude, offsets)
+        N = segment_lengths(offsets)
+        m = segment_mean(magnitude, offsets)
+
+        # cumulative sum restarted at the begining of every segment
+        deviation = magnitude - segment_broadcast(m, offsets)
+        cumsum = np.cumsum(deviation)
+        starts = offsets[:-1]
+        restart = cumsum[starts] - deviation[starts]
+        s = (
+            (cumsum - segment_broadcast(restart, offsets)) /
+            segment_broadcast(N * sigma, offsets))
+        R = segment_max(s, offsets) - segment_min(s, offsets)
+        return {"Rcs": R}
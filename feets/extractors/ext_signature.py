@@ -56,6 +56,8 @@ class Signature(Extractor):
     data = ['magnitude', 'time']
     dependencies = ['PeriodLS', 'Amplitude']
     params = {"phase_bins": 18, "mag_bins": 12}
+    requires_float64 = True
+    grid_shape = (params["phase_bins"], params["mag_bins"])
 
     features = []
     for i in range(params["phase_bins"]):
@@ -69,7 +71,8 @@ class Signature(Extractor):
 
     del i, j
 
-    def fit(self, magnitude, time, PeriodLS, Amplitude, phase_bins, mag_bins):
+    def counts(self, magnitude, time, PeriodLS, Amplitude,
+               phase_bins, mag_bins):
 
         lc_yaxis = (magnitude - np.min(magnitude)) / np.float(Amplitude)
 
@@ -80,7 +83,14 @@ class Signature(Extractor):
         bins = (phase_bins, mag_bins)
         counts = np.histogram2d(lc_phase, lc_yaxis, bins=bins, normed=True)[0]
 
-        result = zip(self.sorted_features,
-                     counts.reshape(phase_bins * mag_bins))
+        return counts.reshape(phase_bins * mag_bins)
 
-        return dict(result)
+    def fit(self, magnitude, time, PeriodLS, Amplitude, phase_bins, mag_bins):
+        counts = self.counts(
+            magnitude, time, PeriodLS, Amplitude, phase_bins, mag_bins)
+        return dict(zip(self.sorted_features, counts))
+
+    def fit_into(self, out, magnitude, time, PeriodLS, Amplitude,
+                 phase_bins, mag_bins):
+        out[:] = self.counts(
+            magnitude, time, PeriodLS, Amplitude, phase_bins, mag_bins)
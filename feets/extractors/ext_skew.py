@@ -42,8 +42,11 @@ __doc__ = """"""
 # IMPORTS
 # =============================================================================
 
+import numpy as np
+
 from scipy import stats
 
+from ..batch import segment_broadcast, segment_mean, window_moments
 from .core import Extractor
 
 
@@ -90,3 +93,25 @@ class Skew(Extractor):
 
     def fit(self, magnitude):
         return {"Skew": stats.skew(magnitude)}
+
+    def fit_masked(self, magnitude):
+        deviation = magnitude - magnitude.mean()
+        m2 = (deviation ** 2).mean()
+        m3 = (deviation ** 3).mean()
+        return {"Skew": 0. if m2 == 0 else m3 / m2 ** 1.5}
+
+    def fit_batch(self, batch):
+        magnitude, offsets = batch.segments("magnitude")
+        mean = segment_broadcast(segment_mean(magnitude, offsets), offsets)
+        deviation = magnitude - mean
+        m2 = segment_mean(deviation ** 2, offsets)
+        m3 = segment_mean(deviation ** 3, offsets)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            skew = np.where(m2 == 0, 0, m3 / m2 ** 1.5)
+        return {"Skew": skew}
+
+    def fit_windows(self, lc, starts, stops):
+        m2, m3 = window_moments(lc["magnitude"], starts, stops, order=3)[1]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            skew = np.where(m2 == 0, 0, m3 / m2 ** 1.5)
+        return {"Skew": skew}
@@ -82,6 +82,9 @@ class SlottedA_length(Extractor):
     **Parameters**
 
     - ``T``: tau - slot size in days (default=1).
+    - ``max_K``: the maximum number of slots to explore looking for the
+      first lag under :math:`e^{-1}`; ``None`` (default) explores until the
+      whole time span is covered.
 
     References
     ----------
@@ -95,7 +98,9 @@ class SlottedA_length(Extractor):
 
     data = ["magnitude", "time"]
     features = ["SlottedA_length"]
-    params = {"T": 1}
+    params = {"T": 1, "max_K": None}
+    complexity = 2
+    requires_sorted_time = True
 
     def slotted_autocorrelation(self, data, time, T, K,
                                 second_round=False, K1=100):
@@ -160,7 +165,7 @@ class SlottedA_length(Extractor):
 
         return T, K, slots, SAC2
 
-    def fit(self, magnitude, time, T):
+    def fit(self, magnitude, time, T, max_K):
         T, K, slots, SAC2 = self.start_conditions(magnitude, time, T)
 
         k = next((index for index, value in
@@ -170,6 +175,8 @@ class SlottedA_length(Extractor):
             K = K + K
             if K > (np.max(time) - np.min(time)) / T:
                 break
+            elif max_K is not None and K > max_K:
+                break
             else:
                 SAC, slots = self.slotted_autocorrelation(
                     magnitude, time, T, K, second_round=True, K1=int(K/2))
@@ -44,6 +44,9 @@ __doc__ = """"""
 
 import numpy as np
 
+from ..batch import (
+    segment_broadcast, segment_lengths, segment_mean, segment_std,
+    segment_sum, window_moments)
 from .core import Extractor
 
 
@@ -101,3 +104,33 @@ class SmallKurtosis(Extractor):
         c2 = float(3 * (n - 1) ** 2) / ((n - 2) * (n - 3))
 
         return {"SmallKurtosis": c1 * S - c2}
+
+    def fit_masked(self, magnitude):
+        n = magnitude.count()
+        mean = magnitude.mean()
+        std = magnitude.std()
+        S = (((magnitude - mean) / std) ** 4).sum()
+        c1 = float(n * (n + 1)) / ((n - 1) * (n - 2) * (n - 3))
+        c2 = float(3 * (n - 1) ** 2) / ((n - 2) * (n - 3))
+        return {"SmallKurtosis": c1 * S - c2}
+
+    def fit_batch(self, batch):
+        magnitude, offsets = batch.segments("magnitude")
+        n = segment_lengths(offsets).astype(float)
+        mean = segment_broadcast(segment_mean(magnitude, offsets), offsets)
+        std = segment_broadcast(segment_std(magnitude, offsets), offsets)
+        S = segment_sum(((magnitude - mean) / std) ** 4, offsets)
+        c1 = n * (n + 1) / ((n - 1) * (n - 2) * (n - 3))
+        c2 = 3 * (n - 1) ** 2 / ((n - 2) * (n - 3))
+        return {"SmallKurtosis": c1 * S - c2}
+
+    def fit_windows(self, lc, starts, stops):
+        n = (stops - starts).astype(float)
+        m2, m3, m4 = window_moments(
+            lc["magnitude"], starts, stops, order=4)[1]
+        # sum(((x - mean) / std) ** 4) = n * m4 / m2 ** 2
+        with np.errstate(divide="ignore", invalid="ignore"):
+            S = n * m4 / m2 ** 2
+        c1 = n * (n + 1) / ((n - 1) * (n - 2) * (n - 3))
+        c2 = 3 * (n - 1) ** 2 / ((n - 2) * (n - 3))
+        return {"SmallKurtosis": c1 * S - c2}
@@ -44,6 +44,7 @@ __doc__ = """"""
 
 import numpy as np
 
+from ..batch import segment_std, window_moments
 from .core import Extractor
 
 
@@ -87,3 +88,14 @@ class Std(Extractor):
 
     def fit(self, magnitude):
         return {"Std": np.std(magnitude)}
+
+    def fit_masked(self, magnitude):
+        return {"Std": magnitude.std()}
+
+    def fit_batch(self, batch):
+        magnitude, offsets = batch.segments("magnitude")
+        return {"Std": segment_std(magnitude, offsets)}
+
+    def fit_windows(self, lc, starts, stops):
+        m2 = window_moments(lc["magnitude"], starts, stops)[1][0]
+        return {"Std": np.sqrt(m2)}
@@ -71,6 +71,8 @@ allowing all residuals to be compared on an equal basis.
 import numpy as np
 
 from ..utils import indent
+from ..batch import (
+    segment_broadcast, segment_lengths, segment_sum)
 from .core import Extractor
 from .ext_slotted_a_length import SlottedA_length
 
@@ -199,6 +201,35 @@ class StetsonK(Extractor):
 
         return {"StetsonK": K}
 
+    def fit_masked(self, magnitude, error):
+        mean_mag = ((magnitude / (error * error)).sum() /
+                    (1.0 / (error * error)).sum())
+
+        N = magnitude.count()
+        sigmap = (np.sqrt(N * 1.0 / (N - 1)) *
+                  (magnitude - mean_mag) / error)
+
+        K = (1 / np.sqrt(N * 1.0) *
+             np.abs(sigmap).sum() / np.sqrt((sigmap ** 2).sum()))
+
+        return {"StetsonK": K}
+
+    def fit_batch(self, batch):
+        magnitude, offsets = batch.segments("magnitude")
+        error = batch.segments("error")[0]
+        mean_mag = (segment_sum(magnitude / (error * error), offsets) /
+                    segment_sum(1.0 / (error * error), offsets))
+
+        N = segment_lengths(offsets) * 1.0
+        sigmap = (segment_broadcast(np.sqrt(N / (N - 1)), offsets) *
+                  (magnitude - segment_broadcast(mean_mag, offsets)) / error)
+
+        K = (1 / np.sqrt(N) *
+             segment_sum(np.abs(sigmap), offsets) /
+             np.sqrt(segment_sum(sigmap ** 2, offsets)))
+
+        return {"StetsonK": K}
+
 
 class StetsonKAC(Extractor):
     __doc__ = indent(__doc__) + r"""
@@ -234,11 +265,12 @@ class StetsonKAC(Extractor):
     data = ['magnitude', 'time', 'error']
     features = ["StetsonK_AC"]
     params = {"T": 1}
+    complexity = 2
+    requires_sorted_time = True
 
     def fit(self, magnitude, time, error, T):
         sal = SlottedA_length(T=T)
-        autocor_vector = sal.start_conditions(
-            magnitude, time, **sal.params)[-1]
+        autocor_vector = sal.start_conditions(magnitude, time, T)[-1]
 
         N_autocor = len(autocor_vector)
         sigmap = (np.sqrt(N_autocor * 1.0 / (N_autocor - 1)) *
@@ -42,13 +42,12 @@ __doc__ = """"""
 # IMPORTS
 # =============================================================================
 
-import warnings
-
 import numpy as np
 
 from scipy.interpolate import interp1d
 
-from .core import Extractor, FeatureExtractionWarning
+from ..utils import is_sorted
+from .core import Extractor, FLAG_UNDEFINED
 
 
 # =============================================================================
@@ -59,6 +58,11 @@ class StructureFunctions(Extractor):
     r"""The structure function of rotation measures (RMs) contains information
     on electron density and magnetic field fluctuations.
 
+    An unsorted light curve is sorted by time before the interpolation; the
+    order is verified first, so the light curves that the FeatureSpace
+    already sorted (see ``Extractor.requires_sorted_time``) cost a single
+    pass.
+
     References
     ----------
 
@@ -73,13 +77,17 @@ class StructureFunctions(Extractor):
     features = ["StructureFunction_index_21",
                 "StructureFunction_index_31",
                 "StructureFunction_index_32"]
+    requires_sorted_time = True
 
     def fit(self, magnitude, time):
         Nsf, Np = 100, 100
         sf1, sf2, sf3 = np.zeros(Nsf), np.zeros(Nsf), np.zeros(Nsf)
-        f = interp1d(time, magnitude)
+        if not is_sorted(time):
+            order = np.argsort(time, kind="mergesort")
+            time, magnitude = time[order], magnitude[order]
+        f = interp1d(time, magnitude, assume_sorted=True)
 
-        time_int = np.linspace(np.min(time), np.max(time), Np)
+        time_int = np.linspace(time[0], time[-1], Np)
         mag_int = f(time_int)
 
         for tau in np.arange(1, Nsf):
@@ -98,25 +106,19 @@ class StructureFunctions(Extractor):
         if len(sf1_log) and len(sf2_log):
             m_21, b_21 = np.polyfit(sf1_log, sf2_log, 1)
         else:
-            warnings.warn(
-                "Can't compute StructureFunction_index_21",
-                FeatureExtractionWarning)
+            self.flag(FLAG_UNDEFINED, "StructureFunction_index_21")
             m_21 = np.nan
 
         if len(sf1_log) and len(sf3_log):
             m_31, b_31 = np.polyfit(sf1_log, sf3_log, 1)
         else:
-            warnings.warn(
-                "Can't compute StructureFunction_index_31",
-                FeatureExtractionWarning)
+            self.flag(FLAG_UNDEFINED, "StructureFunction_index_31")
             m_31 = np.nan
 
         if len(sf2_log) and len(sf3_log):
             m_32, b_32 = np.polyfit(sf2_log, sf3_log, 1)
         else:
-            warnings.warn(
-                "Can't compute StructureFunction_index_32",
-                FeatureExtractionWarning)
+            self.flag(FLAG_UNDEFINED, "StructureFunction_index_32")
             m_32 = np.nan
 
         return {"StructureFunction_index_21": m_21,
@@ -32,9 +32,8 @@ import numpy as np
 
 import pandas as pd
 
-from six.moves import range
-
 __all__ = [
+    "noise_mask",
     "remove_noise",
     "align"]
 
@@ -43,34 +42,39 @@ __all__ = [
 # FUNCTIONS
 # =============================================================================
 
+def noise_mask(time, magnitude, error, error_limit=3, std_limit=5):
+    """Boolean mask of the points that are not considered noise (see
+    ``remove_noise``).
+
+    The mask can be given to ``FeatureSpace.extract()`` to ignore the noisy
+    points without copying the light curve.
+
+    """
+    magnitude, error = np.asarray(magnitude), np.asarray(error)
+
+    error_mean = np.mean(error)
+    error_tolerance = error_limit * (error_mean or 1)
+    data_mean = np.mean(magnitude)
+    data_std = np.std(magnitude)
+
+    return np.logical_and(
+        error < error_tolerance,
+        (np.absolute(magnitude - data_mean) / data_std) < std_limit)
+
+
 def remove_noise(time, magnitude, error, error_limit=3, std_limit=5):
     """Points within 'std_limit' standard deviations from the mean and with
     errors greater than 'error_limit' times the error mean are
     considered as noise and thus are eliminated.
 
     """
-    data, mjd = magnitude, time
+    mask = noise_mask(
+        time, magnitude, error,
+        error_limit=error_limit, std_limit=std_limit)
 
-    data_len = len(mjd)
-    error_mean = np.mean(error)
-    error_tolerance = error_limit * (error_mean or 1)
-    data_mean = np.mean(data)
-    data_std = np.std(data)
-
-    mjd_out, data_out, error_out = [], [], []
-    for i in range(data_len):
-        is_not_noise = (
-            error[i] < error_tolerance and
-            (np.absolute(data[i] - data_mean) / data_std) < std_limit)
-
-        if is_not_noise:
-            mjd_out.append(mjd[i])
-            data_out.append(data[i])
-            error_out.append(error[i])
-
-    data_out = np.asarray(data_out)
-    mjd_out = np.asarray(mjd_out)
-    error_out = np.asarray(error_out)
+    mjd_out = np.asarray(time)[mask]
+    data_out = np.asarray(magnitude)[mask]
+    error_out = np.asarray(error)[mask]
 
     return mjd_out, data_out, error_out
 
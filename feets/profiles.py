@@ -0,0 +1,254 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# The MIT License (MIT)
+
+# Copyright (c) 2017 Juan Cabral
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+# =============================================================================
+# FUTURE
+# =============================================================================
+
+from __future__ import unicode_literals
+
+
+# =============================================================================
+# DOCS
+# =============================================================================
+
+__doc__ = """Named speed/accuracy profiles for the extractors.
+
+A profile is a set of parameters for the expensive extractors (the
+periodogram grid, the CAR optimizer tolerance, the number of pairs of the
+dmdt map, the slots explored by the slotted autocorrelation) that trades
+accuracy for speed. Use it with ``FeatureSpace(profile="fast")``; the
+parameters given explicitly to the space always take precedence.
+
+- ``exact``: the default parameters of every extractor.
+- ``balanced``: the fast periodogram (Press & Rybicki) over a smaller
+  frequency grid and loose limits for the rest.
+- ``fast``: coarse periodogram grid and aggressive limits.
+
+``profile_report()`` measures how much every profile deviates from another
+one (``exact`` by default) over a set of light curves.
+
+Measured with ``profile_report()`` over the R band of the 9 bundled MACHO
+light curves (45 to 1240 observations), one extractor at a time, in
+seconds for all the light curves and with the median / maximum relative
+deviation of their main feature against ``exact``:
+
+=================  =====  ====================  =====================
+Extractor          exact  balanced              fast
+=================  =====  ====================  =====================
+LombScargle        3.57   1.65 (0 / 67.5)       0.24 (4.6e-5 / 67.5)
+FourierComponents  3.29   1.50 (0 / 0.165)      0.19 (0.037 / 0.889)
+CAR                31.9   29.4 (1.3e-5 / 6e-4)  29.3 (8.8e-5 / 0.217)
+SlottedA_length    8.51   7.63 (0 / 0)          8.12 (0 / 0)
+DeltamDeltat       0.46   0.30                  0.07
+=================  =====  ====================  =====================
+
+With ``balanced`` 8 of the 9 periods are the same as with ``exact``; the
+other one (the light curve with 45 observations) is an alias. With
+``fast`` 4 of the 9 periods differ by more than 1e-4 (by 29%, 40%, 80%
+and the same alias). For a space with every feature that only
+needs ``time``, ``magnitude`` and ``error`` the full run takes 57 seconds
+with ``exact``, 50 (1.13x) with ``balanced`` and 43 (1.31x) with ``fast``.
+The CAR fit dominates that time and a looser tolerance barely changes it.
+With ``balanced``, 828 of the 831 features have a median deviation of 0,
+and the rest are the CAR features (below 1e-4). With ``fast`` the worst
+are the phases and amplitudes of the second and third Fourier
+frequencies (median deviations between 0.5 and 1.5).
+
+The measures only cover MACHO: the OGLE-III light curves are not bundled
+with feets (``feets.datasets.ogle3.fetch_OGLE3()`` downloads them), so
+measure them with ``profile_report(lightcurves=...)``. No profile changes
+the false alarm probability of ``LombScargle`` (``fap_kwds``): the
+default ``"simple"`` method is a closed form that takes 0.3 ms against
+the 240 ms of the periodogram of a light curve with 722 observations,
+and the faster alternatives (``"davies"``, ``"baluev"``) only save a
+tenth of a millisecond.
+
+"""
+
+__all__ = [
+    "PROFILES",
+    "get_profile",
+    "apply_profile",
+    "ProfileReport",
+    "profile_report"]
+
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+import copy
+import time
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+
+
+# =============================================================================
+# CONSTANTS
+# =============================================================================
+
+def _periodogram(**autopower_kwds):
+    autopower_kwds.setdefault("normalization", "standard")
+    return {"lscargle_kwds": {"autopower_kwds": autopower_kwds}}
+
+
+PROFILES = OrderedDict([
+    ("exact", {}),
+    ("balanced", {
+        "LombScargle": _periodogram(
+            method="fast", nyquist_factor=50, samples_per_peak=5),
+        "FourierComponents": _periodogram(
+            method="fast", nyquist_factor=50, samples_per_peak=5),
+        "CAR": {"minimize_tol": 1e-3},
+        "DeltamDeltat": {"max_pairs": 100000},
+        "SlottedA_length": {"max_K": 3200}}),
+    ("fast", {
+        "LombScargle": _periodogram(
+            method="fast", nyquist_factor=20, samples_per_peak=3),
+        "FourierComponents": _periodogram(
+            method="fast", nyquist_factor=20, samples_per_peak=3),
+        "CAR": {"minimize_tol": 1e-2},
+        "DeltamDeltat": {"max_pairs": 20000},
+        "SlottedA_length": {"max_K": 800}}),
+])
+
+
+# =============================================================================
+# FUNCTIONS
+# =============================================================================
+
+def get_profile(name):
+    """Return a copy of the parameters of the extractors of a profile
+    (``{extractor_name: {param: value}}``).
+
+    """
+    try:
+        return copy.deepcopy(PROFILES[name])
+    except KeyError:
+        msg = "Unknown profile '{}'. Available profiles: {}"
+        raise ValueError(msg.format(name, ", ".join(PROFILES)))
+
+
+def apply_profile(name, kwargs):
+    """Merge the parameters of a profile with the parameters given by the
+    user for every extractor (``{extractor_name: {param: value}}``).
+
+    The parameters of the user replace the ones of the profile.
+
+    """
+    merged = get_profile(name)
+    for ext_name, params in kwargs.items():
+        merged.setdefault(ext_name, {}).update(params)
+    return merged
+
+
+def _relative_deviation(values, reference):
+    with np.errstate(all="ignore"):
+        deviation = np.abs(values - reference) / np.abs(reference)
+    # same value (including zeros and infinites)
+    deviation[values == reference] = 0.
+    # a finite value over a zero reference
+    deviation[np.isnan(deviation) & np.isfinite(values)] = np.inf
+    # both are undefined
+    deviation[np.isnan(values) & np.isnan(reference)] = 0.
+    # only one is undefined
+    deviation[np.isnan(values) != np.isnan(reference)] = np.inf
+    return deviation
+
+
+def _macho_samples():
+    from .datasets import macho
+
+    for macho_id in sorted(macho.available_MACHO_lc()):
+        try:
+            lc = macho.load_MACHO(macho_id).data.R
+        except KeyError:  # some sources has only one band
+            continue
+        yield {"time": lc.time, "magnitude": lc.magnitude, "error": lc.error}
+
+
+ProfileReport = namedtuple(
+    "ProfileReport",
+    ["profile", "features", "elapsed", "speedup",
+     "median_deviation", "max_deviation"])
+
+
+def profile_report(profiles=("balanced", "fast"), lightcurves=None,
+                   reference="exact", **space_kwargs):
+    """Measure the speed and the deviation of the features of every profile
+    against a reference profile.
+
+    Parameters
+    ----------
+
+    profiles : iterable of str, default ``("balanced", "fast")``
+        The profiles to evaluate.
+    lightcurves : iterable of dict, optional
+        The light curves (``{data_name: array}``) used to measure. By
+        default the R band of the bundled MACHO sources.
+    reference : str, default ``"exact"``
+        The profile used as ground truth.
+    space_kwargs
+        Extra parameters for every ``FeatureSpace`` (``only``, ``exclude``,
+        parameters of the extractors, etc). The default space uses every
+        feature that only needs ``time``, ``magnitude`` and ``error``.
+
+    Returns
+    -------
+
+    list of ProfileReport
+        One per profile with the features, the total extraction time in
+        seconds, the speedup over the reference and the median and maximum
+        relative deviation of every feature over all the light curves.
+
+    """
+    from .core import FeatureSpace
+
+    if lightcurves is None:
+        lightcurves = _macho_samples()
+    lightcurves = list(lightcurves)
+    space_kwargs.setdefault("data", ["time", "magnitude", "error"])
+
+    def run(profile):
+        space = FeatureSpace(profile=profile, **space_kwargs)
+        start = time.time()
+        values = np.array([space.extract(**lc)[1] for lc in lightcurves])
+        return space.features_as_array_, values, time.time() - start
+
+    features, ref_values, ref_elapsed = run(reference)
+
+    reports = []
+    for profile in profiles:
+        _, values, elapsed = run(profile)
+        deviation = _relative_deviation(values, ref_values)
+        reports.append(ProfileReport(
+            profile=profile, features=features, elapsed=elapsed,
+            speedup=ref_elapsed / elapsed,
+            median_deviation=np.median(deviation, axis=0),
+            max_deviation=np.max(deviation, axis=0)))
+    return reports
@@ -0,0 +1,597 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# The MIT License (MIT)
+
+# Copyright (c) 2017 Juan Cabral
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# =============================================================================
+# FUTURE
+# =============================================================================
+
+from __future__ import unicode_literals, print_function
+
+
+# =============================================================================
+# DOCS
+# =============================================================================
+
+__doc__ = """Bulk and resumable extraction of catalogs of light curves.
+
+This module has the building blocks of the ``feets extract`` command (see
+``feets.cli``) so they can be used from Python or by other runners like
+``feets.workqueue``:
+
+- ``read_lightcurves()`` iterates over the light curves of a directory, a
+  tarball or a ``.csv``/``.parquet`` table as ``(id, lc)`` tuples.
+- ``WRITERS`` maps the output formats (``.csv``, ``.parquet`` and
+  ``.npy``) to writers that stream the features one chunk at a time.
+- ``extract()`` extracts an iterable of light curves to a single file.
+- ``CheckpointedRun`` extracts a catalog in a resumable run directory.
+
+"""
+
+__all__ = [
+    "read_lightcurves", "parse_name", "load_lc", "resolve_output_format",
+    "extract", "space_config", "CheckpointedRun", "RunError",
+    "WRITERS", "DEFAULT_COLUMNS"]
+
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+import os
+import io
+import json
+import types
+import struct
+import hashlib
+import tarfile
+
+import numpy as np
+
+import six
+
+from .extractors.core import DATA_TIME, DATA_MAGNITUDE, DATA_ERROR
+
+
+# =============================================================================
+# CONSTANTS
+# =============================================================================
+
+LC_EXTENSIONS = (".dat", ".mjd", ".txt")
+
+TAR_EXTENSIONS = (".tar", ".tar.gz", ".tgz", ".tar.bz2")
+
+TABLE_EXTENSIONS = (".csv", ".parquet")
+
+DEFAULT_COLUMNS = (DATA_TIME, DATA_MAGNITUDE, DATA_ERROR)
+
+# the header of the npy files is reserved with this size and rewrited with
+# the final shape when the file is closed
+NPY_HEADER_SIZE = 128
+
+
+# =============================================================================
+# READERS
+# =============================================================================
+
+def _endswith(path, extensions):
+    return path.lower().endswith(extensions)
+
+
+def parse_name(name, band):
+    """The id of a light curve file named ``<id>.<band>.<ext>``.
+
+    Returns ``None`` if ``band`` is not ``None`` and the file is of
+    another band.
+
+    """
+    stem = os.path.basename(name).rsplit(".", 1)[0]
+    if band is None:
+        return stem
+    suffix = "." + band
+    return stem[:-len(suffix)] if stem.endswith(suffix) else None
+
+
+def load_lc(src, columns):
+    """Load a light curve file (or file object) as ``{column: array}``."""
+    lc = np.loadtxt(src, ndmin=2)
+    return {name: lc[:, idx] for idx, name in enumerate(columns)}
+
+
+def _read_tar(path, band, columns):
+    # stream mode: the members are readed in order without an index
+    with tarfile.open(path, mode="r|*") as tfp:
+        for member in tfp:
+            if not member.isfile() or not _endswith(
+                member.name, LC_EXTENSIONS
+            ):
+                continue
+            lc_id = parse_name(member.name, band)
+            if lc_id is not None:
+                yield lc_id, load_lc(tfp.extractfile(member), columns)
+
+
+def _read_dir(path, band, columns):
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for fname in sorted(files):
+            fpath = os.path.join(root, fname)
+            if _endswith(fname, TAR_EXTENSIONS):
+                for lc in _read_tar(fpath, band, columns):
+                    yield lc
+            elif _endswith(fname, LC_EXTENSIONS):
+                lc_id = parse_name(fname, band)
+                if lc_id is not None:
+                    yield lc_id, load_lc(fpath, columns)
+
+
+def _table_chunks(path, chunksize):
+    import pandas as pd
+    if _endswith(path, ".csv"):
+        for df in pd.read_csv(path, chunksize=chunksize):
+            yield df
+        return
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        # without pyarrow the full table is loaded
+        yield pd.read_parquet(path)
+        return
+    for record_batch in pq.ParquetFile(path).iter_batches(chunksize):
+        yield record_batch.to_pandas()
+
+
+def _read_table(path, id_column, columns, chunksize=100000):
+    import pandas as pd
+    # the rows of the last source of a chunk can continue in the next one
+    pending = None
+    for df in _table_chunks(path, chunksize):
+        if pending is not None:
+            df = pd.concat([pending, df], ignore_index=True)
+        ids = df[id_column].values
+        if not len(ids):
+            continue
+        starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])
+        stops = np.r_[starts[1:], len(ids)]
+        for start, stop in zip(starts[:-1], stops[:-1]):
+            rows = df.iloc[start:stop]
+            yield ids[start], {
+                c: rows[c].values.astype(float) for c in columns}
+        pending = df.iloc[starts[-1]:]
+    if pending is not None and len(pending):
+        yield pending[id_column].values[0], {
+            c: pending[c].values.astype(float) for c in columns}
+
+
+def read_lightcurves(path, band=None, columns=DEFAULT_COLUMNS,
+                     id_column="id"):
+    """Iterate over the light curves of a directory, tarball or table.
+
+    Parameters
+    ----------
+
+    path : str
+        A directory, a tarball or a ``.csv``/``.parquet`` table (see the
+        module documentation for the layouts).
+    band : str, optional
+        Only read the files named ``<id>.<band>.<ext>``.
+    columns : sequence of str
+        The data vectors stored in the columns of the files (or the names
+        of the columns of the table).
+    id_column : str
+        The column of the table with the id of the sources.
+
+    Returns
+    -------
+
+    generator
+        Of tuples ``(id, {data_name: array})``.
+
+    """
+    if os.path.isdir(path):
+        return _read_dir(path, band, columns)
+    elif _endswith(path, TAR_EXTENSIONS):
+        return _read_tar(path, band, columns)
+    elif _endswith(path, TABLE_EXTENSIONS):
+        return _read_table(path, id_column, columns)
+    elif _endswith(path, LC_EXTENSIONS):
+        lc_id = parse_name(path, band)
+        return iter([(lc_id, load_lc(path, columns))])
+    raise ValueError("Unknown source format '{}'".format(path))
+
+
+# =============================================================================
+# WRITERS
+# =============================================================================
+
+class CSVWriter(object):
+
+    def __init__(self, path, features):
+        self._fp = io.open(path, "w", encoding="utf-8")
+        self._fp.write(",".join(["id"] + list(features)) + "\n")
+
+    def write(self, ids, values):
+        for lc_id, row in zip(ids, values):
+            self._fp.write(",".join(
+                [str(lc_id)] + [repr(float(v)) for v in row]) + "\n")
+
+    def close(self):
+        self._fp.close()
+
+
+class ParquetWriter(object):
+
+    def __init__(self, path, features):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Parquet output requires pyarrow")
+        self._pa = pa
+        self._features = list(features)
+        self._schema = pa.schema(
+            [("id", pa.string())] +
+            [(f, pa.float64()) for f in self._features])
+        self._writer = pq.ParquetWriter(path, self._schema)
+
+    def write(self, ids, values):
+        pa = self._pa
+        arrays = [pa.array([str(i) for i in ids], pa.string())]
+        arrays.extend(pa.array(values[:, idx], pa.float64())
+                      for idx in range(len(self._features)))
+        self._writer.write_table(
+            pa.Table.from_arrays(arrays, schema=self._schema))
+
+    def close(self):
+        self._writer.close()
+
+
+class NPYWriter(object):
+    """The values are written in ``path`` and the ids and the feature names
+    in ``<path>.ids.txt`` and ``<path>.features.txt``.
+
+    """
+
+    def __init__(self, path, features):
+        self._nfeatures = len(features)
+        self._rows = 0
+        self._fp = io.open(path, "wb")
+        self._fp.write(self._header())
+        with io.open(path + ".features.txt", "w", encoding="utf-8") as fp:
+            fp.write("\n".join(features) + "\n")
+        self._ids = io.open(path + ".ids.txt", "w", encoding="utf-8")
+
+    def _header(self):
+        # npy format 1.0 with a fixed size header padded with spaces
+        header = "{{'descr': '<f8', 'fortran_order': False, 'shape': {}, }}"
+        header = header.format((self._rows, self._nfeatures))
+        header = header.ljust(NPY_HEADER_SIZE - 11) + "\n"
+        return (
+            b"\x93NUMPY\x01\x00" + struct.pack("<H", len(header)) +
+            header.encode("latin-1"))
+
+    def write(self, ids, values):
+        self._fp.write(np.asarray(values, dtype="<f8").tobytes())
+        self._ids.write("".join("{}\n".format(i) for i in ids))
+        self._rows += len(ids)
+
+    def close(self):
+        self._fp.seek(0)
+        self._fp.write(self._header())
+        self._fp.close()
+        self._ids.close()
+
+
+WRITERS = {".csv": CSVWriter, ".parquet": ParquetWriter, ".npy": NPYWriter}
+
+
+# =============================================================================
+# EXTRACTION
+# =============================================================================
+
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def resolve_output_format(output_format, output):
+    """The key of ``WRITERS`` for ``output_format`` (or the extension of
+    ``output`` if ``output_format`` is ``None``).
+
+    """
+    output_format = (
+        "." + output_format.lstrip(".") if output_format else
+        os.path.splitext(output)[1].lower())
+    if output_format not in WRITERS:
+        msg = "Unknown output format '{}'. Use one of {}"
+        raise ValueError(msg.format(output_format, ", ".join(WRITERS)))
+    return output_format
+
+
+def extract(space, lightcurves, output, chunk_size=1000, n_jobs=None,
+            output_format=None):
+    """Extract the features of an iterable of ``(id, lc)`` and write them
+    in ``output`` one chunk at a time.
+
+    The ``output_format`` (csv, parquet or npy) is taken by default from
+    the extension of ``output``.
+
+    Returns
+    -------
+
+    int
+        The number of light curves processed.
+
+    """
+    output_format = resolve_output_format(output_format, output)
+    writer = WRITERS[output_format](output, space.features_as_array_)
+    total = 0
+    try:
+        for chunk in _chunks(lightcurves, chunk_size):
+            ids = [lc_id for lc_id, _ in chunk]
+            values = space.extract_batch(
+                [lc for _, lc in chunk], n_jobs=n_jobs)[1]
+            writer.write(ids, values)
+            total += len(chunk)
+    finally:
+        writer.close()
+    return total
+
+
+# =============================================================================
+# CHECKPOINTED RUNS
+# =============================================================================
+
+class RunError(ValueError):
+    """The run directory is not compatible with the requested run."""
+    pass
+
+
+def _predicate_config(predicate):
+    # the qualified name is not enough to tell apart two lambdas, so the
+    # code of the python functions is hashed too (the values captured in
+    # closures are not, their repr is not stable between processes)
+    func = getattr(predicate, "__func__", predicate)
+    name = "{}.{}".format(
+        getattr(func, "__module__", None),
+        getattr(func, "__qualname__", getattr(
+            func, "__name__", type(func).__name__)))
+    code = getattr(func, "__code__", None)
+    if not isinstance(code, types.CodeType):
+        return name
+    digest = hashlib.sha1(code.co_code)
+    digest.update(repr(code.co_consts).encode("utf-8"))
+    return "{}:{}".format(name, digest.hexdigest())
+
+
+def space_config(space):
+    """A JSON serializable description of the configuration of a
+    ``FeatureSpace`` (the features, the parameters of the extractors, the
+    computation dtype and the stages of the cascade).
+
+    """
+    params = {
+        fext.name: {k: repr(v) for k, v in sorted(fext.params.items())}
+        for fext in space.features_extractors_}
+    cascade = [
+        [list(features), _predicate_config(predicate)]
+        for features, predicate in space.cascade]
+    return {
+        "features": list(space.features_as_array_),
+        "params": params,
+        "dtype": None if space.dtype is None else str(space.dtype),
+        "cascade": cascade}
+
+
+class CheckpointedRun(object):
+    """Resumable extraction of a catalog in a run directory.
+
+    Every chunk of light curves is written in their own shard
+    (``shard-<chunk>.<format>``) and recorded in ``manifest.json``
+    together with their ids. The manifest is replaced atomically after
+    every change, so the run can be killed at any time: a rerun over the
+    same sources skips the completed chunks and only redoes the chunk that
+    was in progress.
+
+    If a chunk fails, their light curves are extracted one by one and the
+    ones that fail are quarantined (excluded from the shard and reported in
+    ``quarantine``). If the process dies during a chunk (an OOM for
+    example), the next run extracts that chunk one light curve at a time
+    recording the light curve in flight, and the light curve that kills
+    the process again is quarantined by the following run.
+
+    Parameters
+    ----------
+
+    space : FeatureSpace
+    directory : str
+        The run directory (created if not exists).
+    chunk_size : int, default 1000
+        Light curves by chunk. Can't be changed when the run is resumed.
+    output_format : str, default "csv"
+        The format of the shards (csv, parquet or npy).
+    n_jobs : int, optional
+        Number of threads for ``FeatureSpace.extract_batch()``.
+
+    """
+
+    manifest_name = "manifest.json"
+
+    def __init__(self, space, directory, chunk_size=1000,
+                 output_format="csv", n_jobs=None):
+        self.space = space
+        self.directory = directory
+        self.chunk_size = chunk_size
+        self.n_jobs = n_jobs
+        self.output_format = resolve_output_format(output_format, None)
+
+        config = {
+            "space": space_config(space),
+            "chunk_size": chunk_size,
+            "format": self.output_format}
+        config_hash = hashlib.sha1(
+            json.dumps(config, sort_keys=True).encode("utf-8")).hexdigest()
+
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        self._manifest_path = os.path.join(directory, self.manifest_name)
+        if os.path.exists(self._manifest_path):
+            with io.open(self._manifest_path, encoding="utf-8") as fp:
+                self._manifest = json.load(fp)
+            if self._manifest["config_hash"] != config_hash:
+                msg = (
+                    "The run in '{}' was created with another configuration "
+                    "(FeatureSpace, cascade, chunk_size or format)"
+                ).format(directory)
+                raise RunError(msg)
+        else:
+            self._manifest = {
+                "config_hash": config_hash, "config": config,
+                "chunks": {}, "attempts": {}, "in_flight": None,
+                "quarantine": {}}
+            self._save()
+
+    def _save(self):
+        tmp = self._manifest_path + ".tmp"
+        with io.open(tmp, "w", encoding="utf-8") as fp:
+            fp.write(six.text_type(json.dumps(self._manifest, indent=1)))
+        if hasattr(os, "replace"):
+            os.replace(tmp, self._manifest_path)
+        else:  # pragma: no cover
+            os.rename(tmp, self._manifest_path)
+
+    @property
+    def quarantine(self):
+        """``{id: error}`` of the light curves that can't be extracted."""
+        return dict(self._manifest["quarantine"])
+
+    @property
+    def config_hash(self):
+        return self._manifest["config_hash"]
+
+    def shards(self):
+        """The paths of the completed shards in the order of the chunks."""
+        chunks = self._manifest["chunks"]
+        return [
+            os.path.join(self.directory, chunks[k]["shard"])
+            for k in sorted(chunks, key=int) if chunks[k]["shard"]]
+
+    def _extract_one_by_one(self, key, chunk, track):
+        # returns the ids and values of the light curves that can be
+        # extracted; the rest are quarantined
+        manifest = self._manifest
+        ids, values = [], []
+        for lc_id, lc in chunk:
+            if track:
+                manifest["in_flight"] = {"chunk": key, "id": lc_id}
+                self._save()
+            try:
+                values.append(self.space.extract(**lc)[1])
+            except Exception as err:
+                manifest["quarantine"][lc_id] = repr(err)
+            else:
+                ids.append(lc_id)
+        return ids, values
+
+    def _process(self, key, chunk):
+        manifest = self._manifest
+
+        # the light curve in flight when the last attempt died
+        in_flight = manifest["in_flight"]
+        if in_flight is not None and in_flight["chunk"] == key:
+            manifest["quarantine"][in_flight["id"]] = (
+                "The process died extracting this light curve")
+        manifest["in_flight"] = None
+
+        attempt = manifest["attempts"].get(key, 0) + 1
+        manifest["attempts"][key] = attempt
+        self._save()
+
+        chunk = [
+            (lc_id, lc) for lc_id, lc in chunk
+            if lc_id not in manifest["quarantine"]]
+
+        ids = [lc_id for lc_id, _ in chunk]
+        values = None
+        if attempt == 1:
+            try:
+                values = self.space.extract_batch(
+                    [lc for _, lc in chunk], n_jobs=self.n_jobs)[1]
+            except Exception:
+                pass
+        if values is None:
+            # a retry or the batch failed
+            ids, values = self._extract_one_by_one(
+                key, chunk, track=attempt > 1)
+
+        shard = None
+        if ids:
+            shard = "shard-{:06d}{}".format(int(key), self.output_format)
+            path = os.path.join(self.directory, shard)
+            writer = WRITERS[self.output_format](
+                path, self.space.features_as_array_)
+            try:
+                writer.write(ids, np.asarray(values))
+            finally:
+                writer.close()
+
+        manifest["chunks"][key] = {"shard": shard, "ids": ids}
+        manifest["attempts"].pop(key, None)
+        manifest["in_flight"] = None
+        self._save()
+        return len(ids)
+
+    def run(self, lightcurves):
+        """Extract the pending chunks of an iterable of ``(id, lc)``.
+
+        The iterable must produce the same light curves in the same order
+        every time the run is resumed.
+
+        Returns
+        -------
+
+        int
+            The number of light curves extracted by this call.
+
+        """
+        chunks = self._manifest["chunks"]
+        total = 0
+        for idx, chunk in enumerate(_chunks(lightcurves, self.chunk_size)):
+            key = str(idx)
+            chunk = [(six.text_type(lc_id), lc) for lc_id, lc in chunk]
+            if key in chunks:
+                done = set(chunks[key]["ids"]).union(self._manifest[
+                    "quarantine"])
+                if not done.issuperset(lc_id for lc_id, _ in chunk):
+                    msg = "The sources of the chunk {} changed".format(key)
+                    raise RunError(msg)
+                continue
+            total += self._process(key, chunk)
+        return total
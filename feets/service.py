@@ -0,0 +1,451 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# The MIT License (MIT)
+
+# Copyright (c) 2017 Juan Cabral
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+# =============================================================================
+# FUTURE
+# =============================================================================
+
+from __future__ import unicode_literals
+
+
+# =============================================================================
+# DOCS
+# =============================================================================
+
+__doc__ = """Asyncio front end to extract features of light curves that arrive
+one at a time (for example the requests of an online classifier).
+
+The light curves are queued and grouped in micro-batches (by size or by a
+deadline) which are extracted with ``FeatureSpace.extract_batch()`` in a
+thread (or process) pool. Every caller gets their own result back.
+
+.. code-block:: python
+
+    batcher = feets.service.MicroBatcher(fs, max_batch_size=32)
+    features, values = await batcher.extract(time=t, magnitude=m)
+
+    # or with the default batcher of the space
+    features, values = await fs.extract_async(time=t, magnitude=m)
+
+The module also includes a tiny HTTP server (over TCP or an Unix socket)
+to test the service without external infrastructure.
+
+This module requires Python 3.5+.
+
+"""
+
+__all__ = [
+    "MicroBatcher",
+    "get_batcher",
+    "serve"]
+
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+import asyncio
+import json
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from .extractors.core import DATAS
+
+
+# =============================================================================
+# CONSTANTS
+# =============================================================================
+
+# the default batchers of every space (one per event loop)
+_batchers = weakref.WeakKeyDictionary()
+
+# the keys of a light curve accepted by extract(): the data vectors and the
+# per curve arguments of FeatureSpace.extract()
+LC_KEYS = DATAS + ("mask", "time_offset", "period")
+
+HTTP_REASONS = {
+    200: "OK", 400: "Bad Request", 404: "Not Found",
+    405: "Method Not Allowed", 500: "Internal Server Error"}
+
+
+# =============================================================================
+# FUNCTIONS
+# =============================================================================
+
+def _extract_batch(space, lcs, return_flags):
+    # module level functions so they can be send to a process pool
+    return space.extract_batch(lcs, return_flags=return_flags)
+
+
+def _extract_each(space, lcs, return_flags):
+    # used when a batch fails, to isolate the light curves with problems
+    results = []
+    for lc in lcs:
+        try:
+            results.append(space.extract(return_flags=return_flags, **lc))
+        except Exception as err:
+            results.append(err)
+    return results
+
+
+# =============================================================================
+# MICRO BATCHER
+# =============================================================================
+
+class MicroBatcher(object):
+    """Groups the light curves submitted from coroutines in micro-batches.
+
+    Parameters
+    ----------
+
+    space : FeatureSpace
+        The space used to extract the features.
+    max_batch_size : int, default 64
+        A batch is dispatched as soon as it has this number of light curves.
+    max_latency : float, default 0.01
+        Seconds to wait for more light curves after the first one of a
+        batch arrives. Lower values reduce the latency of every request and
+        higher values the overhead per light curve.
+    max_pending : int, default 1024
+        Maximum number of light curves waiting for a batch. When the queue
+        is full ``extract()`` waits (backpressure).
+    max_workers : int, default 1
+        Maximum number of batches extracted at the same time.
+    executor : concurrent.futures.Executor, optional
+        Where the batches are extracted. By default a
+        ``ThreadPoolExecutor`` with ``max_workers`` threads is created (and
+        closed by ``close()``). A ``ProcessPoolExecutor`` is also valid but
+        the space is pickled with every batch.
+    return_flags : bool, default False
+        If True the results of ``extract()`` also contain the quality
+        flags.
+
+    """
+
+    def __init__(self, space, max_batch_size=64, max_latency=0.01,
+                 max_pending=1024, max_workers=1, executor=None,
+                 return_flags=False):
+        if max_batch_size < 1:
+            raise ValueError("'max_batch_size' must be >= 1")
+        if max_latency < 0:
+            raise ValueError("'max_latency' must be >= 0")
+        self.space = space
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency
+        self.max_pending = max_pending
+        self.max_workers = max_workers
+        self.return_flags = return_flags
+
+        self._own_executor = executor is None
+        self._executor = executor or ThreadPoolExecutor(max_workers)
+
+        # created with the first light curve, inside the event loop
+        self._loop = self._queue = self._slots = None
+        self._running = set()
+        self._collector = None
+        self._stats = dict.fromkeys(
+            ("curves", "batches", "errors", "latency", "busy"), 0)
+        self._started_at = None
+
+    def __repr__(self):
+        return (
+            "<MicroBatcher max_batch_size={} max_latency={} "
+            "max_workers={}>").format(
+                self.max_batch_size, self.max_latency, self.max_workers)
+
+    # API =====================================================================
+
+    def extract(self, **lc):
+        """Queue a light curve and wait for their features.
+
+        The parameters are the same data vectors and per light curve
+        arguments (``mask``, ``time_offset`` and ``period``) accepted by
+        ``FeatureSpace.extract()``.
+
+        Returns
+        -------
+
+        features, values (, flags) : the same as ``FeatureSpace.extract()``
+
+        Raises
+        ------
+
+        TypeError
+            If some parameter is not accepted.
+
+        """
+        unknown = set(lc).difference(LC_KEYS)
+        if unknown:
+            msg = "extract() got unexpected argument(s): {}"
+            raise TypeError(msg.format(", ".join(sorted(unknown))))
+        return self._submit(lc)
+
+    async def _submit(self, lc):
+        if self._collector is None:
+            self._loop = asyncio.get_event_loop()
+            self._queue = asyncio.Queue(self.max_pending)
+            self._slots = asyncio.Semaphore(self.max_workers)
+            self._started_at = self._loop.time()
+            self._collector = asyncio.ensure_future(self._collect())
+        future = self._loop.create_future()
+        await self._queue.put((lc, future, self._loop.time()))
+        return await future
+
+    async def close(self):
+        """Extract the pending light curves and stop the batcher."""
+        if self._collector is not None:
+            await self._queue.join()
+            self._collector.cancel()
+            self._collector = None
+        if self._running:
+            await asyncio.wait(self._running)
+        if self._own_executor:
+            self._executor.shutdown(wait=True)
+
+    def stats(self):
+        """Measurements to tune ``max_batch_size`` and ``max_latency``.
+
+        Returns
+        -------
+
+        dict
+            ``curves`` and ``batches`` processed, ``errors``,
+            ``mean_batch_size``, ``mean_latency`` (seconds from the
+            submission until the result), ``busy`` (seconds spent
+            extracting) and ``throughput`` (light curves per second since
+            the first submission).
+
+        """
+        stats = dict(self._stats)
+        curves, batches = stats["curves"], stats["batches"]
+        elapsed = (
+            self._loop.time() - self._started_at
+            if self._loop is not None else 0.)
+        stats["mean_batch_size"] = curves / batches if batches else 0.
+        stats["mean_latency"] = stats.pop("latency") / curves if curves else 0.
+        stats["throughput"] = curves / elapsed if elapsed else 0.
+        return stats
+
+    # INTERNALS ===============================================================
+
+    async def _collect(self):
+        queue, loop = self._queue, self._loop
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + self.max_latency
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                batch.append(item)
+            await self._slots.acquire()
+            task = asyncio.ensure_future(self._dispatch(batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _dispatch(self, batch):
+        lcs = [lc for lc, _, _ in batch]
+        started = time.time()
+        try:
+            try:
+                result = await self._loop.run_in_executor(
+                    self._executor, _extract_batch,
+                    self.space, lcs, self.return_flags)
+            except Exception:
+                results = await self._loop.run_in_executor(
+                    self._executor, _extract_each,
+                    self.space, lcs, self.return_flags)
+            else:
+                features, rest = result[0], result[1:]
+                results = [
+                    (features,) + tuple(r[idx] for r in rest)
+                    for idx in range(len(batch))]
+
+            now = self._loop.time()
+            for (_, future, submitted), result in zip(batch, results):
+                self._stats["latency"] += now - submitted
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    self._stats["errors"] += 1
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+            self._stats["curves"] += len(batch)
+            self._stats["batches"] += 1
+        finally:
+            self._stats["busy"] += time.time() - started
+            self._slots.release()
+            for _ in batch:
+                self._queue.task_done()
+
+
+def get_batcher(space):
+    """Return the default ``MicroBatcher`` of a space for the current event
+    loop (created with the default parameters the first time).
+
+    """
+    loop = asyncio.get_event_loop()
+    by_loop = _batchers.setdefault(space, weakref.WeakKeyDictionary())
+    if loop not in by_loop:
+        by_loop[loop] = MicroBatcher(space)
+    return by_loop[loop]
+
+
+# =============================================================================
+# HTTP SERVER
+# =============================================================================
+
+def _to_json(value):
+    value = np.asarray(value)
+    if value.dtype.kind == "f":
+        value = np.where(np.isfinite(value), value, None)
+    return value.tolist()
+
+
+async def _read_request(reader):
+    request_line = (await reader.readline()).decode("latin-1").split()
+    if len(request_line) != 3:
+        return None, None, None
+    method, path, _ = request_line
+    headers = {}
+    while True:
+        line = (await reader.readline()).decode("latin-1").strip()
+        if not line:
+            break
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get("content-length", 0))
+    body = await reader.readexactly(length) if length else b""
+    return method, path, body
+
+
+def _parse_lc(obj):
+    # the light curve of an /extract request
+    lc = {}
+    for k, v in obj.items():
+        if k not in LC_KEYS:
+            raise ValueError("Unknown key '{}'".format(k))
+        if v is None:
+            continue
+        if k == "mask":
+            lc[k] = np.asarray(v, dtype=bool)
+        elif k in ("time_offset", "period"):
+            lc[k] = float(v)
+        else:
+            lc[k] = np.asarray(v, dtype=float)
+    return lc
+
+
+def _response(status, payload):
+    body = json.dumps(payload).encode("utf-8")
+    head = (
+        "HTTP/1.1 {} {}\r\n"
+        "Content-Type: application/json\r\n"
+        "Content-Length: {}\r\n"
+        "Connection: close\r\n\r\n").format(
+            status, HTTP_REASONS[status], len(body))
+    return head.encode("latin-1") + body
+
+
+def _handler(batcher):
+
+    async def handle(reader, writer):
+        try:
+            method, path, body = await _read_request(reader)
+            if method is None:
+                status, payload = 400, {"error": "malformed request"}
+            elif path == "/stats" and method == "GET":
+                status, payload = 200, batcher.stats()
+            elif path != "/extract":
+                status, payload = 404, {"error": "not found"}
+            elif method != "POST":
+                status, payload = 405, {"error": "use POST"}
+            else:
+                try:
+                    lc = _parse_lc(json.loads(body.decode("utf-8")))
+                except (ValueError, TypeError, AttributeError) as err:
+                    status, payload = 400, {"error": str(err)}
+                else:
+                    try:
+                        result = await batcher.extract(**lc)
+                    except ValueError as err:
+                        status, payload = 400, {"error": str(err)}
+                    except Exception as err:
+                        status, payload = 500, {"error": str(err)}
+                    else:
+                        status = 200
+                        payload = {
+                            "features": _to_json(result[0]),
+                            "values": _to_json(result[1])}
+                        if len(result) > 2:
+                            payload["flags"] = _to_json(result[2])
+            writer.write(_response(status, payload))
+            await writer.drain()
+        finally:
+            writer.close()
+
+    return handle
+
+
+def serve(batcher, host="127.0.0.1", port=0, path=None):
+    """Start a minimal HTTP server for a ``MicroBatcher``.
+
+    Only for testing and benchmarks: ``POST /extract`` with a JSON object
+    of data vectors (``{"time": [...], "magnitude": [...]}``, and
+    optionally ``mask``, ``time_offset`` and ``period``) returns
+    ``{"features": [...], "values": [...]}`` (the non finite values as
+    null) and ``GET /stats`` returns ``MicroBatcher.stats()``. Unknown
+    keys are rejected with a 400 error.
+
+    Parameters
+    ----------
+
+    batcher : MicroBatcher
+    host, port : str, int
+        The address to listen. With ``port=0`` a free port is selected
+        (see ``server.sockets[0].getsockname()``).
+    path : str, optional
+        If is given, listen on this Unix socket instead of TCP.
+
+    Returns
+    -------
+
+    coroutine
+        Resolves to an ``asyncio.Server``.
+
+    """
+    handle = _handler(batcher)
+    if path is not None:
+        return asyncio.start_unix_server(handle, path=path)
+    return asyncio.start_server(handle, host=host, port=port)
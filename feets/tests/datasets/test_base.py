@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# The MIT License (MIT)
+
+# Copyright (c) 2017 Juan Cabral
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+# =============================================================================
+# FUTURE
+# =============================================================================
+
+from __future__ import unicode_literals
+
+
+# =============================================================================
+# DOC
+# =============================================================================
+
+__doc__ = """Dataset base classes tests"""
+
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+import pickle
+
+import numpy as np
+
+from ...datasets import macho
+
+from ..core import FeetsTestCase
+
+
+# =============================================================================
+# BASE CLASS
+# =============================================================================
+
+class LightCurveAsTypeTestCase(FeetsTestCase):
+
+    def test_float32_recenter(self):
+        lc = macho.load_MACHO_example().data.R
+        self.assertIsNone(lc.time_offset)
+
+        lc32 = lc.astype(np.float32)
+        self.assertEqual(lc32.time_offset, np.floor(lc.time.min()))
+        self.assertEqual(lc32.magnitude.dtype, np.float32)
+        self.assertEqual(lc32.time.dtype, np.float32)
+        self.assertAllClose(lc32.time, lc.time - lc32.time_offset)
+        self.assertIn("time_offset", dict(lc32))
+
+        lc64 = lc32.astype(np.float64)
+        self.assertIsNone(lc64.time_offset)
+        self.assertAllClose(lc64.time, lc.time)
+
+    def test_data_astype(self):
+        ds = macho.load_MACHO_example().astype(np.float32)
+        for band in ds.bands:
+            self.assertEqual(ds.data[band].magnitude.dtype, np.float32)
+            self.assertIsNotNone(ds.data[band].time_offset)
+
+    def test_data_pickle(self):
+        ds = macho.load_MACHO_example()
+        restored = pickle.loads(pickle.dumps(ds))
+        self.assertEqual(restored.id, ds.id)
+        self.assertEqual(restored.bands, ds.bands)
+        for band in ds.bands:
+            self.assertArrayEqual(
+                restored.data[band].magnitude, ds.data[band].magnitude)
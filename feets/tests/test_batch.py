@@ -0,0 +1,572 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# The MIT License (MIT)
+
+# Copyright (c) 2017 Juan Cabral
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+# =============================================================================
+# FUTURE
+# =============================================================================
+
+from __future__ import unicode_literals
+
+
+# =============================================================================
+# DOC
+# =============================================================================
+
+__doc__ = """Batch of light curves tests"""
+
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+import shutil
+
+import numpy as np
+
+import pandas as pd
+
+import mock
+
+from .. import FeatureSpace, DataRequiredError, registered_extractors
+from ..extractors import DeltamDeltat, Signature
+from ..extractors.core import (
+    FLAG_UNDEFINED, FLAG_NOT_FINITE, FLAG_KNOWN_ISSUE)
+from ..batch import (
+    LightCurveBatch, segment_sort, segment_median, segment_percentile,
+    segment_is_sorted, window_bounds, window_moments, window_covariance,
+    balanced_tasks, shared_folder)
+from ..datasets import macho
+
+from .core import FeetsTestCase
+
+
+# =============================================================================
+# FUNCTIONS
+# =============================================================================
+
+def random_lcs(seed=42, sizes=(30, 101, 64, 250)):
+    random = np.random.RandomState(seed)
+    lcs = []
+    for size in sizes:
+        time = random.uniform(0, 100, size)
+        lcs.append({
+            "time": time,
+            "magnitude": random.normal(15, 1, size) + np.sin(time),
+            "error": random.uniform(0.01, 0.1, size),
+            "magnitude2": random.normal(14, 1, size + 5)})
+    return lcs
+
+
+# =============================================================================
+# BASE CLASS
+# =============================================================================
+
+class LightCurveBatchTestCase(FeetsTestCase):
+
+    def setUp(self):
+        self.lcs = random_lcs()
+
+    def test_from_lightcurves(self):
+        batch = LightCurveBatch.from_lightcurves(self.lcs, ids=list("abcd"))
+        self.assertEqual(len(batch), 4)
+        self.assertCountEqual(
+            batch.data, ["time", "magnitude", "error", "magnitude2"])
+        self.assertArrayEqual(batch.lengths("magnitude"), [30, 101, 64, 250])
+        self.assertArrayEqual(
+            batch.lengths("magnitude2"), [35, 106, 69, 255])
+        for lc, curve in zip(self.lcs, batch):
+            for k, v in lc.items():
+                self.assertArrayEqual(curve[k], v)
+            self.assertIsNone(curve["aligned_time"])
+
+    def test_different_data(self):
+        lcs = [{"magnitude": [1, 2, 3]}, {"magnitude": [1], "time": [1]}]
+        with self.assertRaises(ValueError):
+            LightCurveBatch.from_lightcurves(lcs)
+
+    def test_invalid_offsets(self):
+        with self.assertRaises(ValueError):
+            LightCurveBatch([0, 2, 5], magnitude=np.arange(4))
+        with self.assertRaises(ValueError):
+            LightCurveBatch([0, 3, 2, 4], magnitude=np.arange(4))
+
+    def test_slice_is_view(self):
+        batch = LightCurveBatch.from_lightcurves(self.lcs, ids=list("abcd"))
+        sliced = batch[1:3]
+        self.assertEqual(len(sliced), 2)
+        self.assertArrayEqual(sliced.ids, ["b", "c"])
+        buff = sliced.segments("magnitude")[0]
+        self.assertTrue(np.shares_memory(buff, batch.segments("magnitude")[0]))
+        self.assertArrayEqual(sliced[0]["magnitude"], self.lcs[1]["magnitude"])
+        self.assertArrayEqual(
+            sliced[-1]["magnitude2"], self.lcs[2]["magnitude2"])
+
+    def test_take(self):
+        batch = LightCurveBatch.from_lightcurves(self.lcs, ids=list("abcd"))
+        taken = batch.take([3, 1])
+        self.assertArrayEqual(taken.ids, ["d", "b"])
+        self.assertArrayEqual(taken.lengths("magnitude2"), [255, 106])
+        for curve, idx in zip(taken, [3, 1]):
+            for k, v in self.lcs[idx].items():
+                self.assertArrayEqual(curve[k], v)
+        self.assertEqual(len(batch.take([])), 0)
+
+    def test_periods(self):
+        lcs = [dict(lc) for lc in self.lcs]
+        lcs[1]["period"] = 3.
+        batch = LightCurveBatch.from_lightcurves(lcs)
+        self.assertArrayEqual(batch.periods, [np.nan, 3., np.nan, np.nan])
+        self.assertArrayEqual(batch[1:3].periods, [3., np.nan])
+        self.assertArrayEqual(batch.take([1]).periods, [3.])
+        self.assertIsNone(LightCurveBatch.from_lightcurves(self.lcs).periods)
+
+    def test_from_datas(self):
+        ids = macho.available_MACHO_lc()[:3]
+        datas = [macho.load_MACHO(mid) for mid in ids]
+        batch = LightCurveBatch.from_datas(datas, "R")
+        self.assertArrayEqual(batch.ids, ids)
+        for data, curve in zip(datas, batch):
+            self.assertArrayEqual(curve["time"], data.data.R.time)
+
+    def test_astype(self):
+        lcs = random_lcs()
+        for lc in lcs:
+            lc["time"] = lc["time"] + 50000
+        batch = LightCurveBatch.from_lightcurves(lcs)
+
+        batch32 = batch.astype(np.float32)
+        self.assertEqual(batch32.segments("magnitude")[0].dtype, np.float32)
+        self.assertEqual(len(batch32.time_offsets), len(batch))
+        for lc, curve, offset in zip(lcs, batch32, batch32.time_offsets):
+            self.assertEqual(offset, np.floor(lc["time"].min()))
+            self.assertAllClose(curve["time"], lc["time"] - offset)
+
+        batch64 = batch32.astype(np.float64)
+        self.assertIsNone(batch64.time_offsets)
+        self.assertAllClose(
+            batch64.segments("time")[0], batch.segments("time")[0])
+
+    def test_memmap(self):
+        batch = LightCurveBatch.from_lightcurves(self.lcs, ids=list("abcd"))
+        folder = shared_folder()
+        try:
+            shared = batch.memmap(folder)
+            mapped = shared.segments("magnitude")[0]
+            self.assertIsInstance(mapped.base, np.memmap)
+            buff = shared[1:3].segments("magnitude")[0]
+            self.assertTrue(np.shares_memory(buff, mapped))
+            self.assertFalse(buff.flags.writeable)
+            self.assertArrayEqual(shared.ids, batch.ids)
+            for lc, curve in zip(self.lcs, shared):
+                for k, v in lc.items():
+                    self.assertArrayEqual(curve[k], v)
+        finally:
+            shutil.rmtree(folder)
+
+    def test_sort_by_time(self):
+        batch = LightCurveBatch.from_lightcurves(self.lcs, ids=list("abcd"))
+        sorted_batch = batch.sort_by_time()
+        self.assertArrayEqual(sorted_batch.ids, batch.ids)
+        for lc, curve in zip(self.lcs, sorted_batch):
+            order = np.argsort(lc["time"], kind="mergesort")
+            for k in ("time", "magnitude", "error"):
+                self.assertArrayEqual(curve[k], lc[k][order])
+            self.assertArrayEqual(curve["magnitude2"], lc["magnitude2"])
+        self.assertIs(sorted_batch.sort_by_time(), sorted_batch)
+
+
+class SegmentKernelsTestCase(FeetsTestCase):
+
+    def test_is_sorted(self):
+        values = np.array([1., 2., 0., 5., 6., 4., 9., np.nan, 3.])
+        offsets = np.array([0, 2, 2, 4, 6, 9])
+        self.assertArrayEqual(
+            segment_is_sorted(values, offsets),
+            [True, True, True, False, False])
+
+    def test_sort_median_percentile(self):
+        random = np.random.RandomState(42)
+        values = random.normal(size=100)
+        offsets = np.array([0, 7, 8, 40, 100])
+        sorted_values = segment_sort(values, offsets)
+        medians = segment_median(sorted_values, offsets)
+        p25 = segment_percentile(sorted_values, offsets, 25)
+        for idx, (start, end) in enumerate(zip(offsets[:-1], offsets[1:])):
+            self.assertArrayEqual(
+                sorted_values[start:end], np.sort(values[start:end]))
+            self.assertAllClose(medians[idx], np.median(values[start:end]))
+            self.assertAllClose(
+                p25[idx], np.percentile(values[start:end], 25))
+
+
+class BalancedTasksTestCase(FeetsTestCase):
+
+    def test_tasks(self):
+        costs = np.array([1., 1., 50., 1., 2., 1., 30., 1., 1., 1.])
+        tasks = balanced_tasks(costs, n_jobs=2, tasks_per_job=2)
+        # the most expensive curves first and alone
+        self.assertArrayEqual(tasks[0], [2])
+        self.assertArrayEqual(tasks[1], [6])
+        self.assertArrayEqual(
+            np.sort(np.concatenate(tasks)), np.arange(len(costs)))
+        self.assertEqual(balanced_tasks([], 2), [])
+        self.assertEqual(len(balanced_tasks(np.zeros(3), 2)), 1)
+
+
+class ExtractBatchTestCase(FeetsTestCase):
+
+    def setUp(self):
+        self.lcs = random_lcs()
+
+    def test_batch_capable_same_as_extract(self):
+        only = [
+            fname for fname, ext in registered_extractors().items()
+            if ext.is_batch_capable()]
+        space = FeatureSpace(only=only)
+        features, values = space.extract_batch(self.lcs)
+        self.assertEqual(values.shape, (len(self.lcs), len(features)))
+        for lc, row in zip(self.lcs, values):
+            self.assertAllClose(row, space.extract(**lc)[1])
+
+    def test_invalid_same_as_extract(self):
+        lcs, masks = [dict(lc) for lc in self.lcs], []
+        for idx, lc in enumerate(lcs):
+            lc["magnitude"] = lc["magnitude"].copy()
+            lc["magnitude"][idx::5] = np.nan
+            mask = np.ones(len(lc["time"]), dtype=bool)
+            mask[1::7] = False
+            masks.append(mask)
+        space = FeatureSpace(only=["Mean", "Std", "Con", "MaxSlope"])
+
+        batch = LightCurveBatch.from_lightcurves(lcs)
+        values = space.extract_batch(batch)[1]
+        for lc, row in zip(lcs, values):
+            self.assertAllClose(row, space.extract(**lc)[1])
+
+        masked = [dict(lc, mask=mask) for lc, mask in zip(lcs, masks)]
+        values = space.extract_batch(masked)[1]
+        for lc, row in zip(masked, values):
+            self.assertAllClose(row, space.extract(**lc)[1])
+
+    def test_empty_curves(self):
+        lcs = [dict(lc) for lc in self.lcs]
+        lcs[0]["magnitude"] = np.full(len(lcs[0]["time"]), np.nan)
+        lcs[2] = {k: v[:0] for k, v in lcs[2].items()}
+        batch = LightCurveBatch.from_lightcurves(lcs)
+        self.assertArrayEqual(batch.lengths("magnitude"), [0, 101, 0, 250])
+
+        space = FeatureSpace(only=["Mean", "Std", "Con"])
+        features, values, flags = space.extract_batch(
+            batch, return_flags=True)
+        self.assertTrue(np.isnan(values[[0, 2]]).all())
+        self.assertTrue((flags[[0, 2]] & FLAG_UNDEFINED).all())
+        for idx in (1, 3):
+            self.assertAllClose(values[idx], space.extract(**lcs[idx])[1])
+
+    def test_not_batch_capable(self):
+        space = FeatureSpace(only=["Con", "Mean"])
+        features, values = space.extract_batch(self.lcs)
+        for lc, row in zip(self.lcs, values):
+            self.assertAllClose(row, space.extract(**lc)[1])
+
+    def test_process_backend(self):
+        space = FeatureSpace(only=["Con", "Mean", "Std"])
+        features, values, flags = space.extract_batch(
+            self.lcs, return_flags=True)
+        for backend in ("loky", "multiprocessing"):
+            result = space.extract_batch(
+                self.lcs, return_flags=True, n_jobs=2, backend=backend)
+            self.assertArrayEqual(result[0], features)
+            self.assertAllClose(result[1], values)
+            self.assertArrayEqual(result[2], flags)
+
+    def test_schedules(self):
+        space = FeatureSpace(only=["Mean", "SlottedA_length"])
+        lengths = [len(lc["magnitude"]) for lc in self.lcs]
+        costs = space.batch_costs(LightCurveBatch.from_lightcurves(self.lcs))
+        self.assertAllClose(costs, np.add(lengths, np.square(lengths)))
+
+        features, values = space.extract_batch(self.lcs)
+        for schedule in ("cost", "contiguous"):
+            result = space.extract_batch(
+                self.lcs, n_jobs=3, schedule=schedule)[1]
+            self.assertAllClose(result, values)
+        with self.assertRaises(ValueError):
+            space.extract_batch(self.lcs, n_jobs=2, schedule="foo")
+
+    def test_grids(self):
+        dmdt = sorted(DeltamDeltat.get_features())
+        space = FeatureSpace(only=["Mean", "Std"] + dmdt)
+        features, values, flags = space.extract_batch(
+            self.lcs, return_flags=True)
+        dmdt_values = values[:, np.isin(features, dmdt)]
+
+        with mock.patch("feets.core.GRID_CHUNK_SIZE", 3):
+            scalars, scalar_values, scalar_flags, grids = space.extract_batch(
+                self.lcs, return_flags=True, grids="compact")
+        self.assertArrayEqual(scalars, ["Mean", "Std"])
+        self.assertAllClose(scalar_values, values[:, ~np.isin(features, dmdt)])
+        grid = grids["DeltamDeltat"]
+        self.assertArrayEqual(grid.features, dmdt)
+        self.assertEqual(grid.values.dtype, np.uint8)
+        self.assertEqual(grid.values.shape, (len(self.lcs), 23, 24))
+        self.assertArrayEqual(
+            grid.values.reshape(len(self.lcs), -1), dmdt_values)
+        self.assertArrayEqual(grid.flags, [0, 0, 0, 0])
+
+        scalars, scalar_values, grids = space.extract_batch(
+            self.lcs, grids="sparse")
+        grid = grids["DeltamDeltat"]
+        self.assertIsNone(grid.flags)
+        self.assertLess(grid.values.nnz, dmdt_values.size)
+        self.assertArrayEqual(grid.values.toarray(), dmdt_values)
+
+    def test_compact_grids_without_dtype(self):
+        signature = sorted(Signature.get_features())
+        dmdt = sorted(DeltamDeltat.get_features())
+        space = FeatureSpace(
+            only=["Amplitude", "PeriodLS"] + signature + dmdt)
+        features, values = space.extract_batch(self.lcs)
+
+        scalars, scalar_values, grids = space.extract_batch(
+            self.lcs, grids="compact")
+        self.assertEqual(list(grids), ["DeltamDeltat"])
+        self.assertArrayEqual(scalars, features[~np.isin(features, dmdt)])
+        self.assertAllClose(
+            scalar_values, values[:, ~np.isin(features, dmdt)])
+
+        grids = space.extract_batch(self.lcs, grids="sparse")[2]
+        self.assertCountEqual(grids, ["DeltamDeltat", "Signature"])
+
+    def test_empty_batch(self):
+        space = FeatureSpace(only=["Mean"])
+        batch = LightCurveBatch.from_lightcurves(self.lcs)[:0]
+        features, values = space.extract_batch(batch)
+        self.assertEqual(values.shape, (0, 1))
+
+    def test_float32(self):
+        space = FeatureSpace(only=["Mean", "Std", "MaxSlope"])
+        space32 = FeatureSpace(
+            only=["Mean", "Std", "MaxSlope"], dtype=np.float32)
+        values = space.extract_batch(self.lcs)[1]
+        values32 = space32.extract_batch(self.lcs)[1]
+        self.assertAllClose(values32, values, rtol=1e-5)
+
+    def test_data_required(self):
+        space = FeatureSpace(only=["StetsonK"])
+        batch = LightCurveBatch([0, 3], magnitude=[1., 2., 3.])
+        with self.assertRaises(DataRequiredError):
+            space.extract_batch(batch)
+
+
+class WindowsTestCase(FeetsTestCase):
+
+    def setUp(self):
+        lc = random_lcs(sizes=(300,))[0]
+        del lc["magnitude2"]
+        self.lc = lc
+        self.order = np.argsort(lc["time"])
+
+    def test_window_bounds_points(self):
+        starts, stops = window_bounds(np.arange(10), 4, stride=3, by="points")
+        self.assertArrayEqual(starts, [0, 3, 6])
+        self.assertArrayEqual(stops, [4, 7, 10])
+        starts, stops = window_bounds(np.arange(3), 4, by="points")
+        self.assertArrayEqual(starts, [0])
+        self.assertArrayEqual(stops, [3])
+
+    def test_window_bounds_time(self):
+        time = np.array([0., 1., 2., 2.5, 7., 8., 9.])
+        starts, stops = window_bounds(time, 3., stride=1.)
+        # the windows that begin at 3 and 4 are empty
+        self.assertArrayEqual(starts, [0, 1, 2, 4, 4, 4])
+        self.assertArrayEqual(stops, [4, 4, 4, 5, 6, 7])
+        with self.assertRaises(ValueError):
+            window_bounds(time, 3., by="days")
+
+    def test_window_bounds_cover_the_end(self):
+        # a last partial window with the observations 9 and 10
+        for by, window in [("time", 3.), ("points", 3)]:
+            starts, stops = window_bounds(np.arange(11.), window, by=by)
+            self.assertArrayEqual(starts, [0, 3, 6, 9])
+            self.assertArrayEqual(stops, [3, 6, 9, 11])
+
+        # the end of a half-open window
+        starts, stops = window_bounds(np.arange(10.), 3.)
+        self.assertArrayEqual(stops, [3, 6, 9, 10])
+
+        # with gaps between the windows the end can be skipped
+        starts, stops = window_bounds(np.arange(11), 3, stride=5, by="points")
+        self.assertArrayEqual(starts, [0, 5, 10])
+        self.assertArrayEqual(stops, [3, 8, 11])
+
+    def test_window_kernels(self):
+        random = np.random.RandomState(42)
+        x, y = random.normal(size=100), random.normal(size=100)
+        starts, stops = window_bounds(
+            np.arange(100), 10, stride=3, by="points")
+        mean, (m2, m3) = window_moments(x, starts, stops, order=3)
+        cov = window_covariance(x, y, starts, stops)
+        for idx, (start, stop) in enumerate(zip(starts, stops)):
+            wx, wy = x[start:stop], y[start:stop]
+            self.assertAllClose(mean[idx], wx.mean())
+            self.assertAllClose(m2[idx], wx.var())
+            self.assertAllClose(m3[idx], np.mean((wx - wx.mean()) ** 3))
+            self.assertAllClose(cov[idx], np.cov(wx, wy, bias=True)[0, 1])
+
+        # exactly zero for constant windows
+        mean, (m2,) = window_moments(np.full(10, 1e6 + 0.1), starts[:1], [5])
+        self.assertEqual(m2[0], 0.)
+
+    def test_from_windows(self):
+        batch = LightCurveBatch.from_windows(self.lc, 50, by="points")
+        self.assertEqual(len(batch), 6)
+        time = self.lc["time"][self.order]
+        self.assertArrayEqual(batch.ids, time[::50])
+        self.assertArrayEqual(
+            batch[1]["magnitude"], self.lc["magnitude"][self.order][50:100])
+        with self.assertRaises(ValueError):
+            LightCurveBatch.from_windows(
+                dict(self.lc, magnitude2=self.lc["magnitude"]), 50)
+
+    def test_from_windows_views(self):
+        lc = {k: v[self.order] for k, v in self.lc.items()}
+        batch = LightCurveBatch.from_windows(lc, 50, by="points")
+        self.assertTrue(np.shares_memory(batch[2]["time"], lc["time"]))
+        # the overlapped windows are copied
+        batch = LightCurveBatch.from_windows(lc, 50, stride=25, by="points")
+        self.assertFalse(np.shares_memory(batch[2]["time"], lc["time"]))
+        self.assertArrayEqual(batch[1]["time"], lc["time"][25:75])
+
+    def test_from_windows_invalid(self):
+        lc = dict(self.lc)
+        lc["magnitude"] = lc["magnitude"].copy()
+        lc["magnitude"][self.order[:10]] = np.nan
+        batch = LightCurveBatch.from_windows(lc, 50, by="points")
+        self.assertEqual(len(batch), 6)
+        self.assertEqual(batch.ids[0], lc["time"][self.order[10]])
+
+    def test_extract_windows(self):
+        space = FeatureSpace(only=["Mean", "Std", "LinearTrend", "Con"])
+        features, values = space.extract_windows(
+            window=20., stride=5., **self.lc)
+        sorted_lc = {k: v[self.order] for k, v in self.lc.items()}
+        starts, stops = window_bounds(sorted_lc["time"], 20., stride=5.)
+        self.assertEqual(values.shape, (len(starts), len(features)))
+        for start, stop, row in zip(starts, stops, values):
+            expected = space.extract(
+                **{k: v[start:stop] for k, v in sorted_lc.items()})[1]
+            self.assertAllClose(row, expected)
+
+    def test_extract_windows_prefix_sums(self):
+        space = FeatureSpace(only=[
+            "Mean", "Std", "Skew", "SmallKurtosis", "Meanvariance",
+            "LinearTrend"])
+        sorted_lc = {k: v[self.order] for k, v in self.lc.items()}
+        starts, stops = window_bounds(sorted_lc["time"], 20., stride=5.)
+        with mock.patch.object(
+            LightCurveBatch, "from_windows"
+        ) as from_windows:
+            features, values, flags = space.extract_windows(
+                window=20., stride=5., return_flags=True, **self.lc)
+        from_windows.assert_not_called()
+        self.assertEqual(values.shape, (len(starts), len(features)))
+        self.assertArrayEqual(flags, 0)
+        for start, stop, row in zip(starts, stops, values):
+            expected = space.extract(
+                **{k: v[start:stop] for k, v in sorted_lc.items()})[1]
+            self.assertAllClose(row, expected, rtol=1e-6)
+
+    def test_extract_windows_data_required(self):
+        space = FeatureSpace(only=["Mean", "Color"])
+        with self.assertRaises(DataRequiredError):
+            space.extract_windows(window=20., **self.lc)
+
+
+class DataFrameTestCase(FeetsTestCase):
+
+    def setUp(self):
+        self.lcs = random_lcs()
+        rows = []
+        for idx, lc in enumerate(self.lcs):
+            for band, shift in (("g", 0.), ("r", 1.)):
+                rows.append(pd.DataFrame({
+                    "src": "s{}".format(idx), "band": band,
+                    "time": lc["time"], "mag": lc["magnitude"] + shift,
+                    "err": lc["error"]}))
+        # shuffled, like the observations of a survey
+        self.df = pd.concat(rows).sample(frac=1, random_state=42)
+        self.columns = {"time": "time", "magnitude": "mag", "error": "err"}
+
+    def test_from_dataframe(self):
+        df = self.df[self.df.band == "g"]
+        batch = LightCurveBatch.from_dataframe(
+            df, id_column="src", columns=self.columns)
+        self.assertArrayEqual(batch.ids, ["s0", "s1", "s2", "s3"])
+        for lc, curve in zip(self.lcs, batch):
+            order = np.argsort(lc["time"])
+            self.assertArrayEqual(curve["time"], lc["time"][order])
+            self.assertArrayEqual(curve["magnitude"], lc["magnitude"][order])
+
+    def test_from_dataframe_invalid(self):
+        df = self.df[self.df.band == "g"].copy()
+        df["valid"] = df.time > 20
+        df.loc[df.mag > 16, "mag"] = np.nan
+        batch = LightCurveBatch.from_dataframe(
+            df, id_column="src", columns=self.columns, mask_column="valid")
+        for lc, curve in zip(self.lcs, batch):
+            keep = (lc["time"] > 20) & (lc["magnitude"] <= 16)
+            self.assertArrayEqual(
+                curve["time"], np.sort(lc["time"][keep]))
+
+    def test_extract_dataframe(self):
+        space = FeatureSpace(only=["Mean", "Std"])
+        values, flags = space.extract_dataframe(
+            self.df[self.df.src != "s1"].iloc[5:], id_column="src",
+            columns=self.columns, band_column="band", return_flags=True)
+        self.assertArrayEqual(values.index, ["s0", "s2", "s3"])
+        self.assertArrayEqual(
+            values.columns, ["Mean_g", "Std_g", "Mean_r", "Std_r"])
+        self.assertAllClose(
+            values.Mean_r - values.Mean_g, [1., 1., 1.], atol=0.2)
+        self.assertTrue((flags.values == 0).all())
+
+    def test_extract_dataframe_missing_band(self):
+        space = FeatureSpace(only=["Mean", "StetsonK"])
+        df = self.df[~((self.df.src == "s1") & (self.df.band == "r"))]
+        values, flags = space.extract_dataframe(
+            df, id_column="src", columns=self.columns, band_column="band",
+            return_flags=True)
+        self.assertTrue(np.isnan(values.loc["s1", "Mean_r"]))
+        self.assertEqual(flags.Mean_r.dtype, np.uint8)
+        self.assertEqual(
+            flags.loc["s1", "Mean_r"], FLAG_NOT_FINITE | FLAG_UNDEFINED)
+        self.assertEqual(
+            flags.loc["s1", "StetsonK_r"],
+            FLAG_NOT_FINITE | FLAG_UNDEFINED | FLAG_KNOWN_ISSUE)
+        self.assertEqual(flags.loc["s1", "Mean_g"], 0)
+        self.assertEqual(flags.loc["s1", "StetsonK_g"], FLAG_KNOWN_ISSUE)
+        self.assertEqual(flags.loc["s0", "Mean_r"], 0)
@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# The MIT License (MIT)
+
+# Copyright (c) 2017 Juan Cabral
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+# =============================================================================
+# FUTURE
+# =============================================================================
+
+from __future__ import unicode_literals
+
+
+# =============================================================================
+# DOC
+# =============================================================================
+
+__doc__ = """Command line interface tests"""
+
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+import os
+import shutil
+import tempfile
+
+import json
+
+import numpy as np
+
+import pandas as pd
+
+from .. import FeatureSpace
+from ..cli import main
+from ..runs import read_lightcurves, _read_table
+from ..datasets import macho
+
+from .core import FeetsTestCase
+
+
+# =============================================================================
+# TESTS
+# =============================================================================
+
+class CLITestCase(FeetsTestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.space = FeatureSpace(only=["Mean", "Std", "Q31"])
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_extract_macho_dir_to_csv(self):
+        output = os.path.join(self.tmp, "features.csv")
+        main([
+            "extract", macho.DATA_PATH, "--band", "R",
+            "--only", "Mean", "Std", "Q31", "-o", output,
+            "--chunk-size", "3", "-j", "2"])
+
+        df = pd.read_csv(output, index_col="id")
+        self.assertCountEqual(df.index, macho.available_MACHO_lc())
+        for lc_id, lc in read_lightcurves(macho.DATA_PATH, band="R"):
+            features, values = self.space.extract(**lc)
+            self.assertAllClose(df.loc[lc_id, features].values, values)
+
+        example = macho.load_MACHO_example()
+        lc = example.data.R
+        values = self.space.extract(
+            time=lc.time, magnitude=lc.magnitude, error=lc.error)[1]
+        self.assertAllClose(df.loc[example.id, features].values, values)
+
+    def test_extract_table_to_npy(self):
+        random = np.random.RandomState(42)
+        table = pd.concat([
+            pd.DataFrame({
+                "id": "src{}".format(idx),
+                "time": np.arange(size, dtype=float),
+                "magnitude": random.normal(size=size),
+                "error": random.uniform(size=size)})
+            for idx, size in enumerate([5, 11, 3, 8])])
+        source = os.path.join(self.tmp, "table.csv")
+        table.to_csv(source, index=False)
+
+        # small chunks to split the sources between chunks
+        lcs = list(_read_table(
+            source, "id", ["time", "magnitude", "error"], chunksize=4))
+        self.assertEqual(
+            [i for i, _ in lcs], ["src0", "src1", "src2", "src3"])
+        self.assertEqual([len(lc["time"]) for _, lc in lcs], [5, 11, 3, 8])
+
+        output = os.path.join(self.tmp, "features.npy")
+        main(["extract", source, "--only", "Mean", "Std", "Q31",
+              "-o", output])
+        values = np.load(output)
+        expected = self.space.extract_batch(
+            [lc for _, lc in read_lightcurves(source)])[1]
+        self.assertAllClose(values, expected)
+        with open(output + ".ids.txt") as fp:
+            self.assertEqual(fp.read().split(), [i for i, _ in lcs])
+
+
+class CLICheckpointTestCase(FeetsTestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_cli_checkpoint(self):
+        argv = [
+            "extract", macho.DATA_PATH, "--band", "R", "--only", "Mean",
+            "--checkpoint", self.tmp, "--chunk-size", "4"]
+        main(argv)
+        main(argv)
+        with open(os.path.join(self.tmp, "manifest.json")) as fp:
+            manifest = json.load(fp)
+        self.assertEqual(len(manifest["chunks"]), 3)
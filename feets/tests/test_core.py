@@ -42,12 +42,21 @@ __doc__ = """All feets base tests"""
 # IMPORTS
 # =============================================================================
 
+import copy
+import pickle
+import threading
+import warnings
+
 import numpy as np
 
 import mock
 
 from .. import (
-    FeatureSpace, Extractor, register_extractor, ExtractorContractError)
+    FeatureSpace, FeatureSpaceUnion, Extractor, register_extractor,
+    ExtractorContractError, FeatureNotFound, describe_flags, count_flags)
+from ..extractors.core import FLAG_UNDEFINED, FLAG_SKIPPED, FLAG_DIVERGED
+from .. import preprocess, extractors
+from ..profiles import PROFILES, profile_report
 
 from .core import FeetsTestCase
 
@@ -139,3 +148,650 @@ class FeatureSpaceTestCase(FeetsTestCase):
 
         fs = FeatureSpace(exclude=["test_a"])
         self.assertCountEqual(fs.features_, ["test_c", "test_a2"])
+
+
+class FeatureSpacePickleTestCase(FeetsTestCase):
+
+    def setUp(self):
+        random = np.random.RandomState(42)
+        self.lc = {
+            "time": np.arange(100.),
+            "magnitude": random.normal(size=100),
+            "error": random.uniform(0.01, 0.1, 100)}
+
+    def test_pickle(self):
+        space = FeatureSpace(
+            only=["Mean", "Std", "CAR_sigma"],
+            CAR={"minimize_method": "powell"})
+        data = pickle.dumps(space, protocol=pickle.HIGHEST_PROTOCOL)
+        self.assertLess(len(data), 1024)
+
+        restored = pickle.loads(data)
+        self.assertIsNot(restored, space)
+        self.assertArrayEqual(
+            restored.features_as_array_, space.features_as_array_)
+        self.assertEqual(restored._kwargs, space._kwargs)
+        self.assertAllClose(
+            restored.extract(**self.lc)[1], space.extract(**self.lc)[1])
+
+    def test_unpickled_share_extractors(self):
+        space = FeatureSpace(only=["Mean", "Std"])
+        first = pickle.loads(pickle.dumps(space))
+        second = pickle.loads(pickle.dumps(space))
+        self.assertIsNot(first, second)
+        self.assertIs(first._execution_plan, second._execution_plan)
+        self.assertAllClose(
+            first.extract(**self.lc)[1], second.extract(**self.lc)[1])
+
+    def test_selection_memoized(self):
+        first = FeatureSpace(only=["Mean", "Std"], exclude=["Std"])
+        second = FeatureSpace(exclude=["Std"], only=["Std", "Mean"])
+        self.assertArrayEqual(first.features_as_array_, ["Mean"])
+        self.assertIs(first._features, second._features)
+
+    def test_layout_memoized(self):
+        only = ["Mean", "Std", "Amplitude", "PeriodLS", "Psi_CS", "CAR_sigma"]
+        first = FeatureSpace(only=only, CAR={"minimize_method": "powell"})
+        second = FeatureSpace(only=only, CAR={"minimize_method": "powell"})
+
+        # new extractors with the same layout
+        self.assertIs(second._base_flags, first._base_flags)
+        for fext, other in zip(
+            first._execution_plan, second._execution_plan
+        ):
+            self.assertIsNot(fext, other)
+            self.assertEqual(fext.params, other.params)
+            self.assertEqual(
+                fext.get_requested_features(),
+                other.get_requested_features())
+            self.assertIs(second._layouts[other], first._layouts[fext])
+            self.assertEqual(
+                [p.name for p in second._providers[other].values()],
+                [p.name for p in first._providers[fext].values()])
+        self.assertEqual(
+            {(fext.name, f): c for (fext, f), c in first._columns.items()},
+            {(fext.name, f): c for (fext, f), c in second._columns.items()})
+        self.assertAllClose(
+            second.extract(**self.lc)[1], first.extract(**self.lc)[1])
+
+        # other parameters are compiled apart
+        other = FeatureSpace(only=only, CAR={"minimize_method": "nelder-mead"})
+        self.assertIsNot(other._base_flags, first._base_flags)
+        car = [fext for fext in other._execution_plan if fext.name == "CAR"]
+        self.assertEqual(car[0].params["minimize_method"], "nelder-mead")
+
+    def test_layout_memoized_cascade(self):
+        only = ["Mean", "Std"]
+        first = FeatureSpace(only=only, cascade=[(["Std"], lambda f: True)])
+        second = FeatureSpace(only=only, cascade=[(["Std"], lambda f: False)])
+        self.assertIs(second._base_flags, first._base_flags)
+        self.assertTrue(np.isfinite(first.extract(**self.lc)[1]).all())
+        self.assertArrayEqual(
+            np.isnan(second.extract(**self.lc)[1]), [True, False])
+
+    def test_layout_memoized_invalid_params(self):
+        for _ in range(2):
+            with self.assertRaises(FeatureNotFound):
+                FeatureSpace(only=["Mean"], Std={})
+
+
+class FeatureSpaceTimeSortTestCase(FeetsTestCase):
+
+    def setUp(self):
+        random = np.random.RandomState(42)
+        time = np.sort(random.uniform(0, 100, 200))
+        self.lc = {
+            "time": time,
+            "magnitude": random.normal(size=200) + np.sin(time),
+            "error": random.uniform(0.01, 0.1, 200)}
+        self.order = random.permutation(200)
+        self.only = [
+            "Mean", "MaxSlope", "Eta_e", "StructureFunction_index_21"]
+
+    def test_unsorted_same_as_sorted(self):
+        space = FeatureSpace(only=self.only)
+        shuffled = {k: v[self.order] for k, v in self.lc.items()}
+        self.assertAllClose(
+            space.extract(**shuffled)[1], space.extract(**self.lc)[1])
+
+    def test_mask_sorted_with_data(self):
+        space = FeatureSpace(only=self.only)
+        mask = np.ones(200, dtype=bool)
+        mask[::7] = False
+        shuffled = {k: v[self.order] for k, v in self.lc.items()}
+        self.assertAllClose(
+            space.extract(mask=mask[self.order], **shuffled)[1],
+            space.extract(mask=mask, **self.lc)[1])
+
+    def test_time_sorted_skip_verification(self):
+        space = FeatureSpace(only=self.only)
+        with mock.patch.object(
+            space, "sort_by_time", wraps=space.sort_by_time
+        ) as sort_by_time:
+            space.extract(**self.lc)
+            self.assertEqual(sort_by_time.call_count, 1)
+            space.extract(time_sorted=True, **self.lc)
+            self.assertEqual(sort_by_time.call_count, 1)
+
+    def test_order_dependent_extractors_alone(self):
+        random = np.random.RandomState(42)
+        lc = dict(self.lc, magnitude2=random.normal(size=200))
+        lc.update({
+            "aligned_time": lc["time"],
+            "aligned_magnitude": lc["magnitude"],
+            "aligned_magnitude2": lc["magnitude2"],
+            "aligned_error": lc["error"],
+            "aligned_error2": random.uniform(0.01, 0.1, 200)})
+        shuffled = {k: v[self.order] for k, v in lc.items()}
+
+        exts = set(extractors.registered_extractors().values())
+        order_dependent = sorted(
+            (ext for ext in exts if ext.requires_sorted_time),
+            key=lambda ext: ext.__name__)
+        names = {ext.__name__ for ext in order_dependent}
+        self.assertTrue(names.issuperset([
+            "RCS", "AutocorLength", "Con", "StetsonKAC", "MaxSlope",
+            "StructureFunctions", "DeltamDeltat"]))
+
+        for ext in order_dependent:
+            only = list(ext.get_features()) + list(ext.get_dependencies())
+            space = FeatureSpace(only=only)
+            self.assertAllClose(
+                space.extract(**shuffled)[1], space.extract(**lc)[1],
+                err_msg=ext.__name__)
+
+    def test_direct_fit_unsorted(self):
+        time, magnitude = self.lc["time"], self.lc["magnitude"]
+        for ext in (extractors.MaxSlope(), extractors.StructureFunctions()):
+            expected = ext.fit(magnitude=magnitude, time=time, **ext.params)
+            result = ext.fit(
+                magnitude=magnitude[self.order], time=time[self.order],
+                **ext.params)
+            self.assertEqual(sorted(result), sorted(expected))
+            for feature, value in expected.items():
+                self.assertAllClose(result[feature], value)
+
+    def test_no_sort_without_order_dependent_extractors(self):
+        space = FeatureSpace(only=["Mean", "Std"])
+        with mock.patch.object(space, "sort_by_time") as sort_by_time:
+            space.extract(**self.lc)
+        sort_by_time.assert_not_called()
+
+
+class FeatureSpaceMaskTestCase(FeetsTestCase):
+
+    def setUp(self):
+        random = np.random.RandomState(42)
+        size = 200
+        self.time = np.sort(random.uniform(0, 100, size))
+        self.magnitude = random.normal(15, 1, size) + np.sin(self.time)
+        self.error = random.uniform(0.01, 0.1, size)
+        self.mask = random.rand(size) > 0.3
+        self.only = [
+            "Mean", "Std", "Amplitude", "StetsonK", "Beyond1Std", "Rcs",
+            "Eta_e", "MaxSlope"]
+
+    def test_mask_same_as_filtered(self):
+        space = FeatureSpace(only=self.only)
+        features, values = space.extract(
+            time=self.time, magnitude=self.magnitude, error=self.error,
+            mask=self.mask)
+        expected = space.extract(
+            time=self.time[self.mask],
+            magnitude=self.magnitude[self.mask],
+            error=self.error[self.mask])[1]
+        self.assertAllClose(values, expected)
+
+    def test_nan_same_as_filtered(self):
+        space = FeatureSpace(only=self.only)
+        magnitude = self.magnitude.copy()
+        magnitude[~self.mask] = np.nan
+        values = space.extract(
+            time=self.time, magnitude=magnitude, error=self.error)[1]
+        expected = space.extract(
+            time=self.time[self.mask],
+            magnitude=self.magnitude[self.mask],
+            error=self.error[self.mask])[1]
+        self.assertAllClose(values, expected)
+
+    def test_mask_capable_receive_masked_arrays(self):
+        space = FeatureSpace(only=["Mean"])
+        with mock.patch(
+            "feets.extractors.ext_mean.Mean.fit_masked",
+            return_value={"Mean": 1.}
+        ) as fit_masked:
+            space.extract(magnitude=self.magnitude, mask=self.mask)
+        magnitude = fit_masked.call_args[1]["magnitude"]
+        self.assertIsInstance(magnitude, np.ma.MaskedArray)
+        self.assertTrue(np.shares_memory(magnitude.data, self.magnitude))
+
+    def test_invalid_mask_shape(self):
+        space = FeatureSpace(only=["Mean"])
+        with self.assertRaises(ValueError):
+            space.extract(magnitude=self.magnitude, mask=self.mask[1:])
+
+
+class FeatureSpaceDtypeTestCase(FeetsTestCase):
+
+    def setUp(self):
+        random = np.random.RandomState(42)
+        size = 300
+        self.time = 50000 + np.sort(random.uniform(0, 1000, size))
+        self.magnitude = random.normal(15, 1, size) + np.sin(self.time)
+        self.error = random.uniform(0.01, 0.1, size)
+        self.only = ["Mean", "Std", "Amplitude", "LinearTrend", "PeriodLS"]
+
+    def test_invalid_dtype(self):
+        with self.assertRaises(ValueError):
+            FeatureSpace(only=["Mean"], dtype=int)
+
+    def test_float32_close_to_float64(self):
+        space = FeatureSpace(only=self.only)
+        space32 = FeatureSpace(only=self.only, dtype=np.float32)
+        self.assertEqual(space32.dtype, np.float32)
+        values = space.extract(
+            time=self.time, magnitude=self.magnitude, error=self.error)[1]
+        values32 = space32.extract(
+            time=self.time, magnitude=self.magnitude, error=self.error)[1]
+        self.assertAllClose(values32, values, rtol=1e-4)
+
+    def test_float32_recentered_and_promoted(self):
+        space32 = FeatureSpace(
+            only=["LinearTrend", "PeriodLS"], dtype=np.float32)
+        received = {}
+
+        def fit(name):
+            def _fit(self, magnitude, time, **kwargs):
+                received[name] = time
+                return dict.fromkeys(self.get_features(), 0.)
+            return _fit
+
+        with mock.patch(
+            "feets.extractors.ext_linear_trend.LinearTrend.fit",
+            fit("LinearTrend")
+        ), mock.patch(
+            "feets.extractors.ext_lomb_scargle.LombScargle.fit",
+            fit("LombScargle")
+        ):
+            space32.extract(time=self.time, magnitude=self.magnitude)
+
+        self.assertEqual(received["LinearTrend"].dtype, np.float32)
+        self.assertLess(received["LinearTrend"][0], 1)
+        self.assertEqual(received["LombScargle"].dtype, np.float64)
+        self.assertArrayEqual(received["LombScargle"], self.time)
+
+    def test_time_offset(self):
+        space = FeatureSpace(only=["PeriodLS", "Psi_CS", "Psi_eta"])
+        values = space.extract(time=self.time, magnitude=self.magnitude)[1]
+        offset_values = space.extract(
+            time=self.time - 50000, magnitude=self.magnitude,
+            time_offset=50000)[1]
+        self.assertAllClose(values, offset_values)
+
+
+class FeatureSpaceOutTestCase(FeetsTestCase):
+
+    def setUp(self):
+        random = np.random.RandomState(42)
+        size = 100
+        self.time = np.sort(random.uniform(0, 100, size))
+        self.magnitude = random.normal(15, 1, size)
+        self.error = random.uniform(0.01, 0.1, size)
+
+    def test_extract_into_preallocated_row(self):
+        space = FeatureSpace(only=["Mean", "Std", "PeriodLS", "Psi_eta"])
+        features, values = space.extract(
+            time=self.time, magnitude=self.magnitude, error=self.error)
+        out = np.empty((3, len(features)))
+        result = space.extract(
+            time=self.time, magnitude=self.magnitude, error=self.error,
+            out=out[1])[1]
+        self.assertIs(result.base, out)
+        self.assertArrayEqual(out[1], values)
+        self.assertEqual(
+            space.as_dict(values)["Mean"], np.mean(self.magnitude))
+
+    def test_extract_batch_into_preallocated_matrix(self):
+        space = FeatureSpace(only=["Mean", "Std", "Q31"])
+        lcs = [
+            {"time": self.time, "magnitude": self.magnitude},
+            {"time": self.time[:50], "magnitude": self.magnitude[:50]}]
+        out = np.empty((2, 3))
+        result = space.extract_batch(lcs, out=out)[1]
+        self.assertIs(result, out)
+        for lc, row in zip(lcs, out):
+            self.assertAllClose(row, space.extract(**lc)[1])
+        self.assertArrayEqual(space.as_dict(out)["Std"], out[:, 2])
+
+    def test_invalid_out_shape(self):
+        space = FeatureSpace(only=["Mean", "Std"])
+        with self.assertRaises(ValueError):
+            space.extract(magnitude=self.magnitude, out=np.empty(3))
+
+
+class FeatureSpaceFlagsTestCase(FeetsTestCase):
+
+    @mock.patch("feets.extractors._extractors", {})
+    def test_extract_flags(self):
+
+        @register_extractor
+        class Flagged(Extractor):
+            data = ["magnitude"]
+            features = ["Ok", "Undefined", "Nan"]
+            warnings = ["This extractor is only for testing"]
+
+            def fit(self, magnitude):
+                self.flag(FLAG_UNDEFINED, "Undefined")
+                return {"Ok": 1., "Undefined": 0., "Nan": np.nan}
+
+        space = FeatureSpace()
+        features, values, flags = space.extract(
+            magnitude=np.ones(10), return_flags=True)
+        flags = dict(zip(features, flags))
+        self.assertEqual(describe_flags(flags["Ok"]), ("known_issue",))
+        self.assertEqual(
+            describe_flags(flags["Undefined"]), ("undefined", "known_issue"))
+        self.assertEqual(
+            describe_flags(flags["Nan"]), ("not_finite", "known_issue"))
+
+        lcs = [{"magnitude": np.ones(10)}] * 3
+        features, values, flags = space.extract_batch(lcs, return_flags=True)
+        counts = count_flags(flags)
+        self.assertArrayEqual(counts["known_issue"], [3, 3, 3])
+        self.assertArrayEqual(
+            counts["undefined"], [3 * (f == "Undefined") for f in features])
+
+    @mock.patch("feets.extractors._extractors", {})
+    def test_extract_batch_flags(self):
+
+        @register_extractor
+        class BatchFlagged(Extractor):
+            data = ["magnitude"]
+            features = ["Short", "Diverged"]
+
+            def fit(self, magnitude):
+                pass
+
+            def fit_batch(self, batch):
+                lengths = batch.lengths("magnitude")
+                self.flag(FLAG_DIVERGED, "Diverged")
+                self.flag_batch(FLAG_UNDEFINED, lengths < 5, "Short")
+                return {"Short": lengths, "Diverged": lengths}
+
+        space = FeatureSpace()
+        lcs = [{"magnitude": np.ones(size)} for size in (3, 10, 4)]
+        features, values, flags = space.extract_batch(lcs, return_flags=True)
+        flags = dict(zip(features, flags.T))
+        self.assertArrayEqual(
+            flags["Short"], [FLAG_UNDEFINED, 0, FLAG_UNDEFINED])
+        self.assertArrayEqual(flags["Diverged"], [FLAG_DIVERGED] * 3)
+
+    def test_car_without_warnings_filter(self):
+        self.assertFalse(any(
+            "cannot handle" in getattr(f[1], "pattern", "")
+            for f in warnings.filters))
+        random = np.random.RandomState(42)
+        space = FeatureSpace(only=["CAR_sigma"])
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", RuntimeWarning)
+            space.extract(
+                time=np.sort(random.uniform(0, 100, 50)),
+                magnitude=random.normal(size=50), error=np.full(50, 0.1))
+
+
+class FeatureSpaceThreadsTestCase(FeetsTestCase):
+
+    def setUp(self):
+        random = np.random.RandomState(42)
+        self.lcs = []
+        for size in random.randint(50, 100, 12):
+            self.lcs.append({
+                "time": np.sort(random.uniform(0, 100, size)),
+                "magnitude": random.normal(15, 1, size),
+                "error": random.uniform(0.01, 0.1, size)})
+
+    def test_extract_batch_threads(self):
+        space = FeatureSpace(only=["Mean", "Std", "PeriodLS", "Con"])
+        values = space.extract_batch(self.lcs)[1]
+        threaded = space.extract_batch(self.lcs, n_jobs=3)[1]
+        self.assertArrayEqual(values, threaded)
+
+    def test_concurrent_extract(self):
+        space = FeatureSpace(only=["Mean", "StructureFunction_index_21"])
+        expected = [space.extract(**lc)[1] for lc in self.lcs]
+        results = [None] * len(self.lcs)
+
+        def extract(idx):
+            results[idx] = space.extract(**self.lcs[idx])[1]
+
+        threads = [
+            threading.Thread(target=extract, args=(idx,))
+            for idx in range(len(self.lcs))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertArrayEqual(results, expected)
+
+    @mock.patch("feets.extractors._extractors", {})
+    def test_not_thread_safe_extractor_serialized(self):
+
+        @register_extractor
+        class Stateful(Extractor):
+            data = ["magnitude"]
+            features = ["Stateful"]
+            running = []
+
+            def setup(self):
+                self.running.append(1)
+
+            def fit(self, magnitude):
+                return {"Stateful": len(self.running)}
+
+            def teardown(self):
+                self.running.pop()
+
+        self.assertFalse(Stateful.is_thread_safe())
+        self.assertTrue(Extractor.is_thread_safe())
+
+        space = FeatureSpace()
+        values = space.extract_batch(self.lcs, n_jobs=4)[1]
+        self.assertArrayEqual(values, np.ones((len(self.lcs), 1)))
+
+        ext = copy.deepcopy(Stateful())
+        self.assertIsNotNone(ext._lock)
+
+
+class FeatureSpaceUnionTestCase(FeetsTestCase):
+
+    def setUp(self):
+        random = np.random.RandomState(42)
+        self.time = np.sort(random.uniform(0, 100, 100))
+        self.magnitude = np.sin(self.time) + random.normal(size=100)
+        lscargle_kwds = {"autopower_kwds": {"nyquist_factor": 50}}
+        self.spaces = [
+            FeatureSpace(only=["Mean", "PeriodLS", "Psi_CS"]),
+            FeatureSpace(only=["Std", "PeriodLS", "Period_fit"]),
+            FeatureSpace(
+                only=["PeriodLS"],
+                LombScargle={"lscargle_kwds": lscargle_kwds})]
+
+    def test_extract(self):
+        union = self.spaces[0].union(*self.spaces[1:])
+        # Mean, Std and two LombScargle variants
+        self.assertEqual(len(union.excecution_plan_), 4)
+
+        results = union.extract(time=self.time, magnitude=self.magnitude)
+        for space, (features, values) in zip(self.spaces, results):
+            expected = space.extract(time=self.time, magnitude=self.magnitude)
+            self.assertArrayEqual(features, expected[0])
+            self.assertAllClose(values, expected[1])
+
+    def test_extract_batch(self):
+        union = FeatureSpaceUnion(self.spaces[:2])
+        lcs = [{"time": self.time, "magnitude": self.magnitude}] * 3
+        results = union.extract_batch(lcs, return_flags=True)
+        for space, (features, values, flags) in zip(self.spaces, results):
+            expected = space.extract_batch(lcs, return_flags=True)
+            self.assertAllClose(values, expected[1])
+            self.assertArrayEqual(flags, expected[2])
+
+    def test_invalid_dtypes(self):
+        with self.assertRaises(ValueError):
+            FeatureSpaceUnion([
+                FeatureSpace(only=["Mean"]),
+                FeatureSpace(only=["Mean"], dtype=np.float32)])
+
+
+class FeatureSpaceProfileTestCase(FeetsTestCase):
+
+    def test_profile_params(self):
+        space = FeatureSpace(only=["CAR_sigma", "SlottedA_length"],
+                             profile="fast", CAR={"minimize_tol": 0.5})
+        self.assertEqual(space.profile, "fast")
+        params = {fext.name: fext.params for fext in space.excecution_plan_}
+        # the explicit parameters replace the ones of the profile
+        self.assertEqual(params["CAR"]["minimize_tol"], 0.5)
+        self.assertEqual(
+            params["CAR"]["minimize_method"], "nelder-mead")
+        self.assertEqual(
+            params["SlottedA_length"]["max_K"],
+            PROFILES["fast"]["SlottedA_length"]["max_K"])
+
+    def test_exact_is_default(self):
+        exact = FeatureSpace(only=["PeriodLS"], profile="exact")
+        default = FeatureSpace(only=["PeriodLS"])
+        self.assertEqual(
+            exact.excecution_plan_[0].params,
+            default.excecution_plan_[0].params)
+
+    def test_unknown_profile(self):
+        with self.assertRaises(ValueError):
+            FeatureSpace(only=["Mean"], profile="turbo")
+
+    def test_profile_report(self):
+        random = np.random.RandomState(42)
+        lcs = []
+        for _ in range(3):
+            time = np.sort(random.uniform(0, 100, 100))
+            lcs.append({
+                "time": time,
+                "magnitude": np.sin(time) + random.normal(size=100)})
+        reports = profile_report(
+            profiles=["exact", "fast"], lightcurves=lcs,
+            only=["Mean", "PeriodLS"])
+        self.assertEqual([r.profile for r in reports], ["exact", "fast"])
+        self.assertArrayEqual(reports[0].features, ["Mean", "PeriodLS"])
+        self.assertArrayEqual(reports[0].max_deviation, [0., 0.])
+        self.assertEqual(reports[1].max_deviation[0], 0.)
+
+
+class FeatureSpaceCascadeTestCase(FeetsTestCase):
+
+    def setUp(self):
+        random = np.random.RandomState(42)
+        self.lcs = []
+        for amplitude in (0., 3., 0., 3.):
+            time = np.sort(random.uniform(0, 100, 100))
+            self.lcs.append({
+                "time": time,
+                "magnitude": (
+                    amplitude * np.sin(time) + random.normal(size=100))})
+        self.only = ["Std", "Mean", "PeriodLS", "Psi_eta"]
+        self.cascade = [(["Std"], lambda f: f["Std"] > 1.5)]
+
+    def test_stages(self):
+        space = FeatureSpace(
+            only=["Std", "Mean", "Amplitude", "PeriodLS",
+                  "Signature_ph_00_mag_00"],
+            cascade=[(["Std", "Signature_ph_00_mag_00"], bool)])
+        plan = [[fext.name for fext in stage.plan] for stage in space._stages]
+        # the providers of Signature are pulled to the first stage
+        self.assertCountEqual(
+            plan[0], ["Std", "LombScargle", "Amplitude", "Signature"])
+        self.assertEqual(plan[1], ["Mean"])
+
+    def test_extract(self):
+        space = FeatureSpace(only=self.only, cascade=self.cascade)
+        full = FeatureSpace(only=self.only)
+        for lc in self.lcs:
+            features, values, flags = space.extract(return_flags=True, **lc)
+            expected = full.extract(**lc)[1]
+            if values[features == "Std"] > 1.5:
+                self.assertAllClose(values, expected)
+                self.assertFalse(np.any(flags & FLAG_SKIPPED))
+            else:
+                skipped = features != "Std"
+                self.assertTrue(np.isnan(values[skipped]).all())
+                self.assertTrue(np.all(flags[skipped] & FLAG_SKIPPED))
+                self.assertAllClose(values[~skipped], expected[~skipped])
+
+    def test_extract_batch(self):
+        space = FeatureSpace(only=self.only, cascade=self.cascade)
+        features, values, flags = space.extract_batch(
+            self.lcs, return_flags=True)
+        for lc, row, row_flags in zip(self.lcs, values, flags):
+            expected = space.extract(return_flags=True, **lc)
+            self.assertAllClose(row, expected[1])
+            self.assertArrayEqual(row_flags, expected[2])
+
+    def test_invalid_cascade(self):
+        with self.assertRaises(FeatureNotFound):
+            FeatureSpace(only=["Mean"], cascade=[(["Std"], bool)])
+        with self.assertRaises(TypeError):
+            FeatureSpace(only=["Std"], cascade=[(["Std"], None)])
+        with self.assertRaises(ValueError):
+            FeatureSpace(only=["Std"], cascade=self.cascade).union(
+                FeatureSpace(only=["Std"]))
+
+
+class FeatureSpaceMultiBandTestCase(FeetsTestCase):
+
+    def setUp(self):
+        random = np.random.RandomState(42)
+        time = np.arange(100.)
+        self.bands = []
+        for name, shift in (("g", 0.), ("r", 0.5), ("i", 1.)):
+            # every band misses some observations
+            observed = np.sort(random.choice(time, 80, replace=False))
+            self.bands.append((name, {
+                "time": observed,
+                "magnitude": shift + random.normal(size=80),
+                "error": random.uniform(0.01, 0.1, 80)}))
+        self.only = ["Mean", "Std", "Color", "StetsonJ", "Q31_color"]
+
+    def test_extract_multiband(self):
+        space = FeatureSpace(only=self.only)
+        features, values = space.extract_multiband(self.bands)
+        result = dict(zip(features, values))
+        self.assertEqual(len(features), 3 * 2 + 3 * 3)
+
+        for name, lc in self.bands:
+            self.assertAllClose(result["Mean_" + name], lc["magnitude"].mean())
+
+        lcs = dict(self.bands)
+        pair_space = FeatureSpace(only=["Color", "StetsonJ", "Q31_color"])
+        for first, second in [("g", "r"), ("g", "i"), ("r", "i")]:
+            lc, lc2 = lcs[first], lcs[second]
+            aligned = preprocess.align(
+                lc["time"], lc2["time"], lc["magnitude"], lc2["magnitude"],
+                lc["error"], lc2["error"])
+            expected = pair_space.extract(
+                time=lc["time"], magnitude=lc["magnitude"],
+                error=lc["error"], magnitude2=lc2["magnitude"],
+                aligned_time=aligned[0], aligned_magnitude=aligned[1],
+                aligned_magnitude2=aligned[2], aligned_error=aligned[3],
+                aligned_error2=aligned[4])
+            for fname, value in zip(*expected):
+                self.assertAllClose(
+                    result["{}_{}_{}".format(fname, first, second)], value)
+
+    def test_pairs_and_flags(self):
+        space = FeatureSpace(only=["Mean", "Color"])
+        features, values, flags = space.extract_multiband(
+            self.bands, pairs=[("i", "g")], return_flags=True)
+        self.assertArrayEqual(
+            features, ["Mean_g", "Mean_r", "Mean_i", "Color_i_g"])
+        self.assertEqual(flags.shape, values.shape)
+        with self.assertRaises(ValueError):
+            space.extract_multiband(self.bands, pairs=[("g", "z")])
@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# The MIT License (MIT)
+
+# Copyright (c) 2017 Juan Cabral
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+# =============================================================================
+# FUTURE
+# =============================================================================
+
+from __future__ import unicode_literals
+
+
+# =============================================================================
+# DOC
+# =============================================================================
+
+__doc__ = """Dask integration tests"""
+
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+import numpy as np
+
+import pandas as pd
+
+import pytest
+
+from .. import FeatureSpace
+from ..dask import (
+    features_meta, extract_partitions, extract_bag, _extract_partition)
+
+from .core import FeetsTestCase
+from .test_batch import random_lcs
+
+
+# =============================================================================
+# FUNCTIONS
+# =============================================================================
+
+def long_table(lcs):
+    rows = []
+    for idx, lc in enumerate(lcs):
+        for band, shift in (("g", 0.), ("r", 1.)):
+            rows.append(pd.DataFrame({
+                "src": "s{}".format(idx), "band": band,
+                "time": lc["time"], "magnitude": lc["magnitude"] + shift}))
+    return pd.concat(rows, ignore_index=True)
+
+
+# =============================================================================
+# TESTS
+# =============================================================================
+
+class PartitionTestCase(FeetsTestCase):
+
+    def setUp(self):
+        self.lcs = random_lcs()
+        self.space = FeatureSpace(only=["Mean", "Std"])
+
+    def test_meta(self):
+        meta = features_meta(self.space, "src", bands=["g", "r"])
+        self.assertEqual(len(meta), 0)
+        self.assertEqual(meta.index.name, "src")
+        self.assertArrayEqual(
+            meta.columns, ["Mean_g", "Std_g", "Mean_r", "Std_r"])
+        self.assertTrue((meta.dtypes == np.float64).all())
+
+    def test_partition(self):
+        df = long_table(self.lcs).set_index("src")
+        # the partition lacks the r band
+        part = df[df.band == "g"]
+        values = _extract_partition(
+            part, self.space, "src", None, "band", ["g", "r"], None)
+        self.assertArrayEqual(
+            values.columns, ["Mean_g", "Std_g", "Mean_r", "Std_r"])
+        self.assertArrayEqual(values.index, ["s0", "s1", "s2", "s3"])
+        for lc, (_, row) in zip(self.lcs, values.iterrows()):
+            self.assertAllClose(row.Mean_g, np.mean(lc["magnitude"]))
+        self.assertTrue(values[["Mean_r", "Std_r"]].isnull().all().all())
+
+        empty = _extract_partition(
+            part.iloc[:0], self.space, "src", None, "band", ["g", "r"], None)
+        self.assertEqual(len(empty), 0)
+        self.assertArrayEqual(empty.columns, values.columns)
+
+    def test_partition_index_dtype(self):
+        df = long_table(self.lcs)
+        df["src"] = df["src"].str[1:].astype(np.int64)
+        for part in (df, df.set_index("src")):
+            values = _extract_partition(
+                part, self.space, "src", None, "band", ["g", "r"], None)
+            empty = _extract_partition(
+                part.iloc[:0], self.space, "src", None, "band", ["g", "r"],
+                None)
+            self.assertEqual(values.index.dtype, np.int64)
+            self.assertEqual(empty.index.dtype, np.int64)
+            self.assertArrayEqual(values.index, [0, 1, 2, 3])
+
+
+class DaskTestCase(FeetsTestCase):
+
+    def setUp(self):
+        self.dd = pytest.importorskip("dask.dataframe")
+        self.db = pytest.importorskip("dask.bag")
+        self.lcs = random_lcs()
+        self.space = FeatureSpace(only=["Mean", "Std"])
+
+    def test_extract_partitions(self):
+        df = long_table(self.lcs)
+        ddf = self.dd.from_pandas(df, npartitions=3).set_index("src")
+        result = extract_partitions(
+            self.space, ddf, id_column="src", band_column="band",
+            bands=["g", "r"])
+        expected = self.space.extract_dataframe(
+            df, id_column="src", band_column="band")
+        values = result.compute(scheduler="threads").sort_index()
+        self.assertArrayEqual(values.columns, expected.columns)
+        self.assertAllClose(values.values, expected.values)
+
+    def test_extract_bag(self):
+        lcs = [dict(lc, id=idx) for idx, lc in enumerate(self.lcs)]
+        bag = self.db.from_sequence(lcs, npartitions=2)
+        values = extract_bag(self.space, bag).compute(scheduler="threads")
+        expected = self.space.extract_batch(self.lcs)[1]
+        self.assertArrayEqual(values.index, [0, 1, 2, 3])
+        self.assertAllClose(values.values, expected)
@@ -43,12 +43,14 @@ __doc__ = """Extractors Tests"""
 # =============================================================================
 
 import unittest
+import warnings
 
 import numpy as np
 
 import mock
 
-from .. import Extractor, register_extractor, extractors
+from .. import Extractor, FeatureSpace, register_extractor, extractors
+from ..extractors import ext_dmdt
 
 from .core import FeetsTestCase
 
@@ -109,6 +111,71 @@ class SortByFependenciesTest(FeetsTestCase):
             else:
                 self.fail("to many extractors in plan: {}".format(idx))
 
+    def test_sort_by_dependencies_keep_order(self):
+        class A(Extractor):
+            data = ["magnitude"]
+            features = ["test_a"]
+
+            def fit(self, *args):
+                pass
+
+        class B(Extractor):
+            data = ["magnitude"]
+            features = ["test_b"]
+
+            def fit(self, *args):
+                pass
+
+        class C(Extractor):
+            data = ["magnitude"]
+            features = ["test_c"]
+            dependencies = ["test_a"]
+
+            def fit(self, *args):
+                pass
+
+        plan = extractors.sort_by_dependencies([C, B, A])
+        self.assertEqual(plan, (B, A, C))
+
+    def test_sort_by_dependencies_invalid(self):
+        class A(Extractor):
+            data = ["magnitude"]
+            features = ["test_a"]
+            dependencies = ["test_b"]
+
+            def fit(self, *args):
+                pass
+
+        class B(Extractor):
+            data = ["magnitude"]
+            features = ["test_b"]
+            dependencies = ["test_a"]
+
+            def fit(self, *args):
+                pass
+
+        with self.assertRaises(RuntimeError):
+            extractors.sort_by_dependencies([A, B])
+        with self.assertRaises(RuntimeError):
+            extractors.sort_by_dependencies([A])
+
+    def test_sort_by_dependencies_retry_deprecated(self):
+        class A(Extractor):
+            data = ["magnitude"]
+            features = ["test_a"]
+
+            def fit(self, *args):
+                pass
+
+        with warnings.catch_warnings(record=True) as ws:
+            warnings.simplefilter("always")
+            plan = extractors.sort_by_dependencies([A], retry=10)
+            extractors.sort_by_dependencies([A])
+        self.assertEqual(plan, (A,))
+        self.assertEqual(len(ws), 1)
+        self.assertTrue(issubclass(ws[0].category, DeprecationWarning))
+        self.assertEqual(ws[0].filename, __file__.replace(".pyc", ".py"))
+
 
 class FATSExtractorsTestCases(FeetsTestCase):
 
@@ -249,6 +316,48 @@ class feetsExtractorsTestCases(FeetsTestCase):
             values[idx] = np.sum(list(feats.values()))
         self.assertAllClose(values.mean(), 424.56)
 
+    def test_dmdt_fit_into(self):
+        ext = extractors.DeltamDeltat()
+        params = ext.get_default_params()
+        time = np.arange(0, 100)
+        mags = self.random.normal(size=100)
+
+        feats = ext.fit(magnitude=mags, time=time, **params)
+        out = np.empty(len(ext.get_ordered_features()))
+        ext.fit_into(out, magnitude=mags, time=time, **params)
+        self.assertArrayEqual(
+            out, [feats[f] for f in ext.get_ordered_features()])
+
+    def test_dmdt_max_pairs(self):
+        ext = extractors.DeltamDeltat()
+        params = ext.get_default_params()
+        time = np.arange(0, 300)
+        mags = self.random.normal(size=300)
+
+        full = ext.counts(mags, time, params["dt_bins"], params["dm_bins"])
+        sampled = ext.counts(
+            mags, time, params["dt_bins"], params["dm_bins"], max_pairs=5000)
+        again = ext.counts(
+            mags, time, params["dt_bins"], params["dm_bins"], max_pairs=5000)
+        self.assertEqual(sampled.shape, full.shape)
+        self.assertArrayEqual(sampled, again)
+        # the normalized map of 5000 of the 44850 pairs
+        self.assertAllClose(sampled, full, atol=3)
+
+    def test_dmdt_sample_pairs(self):
+        first, second = np.triu_indices(50, 1)
+
+        # all the pairs in the triangle order
+        pairs = ext_dmdt._sample_pairs(50, len(first), self.random)
+        self.assertArrayEqual(pairs[0], first)
+        self.assertArrayEqual(pairs[1], second)
+
+        # a sparse sample of distinct pairs of a long light curve
+        first, second = ext_dmdt._sample_pairs(30000, 20000, self.random)
+        self.assertEqual(len(set(zip(first, second))), 20000)
+        self.assertAll(first < second)
+        self.assertAll((first >= 0) & (second < 30000))
+
     def test_flatten_dmdt(self):
         ext = extractors.DeltamDeltat()
         params = ext.get_default_params()
@@ -276,3 +385,110 @@ class feetsExtractorsTestCases(FeetsTestCase):
 
         # .T.reshape(23, 24))
         np.testing.assert_array_equal(expected, flattened)
+
+
+class PartialFeaturesTestCase(FeetsTestCase):
+
+    def setUp(self):
+        random = np.random.RandomState(42)
+        self.time = np.sort(random.uniform(0, 100, 200))
+        self.magnitude = (
+            np.sin(2 * np.pi * self.time / 3.) +
+            random.normal(scale=0.1, size=200))
+        self.full = FeatureSpace(only=[
+            "PeriodLS", "Period_fit", "Psi_CS", "Psi_eta",
+            "Freq1_harmonics_amplitude_0", "Freq2_harmonics_amplitude_1",
+            "Freq3_harmonics_rel_phase_2"])
+        self.expected = dict(zip(*self.full.extract(
+            time=self.time, magnitude=self.magnitude)))
+
+    def test_lomb_scargle_skip_fap(self):
+        space = FeatureSpace(only=["Psi_CS"])
+        with mock.patch(
+            "feets.extractors.ext_lomb_scargle.LombScargle._compute_fap"
+        ) as compute_fap:
+            features, values = space.extract(
+                time=self.time, magnitude=self.magnitude)
+        compute_fap.assert_not_called()
+        self.assertAllClose(values, [self.expected["Psi_CS"]])
+
+    def test_fourier_components_stop_early(self):
+        lscargle = extractors.ext_fourier_components.lscargle
+        for feature, rounds in [("Freq1_harmonics_amplitude_0", 1),
+                                ("Freq2_harmonics_amplitude_1", 2),
+                                ("Freq3_harmonics_rel_phase_2", 3)]:
+            space = FeatureSpace(only=[feature])
+            with mock.patch(
+                "feets.extractors.ext_fourier_components.lscargle",
+                side_effect=lscargle
+            ) as mocked:
+                values = space.extract(
+                    time=self.time, magnitude=self.magnitude)[1]
+            self.assertEqual(mocked.call_count, rounds)
+            self.assertAllClose(values, [self.expected[feature]])
+
+    def test_fourier_components_names(self):
+        ext = extractors.ext_fourier_components.FourierComponents
+        components = ext._feature_components
+        self.assertCountEqual(components, ext.get_features())
+        self.assertEqual(
+            components["Freq3_harmonics_rel_phase_2"], (2, "rel_phase", 2))
+        self.assertEqual(
+            components["Freq1_harmonics_amplitude_0"], (0, "amplitude", 0))
+
+    def test_invalid_requested_features(self):
+        ext = extractors.LombScargle()
+        with self.assertRaises(extractors.ExtractorContractError):
+            ext.set_requested_features(["Mean"])
+
+
+class KnownPeriodTestCase(FeetsTestCase):
+
+    def setUp(self):
+        random = np.random.RandomState(42)
+        self.time = np.sort(random.uniform(0, 100, 200))
+        self.magnitude = (
+            np.sin(2 * np.pi * self.time / 3.) +
+            random.normal(scale=0.1, size=200))
+        self.only = [
+            "PeriodLS", "Psi_eta", "Freq1_harmonics_amplitude_0",
+            "Freq2_harmonics_amplitude_0"]
+
+    def test_period_bypass_periodogram(self):
+        space = FeatureSpace(only=self.only)
+        found = dict(zip(*space.extract(
+            time=self.time, magnitude=self.magnitude)))
+        self.assertAllClose(found["PeriodLS"], 3., rtol=1e-2)
+
+        lscargle = extractors.ext_fourier_components.lscargle
+        with mock.patch(
+            "feets.extractors.ext_lomb_scargle.lscargle"
+        ) as ls_lscargle, mock.patch(
+            "feets.extractors.ext_fourier_components.lscargle",
+            side_effect=lscargle
+        ) as fc_lscargle:
+            result = dict(zip(*space.extract(
+                time=self.time, magnitude=self.magnitude,
+                period=found["PeriodLS"])))
+        ls_lscargle.assert_not_called()
+        # only the search of the second frequency
+        self.assertEqual(fc_lscargle.call_count, 1)
+        for fname in self.only:
+            self.assertAllClose(result[fname], found[fname])
+
+    def test_unknown_period(self):
+        space = FeatureSpace(only=["PeriodLS"])
+        expected = space.extract(time=self.time, magnitude=self.magnitude)[1]
+        for period in (None, np.nan):
+            values = space.extract(
+                time=self.time, magnitude=self.magnitude, period=period)[1]
+            self.assertAllClose(values, expected)
+
+    def test_batch_periods(self):
+        space = FeatureSpace(only=self.only)
+        lcs = [
+            {"time": self.time, "magnitude": self.magnitude, "period": 3.},
+            {"time": self.time, "magnitude": self.magnitude}]
+        values = space.extract_batch(lcs)[1]
+        for lc, row in zip(lcs, values):
+            self.assertAllClose(row, space.extract(**lc)[1])
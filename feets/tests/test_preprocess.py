@@ -61,6 +61,23 @@ class RemoveNoiseTestCase(FeetsTestCase):
         error = np.zeros(5)
         preprocess.remove_noise(time, mag, error)
 
+    def test_noise_mask(self):
+        random = np.random.RandomState(42)
+        time = np.arange(100)
+        mag = random.rand(100)
+        mag[[3, 50]] = 100
+        error = random.rand(100)
+        error[10] = 100
+
+        mask = preprocess.noise_mask(time, mag, error, std_limit=3)
+        self.assertArrayEqual(np.where(~mask)[0], [3, 10, 50])
+
+        ttime, tmag, terror = preprocess.remove_noise(
+            time, mag, error, std_limit=3)
+        self.assertArrayEqual(ttime, time[mask])
+        self.assertArrayEqual(tmag, mag[mask])
+        self.assertArrayEqual(terror, error[mask])
+
 
 class AlignTestCase(FeetsTestCase):
 
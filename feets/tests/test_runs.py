@@ -0,0 +1,181 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# The MIT License (MIT)
+
+# Copyright (c) 2017 Juan Cabral
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+# =============================================================================
+# FUTURE
+# =============================================================================
+
+from __future__ import unicode_literals
+
+
+# =============================================================================
+# DOC
+# =============================================================================
+
+__doc__ = """Checkpointed runs tests"""
+
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+import shutil
+import tempfile
+
+import numpy as np
+
+import pandas as pd
+
+import mock
+
+from .. import FeatureSpace
+from ..runs import CheckpointedRun, RunError, space_config
+
+from .core import FeetsTestCase
+
+
+# =============================================================================
+# TESTS
+# =============================================================================
+
+class CheckpointedRunTestCase(FeetsTestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.space = FeatureSpace(only=["Mean", "Std"])
+        random = np.random.RandomState(42)
+        self.lcs = [
+            ("lc{}".format(idx), {"magnitude": random.normal(size=20)})
+            for idx in range(10)]
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def load(self, run):
+        return pd.concat([
+            pd.read_csv(shard, index_col="id") for shard in run.shards()])
+
+    def test_resume(self):
+        run = CheckpointedRun(self.space, self.tmp, chunk_size=3)
+
+        # the process "dies" extracting the second chunk
+        original = FeatureSpace.extract_batch
+        calls = []
+
+        def extract_batch(space, lcs, **kwargs):
+            calls.append(len(calls))
+            if len(calls) == 2:
+                raise KeyboardInterrupt()
+            return original(space, lcs, **kwargs)
+
+        with mock.patch.object(FeatureSpace, "extract_batch", extract_batch):
+            with self.assertRaises(KeyboardInterrupt):
+                run.run(self.lcs)
+        self.assertEqual(len(run.shards()), 1)
+
+        # the rerun skips the first chunk
+        run = CheckpointedRun(self.space, self.tmp, chunk_size=3)
+        self.assertEqual(run.run(self.lcs), 7)
+        self.assertEqual(run.run(self.lcs), 0)
+
+        df = self.load(run)
+        self.assertEqual(list(df.index), [i for i, _ in self.lcs])
+        expected = self.space.extract_batch([lc for _, lc in self.lcs])[1]
+        self.assertAllClose(df[self.space.features_as_array_], expected)
+
+    def test_quarantine(self):
+        lcs = list(self.lcs)
+        lcs[4] = ("bad", {"time": np.arange(3.)})  # without magnitude
+        run = CheckpointedRun(self.space, self.tmp, chunk_size=3)
+        self.assertEqual(run.run(lcs), 9)
+        self.assertEqual(list(run.quarantine), ["bad"])
+        self.assertNotIn("bad", self.load(run).index)
+
+    def test_quarantine_light_curve_that_kills_the_process(self):
+        run = CheckpointedRun(self.space, self.tmp, chunk_size=5)
+        original = FeatureSpace.extract
+
+        def extract(space, **lc):
+            if lc["magnitude"] is self.lcs[7][1]["magnitude"]:
+                raise KeyboardInterrupt()
+            return original(space, **lc)
+
+        with mock.patch.object(
+            FeatureSpace, "extract", extract
+        ), mock.patch.object(
+            FeatureSpace, "extract_batch", side_effect=KeyboardInterrupt
+        ):
+            # the first chunk dies in the batch and is redone one by one,
+            # then the second chunk dies in the batch
+            with self.assertRaises(KeyboardInterrupt):
+                run.run(self.lcs)
+            run = CheckpointedRun(self.space, self.tmp, chunk_size=5)
+            with self.assertRaises(KeyboardInterrupt):
+                run.run(self.lcs)
+
+            # one by one until lc7 kills it again
+            run = CheckpointedRun(self.space, self.tmp, chunk_size=5)
+            with self.assertRaises(KeyboardInterrupt):
+                run.run(self.lcs)
+
+        run = CheckpointedRun(self.space, self.tmp, chunk_size=5)
+        run.run(self.lcs)
+        self.assertEqual(list(run.quarantine), ["lc7"])
+        self.assertEqual(len(self.load(run)), 9)
+
+    def test_config_changed(self):
+        CheckpointedRun(self.space, self.tmp, chunk_size=3)
+        with self.assertRaises(RunError):
+            CheckpointedRun(self.space, self.tmp, chunk_size=4)
+        with self.assertRaises(RunError):
+            CheckpointedRun(
+                FeatureSpace(only=["Mean"]), self.tmp, chunk_size=3)
+
+    def test_cascade_changed(self):
+        def space(predicate):
+            return FeatureSpace(
+                only=["Mean", "Std"], cascade=[(["Std"], predicate)])
+
+        CheckpointedRun(
+            space(lambda v: v["Std"] > 1), self.tmp, chunk_size=3)
+        CheckpointedRun(
+            space(lambda v: v["Std"] > 1), self.tmp, chunk_size=3)
+        with self.assertRaises(RunError):
+            CheckpointedRun(self.space, self.tmp, chunk_size=3)
+        with self.assertRaises(RunError):
+            CheckpointedRun(
+                space(lambda v: v["Std"] > 2), self.tmp, chunk_size=3)
+
+    def test_space_config_cascade(self):
+        def is_variable(values):
+            return values["Std"] > 1
+
+        space = FeatureSpace(
+            only=["Mean", "Std"], cascade=[(["Std"], is_variable)])
+        config = space_config(space)
+        self.assertEqual(config["cascade"][0][0], ["Std"])
+        self.assertIn("is_variable", config["cascade"][0][1])
+        self.assertEqual(space_config(self.space)["cascade"], [])
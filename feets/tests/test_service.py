@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# The MIT License (MIT)
+
+# Copyright (c) 2017 Juan Cabral
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+# =============================================================================
+# FUTURE
+# =============================================================================
+
+from __future__ import unicode_literals
+
+
+# =============================================================================
+# DOC
+# =============================================================================
+
+__doc__ = """Asyncio micro batching service tests"""
+
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+import json
+
+import sys
+
+import pytest
+
+from .. import FeatureSpace, DataRequiredError
+
+from .core import FeetsTestCase
+from .test_batch import random_lcs
+
+if sys.version_info < (3, 5):
+    pytest.skip(
+        "feets.service requires Python 3.5+", allow_module_level=True)
+
+import asyncio  # noqa
+
+from ..service import MicroBatcher, serve  # noqa
+
+
+# =============================================================================
+# TESTS
+# =============================================================================
+
+class MicroBatcherTestCase(FeetsTestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.space = FeatureSpace(only=["Mean", "Std", "Q31"])
+        self.lcs = random_lcs(sizes=[50] * 20)
+
+    def tearDown(self):
+        self.loop.close()
+        asyncio.set_event_loop(None)
+
+    def test_extract(self):
+        batcher = MicroBatcher(
+            self.space, max_batch_size=6, max_pending=4, max_workers=2)
+        results = self.loop.run_until_complete(asyncio.gather(*[
+            batcher.extract(**lc) for lc in self.lcs]))
+        self.loop.run_until_complete(batcher.close())
+
+        expected = self.space.extract_batch(self.lcs)[1]
+        self.assertAllClose([r[1] for r in results], expected)
+
+        stats = batcher.stats()
+        self.assertEqual(stats["curves"], len(self.lcs))
+        self.assertLessEqual(stats["mean_batch_size"], 6)
+        self.assertGreaterEqual(stats["batches"], 4)
+
+    def test_errors_are_isolated(self):
+        batcher = MicroBatcher(self.space, max_latency=0.05)
+        results = self.loop.run_until_complete(asyncio.gather(
+            batcher.extract(**self.lcs[0]), batcher.extract(time=[1.]),
+            return_exceptions=True))
+        self.loop.run_until_complete(batcher.close())
+
+        expected = self.space.extract(**self.lcs[0])[1]
+        self.assertAllClose(results[0][1], expected)
+        self.assertIsInstance(results[1], DataRequiredError)
+        self.assertEqual(batcher.stats()["errors"], 1)
+
+    def test_extract_arguments(self):
+        space = FeatureSpace(only=["Mean", "PeriodLS"])
+        lcs = [
+            dict(lc, mask=lc["time"] > 20, period=1.5)
+            for lc in self.lcs[:4]]
+        batcher = MicroBatcher(space, max_batch_size=2)
+        results = self.loop.run_until_complete(asyncio.gather(*[
+            batcher.extract(**lc) for lc in lcs]))
+
+        for lc, result in zip(lcs, results):
+            self.assertAllClose(result[1], space.extract(**lc)[1])
+            self.assertAllClose(result[1][1], 1.5)
+
+        with self.assertRaises(TypeError):
+            self.loop.run_until_complete(
+                batcher.extract(magnitude=[1., 2.], colour=[1., 2.]))
+        self.loop.run_until_complete(batcher.close())
+
+    def test_http_server(self):
+        batcher = MicroBatcher(self.space)
+        server = self.loop.run_until_complete(serve(batcher))
+        port = server.sockets[0].getsockname()[1]
+        lc = {k: v.tolist() for k, v in self.lcs[0].items()}
+        body = json.dumps(lc).encode("utf-8")
+        request = (
+            "POST /extract HTTP/1.1\r\nContent-Length: {}\r\n\r\n").format(
+                len(body)).encode("latin-1") + body
+
+        reader, writer = self.loop.run_until_complete(
+            asyncio.open_connection("127.0.0.1", port))
+        writer.write(request)
+        response = self.loop.run_until_complete(reader.read())
+        writer.close()
+        server.close()
+        self.loop.run_until_complete(server.wait_closed())
+        self.loop.run_until_complete(batcher.close())
+
+        head, payload = response.split(b"\r\n\r\n", 1)
+        self.assertTrue(head.startswith(b"HTTP/1.1 200"))
+        payload = json.loads(payload.decode("utf-8"))
+        self.assertAllClose(
+            payload["values"], self.space.extract(**self.lcs[0])[1])
@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# The MIT License (MIT)
+
+# Copyright (c) 2017 Juan Cabral
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+# =============================================================================
+# FUTURE
+# =============================================================================
+
+from __future__ import unicode_literals
+
+
+# =============================================================================
+# DOC
+# =============================================================================
+
+__doc__ = """scikit-learn transformer tests"""
+
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+import shutil
+import tempfile
+
+import mock
+
+from .. import FeatureSpace
+from ..transformer import FeetsTransformer, NotFittedError
+from ..datasets import macho
+
+from .core import FeetsTestCase
+from .test_batch import random_lcs
+
+
+# =============================================================================
+# TESTS
+# =============================================================================
+
+class FeetsTransformerTestCase(FeetsTestCase):
+
+    def setUp(self):
+        self.lcs = random_lcs()
+        self.only = ["Mean", "Std", "Con"]
+
+    def test_fit_transform(self):
+        transformer = FeetsTransformer(only=self.only, n_jobs=2)
+        values = transformer.fit_transform(self.lcs)
+        features, expected = FeatureSpace(only=self.only).extract_batch(
+            self.lcs)
+        self.assertArrayEqual(transformer.get_feature_names_out(), features)
+        self.assertAllClose(values, expected)
+
+    def test_band(self):
+        ids = macho.available_MACHO_lc()[:2]
+        datas = [macho.load_MACHO(mid) for mid in ids]
+        values = FeetsTransformer(only=self.only, band="B").fit_transform(
+            datas)
+        for data, row in zip(datas, values):
+            lc = data.data.B
+            expected = FeatureSpace(only=self.only).extract(
+                time=lc.time, magnitude=lc.magnitude, error=lc.error)[1]
+            self.assertAllClose(row, expected)
+
+    def test_params(self):
+        transformer = FeetsTransformer(only=self.only)
+        params = transformer.get_params()
+        self.assertEqual(params["only"], self.only)
+        self.assertIsNone(params["memory"])
+        transformer.set_params(n_jobs=3)
+        self.assertEqual(transformer.n_jobs, 3)
+        with self.assertRaises(ValueError):
+            transformer.set_params(foo=1)
+
+    def test_nested_params(self):
+        inner = FeetsTransformer(only=["Mean"])
+        transformer = FeetsTransformer(only=self.only, memory=inner)
+        params = transformer.get_params(deep=True)
+        self.assertIs(params["memory"], inner)
+        self.assertEqual(params["memory__only"], ["Mean"])
+        self.assertNotIn("memory__only", transformer.get_params(deep=False))
+
+        transformer.set_params(memory__n_jobs=2)
+        self.assertEqual(inner.n_jobs, 2)
+
+    def test_not_fitted(self):
+        with self.assertRaises(NotFittedError):
+            FeetsTransformer(only=self.only).transform(self.lcs)
+
+    def test_memory(self):
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location)
+
+        transformer = FeetsTransformer(only=self.only, memory=location)
+        transformer.fit(self.lcs)
+        with mock.patch.object(
+            transformer.space_, "extract_batch",
+            wraps=transformer.space_.extract_batch
+        ) as extract_batch:
+            first = transformer.transform(self.lcs)
+            again = transformer.set_params(n_jobs=2).transform(self.lcs)
+            self.assertEqual(extract_batch.call_count, 1)
+            self.assertAllClose(again, first)
+
+            transformer.transform(self.lcs[1:])
+            self.assertEqual(extract_batch.call_count, 2)
+
+        # the cache key is the fitted space, not the current params
+        transformer.set_params(only=["Mean"])
+        with mock.patch.object(
+            transformer.space_, "extract_batch",
+            wraps=transformer.space_.extract_batch
+        ) as extract_batch:
+            self.assertAllClose(transformer.transform(self.lcs), first)
+            extract_batch.assert_not_called()
+
+        # other features are other cache entry
+        other = FeetsTransformer(only=["Mean"], memory=location)
+        self.assertEqual(other.fit_transform(self.lcs).shape, (4, 1))
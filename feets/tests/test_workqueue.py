@@ -0,0 +1,220 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# The MIT License (MIT)
+
+# Copyright (c) 2017 Juan Cabral
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+# =============================================================================
+# FUTURE
+# =============================================================================
+
+from __future__ import unicode_literals
+
+
+# =============================================================================
+# DOC
+# =============================================================================
+
+__doc__ = """Cooperative work queue tests"""
+
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+import os
+import time
+import shutil
+import tempfile
+import multiprocessing
+
+import numpy as np
+
+import pandas as pd
+
+from .. import FeatureSpace
+from ..workqueue import (
+    SQLiteQueue, FileQueue, file_chunks, load_files, work, merge)
+
+from .core import FeetsTestCase
+from .test_batch import random_lcs
+
+
+# =============================================================================
+# FUNCTIONS
+# =============================================================================
+
+ONLY = ["Mean", "Std", "Q31"]
+
+
+def node(queue, directory, worker):
+    # a process standing in for a node
+    work(FeatureSpace(only=ONLY), queue, directory, worker=worker,
+         poll_interval=0.05)
+
+
+# =============================================================================
+# TESTS
+# =============================================================================
+
+class WorkQueueTestMixin(object):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.paths = []
+        for idx, lc in enumerate(random_lcs(sizes=[30, 40, 50] * 3)):
+            path = os.path.join(self.tmp, "lc{}.dat".format(idx))
+            np.savetxt(path, np.column_stack(
+                [lc["time"], lc["magnitude"], lc["error"]]))
+            self.paths.append(path)
+        self.queue = self.create_queue()
+        self.queue.put(file_chunks(self.paths, chunk_size=2))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_leases(self):
+        key, payload, attempts = self.queue.lease("a", timeout=60)
+        self.assertEqual(key, "00000000")
+        self.assertEqual(payload, self.paths[:2])
+        self.assertEqual(attempts, 1)
+        self.assertEqual(self.queue.lease("b", timeout=60)[0], "00000001")
+
+        # put is idempotent
+        self.queue.put(file_chunks(self.paths, chunk_size=2))
+        self.assertEqual(self.queue.remaining(), 5)
+
+        self.assertTrue(self.queue.complete(key, "a", "shard-a"))
+        self.assertEqual(self.queue.remaining(), 4)
+        self.assertEqual(self.queue.results(), [(key, "shard-a")])
+
+    def test_expired_lease(self):
+        key = self.queue.lease("a", timeout=0.01)[0]
+        time.sleep(0.05)
+        self.assertEqual(self.queue.lease("b", timeout=60)[::2], (key, 2))
+        self.assertEqual(self.queue.lease("c", timeout=60)[0], "00000001")
+
+        # the first completion wins
+        self.assertTrue(self.queue.complete(key, "b", "shard-b"))
+        self.assertFalse(self.queue.complete(key, "a", "shard-a"))
+        self.assertEqual(self.queue.results(), [(key, "shard-b")])
+
+    def test_several_nodes(self):
+        shards = os.path.join(self.tmp, "shards")
+        nodes = [
+            multiprocessing.Process(
+                target=node, args=(self.queue, shards, "node{}".format(i)))
+            for i in range(3)]
+        for proc in nodes:
+            proc.start()
+        for proc in nodes:
+            proc.join()
+        self.assertEqual(self.queue.remaining(), 0)
+
+        output = os.path.join(self.tmp, "features.csv")
+        self.assertEqual(merge(self.queue, shards, output), 9)
+
+        df = pd.read_csv(output, dtype={"id": str})
+        space = FeatureSpace(only=ONLY)
+        lcs = load_files(self.paths)
+        self.assertArrayEqual(df["id"], [lc_id for lc_id, _ in lcs])
+        features, values = space.extract_batch([lc for _, lc in lcs])
+        self.assertAllClose(df[list(features)].values, values)
+
+    def test_quarantine(self):
+        self.queue.put({"00000009": [os.path.join(self.tmp, "missing.dat")]})
+
+        def load(payload):
+            # lc3 can't be extracted
+            chunk = load_files(payload)
+            for lc_id, lc in chunk:
+                if lc_id == "lc3":
+                    del lc["magnitude"]
+            return chunk
+
+        shards = os.path.join(self.tmp, "shards")
+        work(FeatureSpace(only=ONLY), self.queue, shards, load=load,
+             worker="a")
+        self.assertEqual(self.queue.remaining(), 0)
+        self.assertCountEqual(
+            self.queue.quarantine(), ["lc3", "chunk-00000009"])
+
+        output = os.path.join(self.tmp, "features.csv")
+        self.assertEqual(merge(self.queue, shards, output), 8)
+        df = pd.read_csv(output, dtype={"id": str})
+        self.assertNotIn("lc3", list(df["id"]))
+
+    def test_max_attempts(self):
+        # the workers that leased the first chunk died
+        for worker in ("a", "b"):
+            self.queue.lease(worker, timeout=0.01)
+            time.sleep(0.05)
+
+        shards = os.path.join(self.tmp, "shards")
+        work(FeatureSpace(only=ONLY), self.queue, shards, worker="c",
+             max_attempts=2)
+        self.assertEqual(self.queue.remaining(), 0)
+        self.assertCountEqual(self.queue.quarantine(), ["lc0", "lc1"])
+        self.assertEqual(len(self.queue.results()), 4)
+
+    def test_merge_without_shards(self):
+        queue = self.create_queue("empty")
+        output = os.path.join(self.tmp, "features.csv")
+        self.assertEqual(
+            merge(queue, self.tmp, output, features=ONLY), 0)
+        self.assertEqual(list(pd.read_csv(output).columns), ["id"] + ONLY)
+
+    def test_merge_different_features(self):
+        shards = os.path.join(self.tmp, "shards")
+        work(FeatureSpace(only=ONLY), self.queue, shards, worker="a")
+
+        # the last shard was written by a worker with other space
+        shard = os.path.join(shards, self.queue.results()[-1][1])
+        df = pd.read_csv(shard, dtype={"id": str})
+        df.insert(1, "Skew", 0.)
+        df.to_csv(shard, index=False)
+
+        with self.assertRaises(ValueError):
+            merge(self.queue, shards, os.path.join(self.tmp, "out.csv"))
+
+    def test_merge_incomplete(self):
+        with self.assertRaises(ValueError):
+            merge(self.queue, self.tmp, os.path.join(self.tmp, "out.csv"))
+
+
+class SQLiteQueueTestCase(WorkQueueTestMixin, FeetsTestCase):
+
+    def create_queue(self, name="queue"):
+        return SQLiteQueue(os.path.join(self.tmp, name + ".db"))
+
+
+class FileQueueTestCase(WorkQueueTestMixin, FeetsTestCase):
+
+    def create_queue(self, name="queue"):
+        return FileQueue(os.path.join(self.tmp, name))
+
+    def test_no_temporary_files(self):
+        self.queue.lease("a", timeout=60)
+        for sub in ("chunks", "leases"):
+            names = os.listdir(os.path.join(self.tmp, "queue", sub))
+            self.assertFalse([n for n in names if n.startswith(".")])
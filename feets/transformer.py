@@ -0,0 +1,283 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# The MIT License (MIT)
+
+# Copyright (c) 2017 Juan Cabral
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+# =============================================================================
+# FUTURE
+# =============================================================================
+
+from __future__ import unicode_literals
+
+
+# =============================================================================
+# DOCS
+# =============================================================================
+
+__doc__ = """scikit-learn compatible transformer to extract features of light
+curves inside a pipeline.
+
+.. code-block:: python
+
+    pipe = Pipeline([
+        ("features", FeetsTransformer(
+            only=["Mean", "Std", "PeriodLS"], n_jobs=4,
+            memory="cache_dir")),
+        ("clf", RandomForestClassifier())])
+    GridSearchCV(pipe, {"clf__n_estimators": [100, 500]}).fit(lcs, y)
+
+With ``memory`` the features are cached (with ``joblib.Memory``) by the
+content of the light curves and the configuration of the space, so a grid
+search over the downstream estimators never extracts twice the features
+of the same folds.
+
+scikit-learn is not required to use the transformer, but if it is installed
+``FeetsTransformer`` extends its ``BaseEstimator`` and ``TransformerMixin``.
+
+"""
+
+__all__ = ["FeetsTransformer"]
+
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+import inspect
+
+import numpy as np
+
+import six
+
+import joblib
+
+from .core import FeatureSpace
+from .batch import LightCurveBatch
+from .runs import space_config
+
+try:
+    from sklearn.base import BaseEstimator, TransformerMixin
+    from sklearn.exceptions import NotFittedError
+except ImportError:
+
+    class BaseEstimator(object):
+        """Same ``get_params()`` and ``set_params()`` contract of
+        ``sklearn.base.BaseEstimator``: the parameters are the arguments
+        of ``__init__`` and the nested parameters of the parameters that
+        are estimators are named ``<parameter>__<nested>``.
+
+        """
+
+        @classmethod
+        def _get_param_names(cls):
+            if hasattr(inspect, "signature"):
+                args = list(inspect.signature(cls.__init__).parameters)
+            else:  # pragma: no cover
+                args = inspect.getargspec(cls.__init__).args
+            return sorted(arg for arg in args if arg != "self")
+
+        def get_params(self, deep=True):
+            """Get the parameters of the estimator (and of the nested
+            estimators if ``deep`` is True).
+
+            """
+            params = {}
+            for name in self._get_param_names():
+                value = getattr(self, name)
+                if (
+                    deep and hasattr(value, "get_params") and
+                    not isinstance(value, type)
+                ):
+                    params.update(
+                        ("{}__{}".format(name, key), nested)
+                        for key, nested in value.get_params().items())
+                params[name] = value
+            return params
+
+        def set_params(self, **params):
+            """Set the parameters of the estimator (and of the nested
+            estimators with ``<parameter>__<nested>``).
+
+            """
+            valid = self.get_params(deep=True)
+            nested = {}
+            for key, value in params.items():
+                name, delim, sub_key = key.partition("__")
+                if name not in valid:
+                    msg = "Invalid parameter '{}' for {}"
+                    raise ValueError(msg.format(name, type(self).__name__))
+                if delim:
+                    nested.setdefault(name, {})[sub_key] = value
+                else:
+                    setattr(self, name, value)
+                    valid[name] = value
+            for name, sub_params in nested.items():
+                valid[name].set_params(**sub_params)
+            return self
+
+    class TransformerMixin(object):
+
+        def fit_transform(self, X, y=None, **fit_params):
+            return self.fit(X, y, **fit_params).transform(X)
+
+    class NotFittedError(ValueError, AttributeError):
+        """Raised if the transformer is used before ``fit()``."""
+
+
+# =============================================================================
+# FUNCTIONS
+# =============================================================================
+
+def _extract(space, config, batch, n_jobs, backend):
+    # config and batch are the cache key, the rest is ignored by the cache
+    return space.extract_batch(batch, n_jobs=n_jobs, backend=backend)[1]
+
+
+def _check_memory(memory):
+    # Memory(None) only executes the function
+    if memory is None or isinstance(memory, six.string_types):
+        return joblib.Memory(memory, verbose=0)
+    if not hasattr(memory, "cache"):
+        msg = "'memory' must be None, a path or a joblib.Memory. Found {!r}"
+        raise ValueError(msg.format(memory))
+    return memory
+
+
+# =============================================================================
+# TRANSFORMER
+# =============================================================================
+
+class FeetsTransformer(TransformerMixin, BaseEstimator):
+    """Extract the features of a list of light curves as a scikit-learn
+    transformer.
+
+    Parameters
+    ----------
+
+    data, only, exclude, dtype, profile
+        The same parameters of ``feets.FeatureSpace``.
+    extractor_kwargs : dict, optional
+        The parameters of the extractors (the ``**kwargs`` of
+        ``feets.FeatureSpace``), as ``{"ExtractorName": {...}}``.
+    band : str, optional
+        If is provided ``X`` must be a list of ``feets.datasets.base.Data``
+        and the light curves of this band are used.
+    n_jobs : int, optional
+        Number of jobs of ``FeatureSpace.extract_batch()``.
+    backend : str, default "threading"
+        The joblib backend of ``FeatureSpace.extract_batch()``.
+    memory : None, str or joblib.Memory
+        Cache of the extracted features. A string is the location of a
+        new ``joblib.Memory``. The cache key is the content of the light
+        curves and the configuration of the space created by ``fit()``
+        (see ``feets.runs.space_config()``; ``n_jobs`` and ``backend`` are
+        ignored).
+
+    Attributes
+    ----------
+
+    space_ : feets.FeatureSpace
+        The space created in ``fit()``.
+    features_ : ndarray
+        The names of the features, in the order of the columns returned by
+        ``transform()``.
+
+    Notes
+    -----
+
+    ``X`` can be a ``feets.batch.LightCurveBatch`` or any iterable of
+    dict-like light curves (see ``LightCurveBatch.from_lightcurves()``).
+    Extracting the features doesn't require to learn anything, so ``fit()``
+    only validates the parameters and creates the space.
+
+    """
+
+    def __init__(self, data=None, only=None, exclude=None, dtype=None,
+                 profile=None, extractor_kwargs=None, band=None,
+                 n_jobs=None, backend="threading", memory=None):
+        self.data = data
+        self.only = only
+        self.exclude = exclude
+        self.dtype = dtype
+        self.profile = profile
+        self.extractor_kwargs = extractor_kwargs
+        self.band = band
+        self.n_jobs = n_jobs
+        self.backend = backend
+        self.memory = memory
+
+    def _space_params(self):
+        params = dict(self.extractor_kwargs or {})
+        params.update(
+            data=self.data, only=self.only, exclude=self.exclude,
+            dtype=self.dtype, profile=self.profile)
+        return params
+
+    def _as_batch(self, X):
+        if isinstance(X, LightCurveBatch):
+            return X
+        if self.band is not None:
+            return LightCurveBatch.from_datas(X, self.band)
+        return LightCurveBatch.from_lightcurves(X)
+
+    def fit(self, X=None, y=None):
+        """Create the feature space. ``X`` and ``y`` are ignored.
+
+        Returns
+        -------
+
+        self
+
+        """
+        self.space_ = FeatureSpace(**self._space_params())
+        self.features_ = self.space_.features_as_array_
+        return self
+
+    def transform(self, X):
+        """Extract the features of the light curves of ``X``.
+
+        Returns
+        -------
+
+        ndarray
+            An array with shape ``(n_light_curves, n_features)``.
+
+        """
+        if not hasattr(self, "space_"):
+            msg = (
+                "This {} instance is not fitted yet. Call 'fit' before "
+                "using this transformer.")
+            raise NotFittedError(msg.format(type(self).__name__))
+        batch = self._as_batch(X)
+        extract = _check_memory(self.memory).cache(
+            _extract, ignore=["space", "n_jobs", "backend"])
+        # the features come from the fitted space, not from the current
+        # parameters (they can be changed after fit)
+        return extract(
+            self.space_, space_config(self.space_), batch,
+            self.n_jobs, self.backend)
+
+    def get_feature_names_out(self, input_features=None):
+        """Return the names of the extracted features."""
+        return np.asarray(self.features_, dtype=object)
@@ -30,6 +30,13 @@
 __doc__ = """feets utilities"""
 
 
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+import numpy as np
+
+
 # =============================================================================
 # FUNCTIONS
 # =============================================================================
@@ -50,3 +57,57 @@ def indent(s, c=" ", n=4):
     """
     indentation = c * n
     return "\n".join([indentation + l for l in s.splitlines()])
+
+
+def is_narrow_dtype(dtype):
+    """Return True if the floating point ``dtype`` has less precision than
+    float64.
+
+    """
+    return np.dtype(dtype).itemsize < np.dtype(np.float64).itemsize
+
+
+def is_sorted(values):
+    """Return True if the 1D array ``values`` is sorted in ascending order
+    (a single pass, without sorting). An array with NaN is not sorted.
+
+    """
+    values = np.asarray(values)
+    return bool(np.all(values[1:] >= values[:-1]))
+
+
+def time_epoch(time):
+    """The epoch used to re-center a time vector: the integer part of the
+    first observation.
+
+    """
+    return float(np.floor(np.nanmin(time)))
+
+
+def recenter_time(time, dtype, epoch=None):
+    """Subtract an epoch to a time vector (in float64) and then cast it to
+    ``dtype``. In this way the large absolute values (like MJD) don't
+    consume the precision of the narrow dtypes.
+
+    Parameters
+    ----------
+
+    time : array-like
+        The times to re-center.
+    dtype : numpy dtype
+        The dtype of the result.
+    epoch : float or None
+        The value to subtract. If is None ``time_epoch(time)`` is used.
+
+    Returns
+    -------
+
+    time : ndarray
+        The re-centered times.
+    epoch : float
+        The subtracted value.
+
+    """
+    time = np.asarray(time, dtype=np.float64)
+    epoch = time_epoch(time) if epoch is None else epoch
+    return (time - epoch).astype(dtype), epoch
@@ -0,0 +1,638 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# The MIT License (MIT)
+
+# Copyright (c) 2017 Juan Cabral
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# =============================================================================
+# FUTURE
+# =============================================================================
+
+from __future__ import unicode_literals
+
+
+# =============================================================================
+# DOCS
+# =============================================================================
+
+__doc__ = """Cooperative extraction of a catalog by several nodes without a
+central scheduler.
+
+The catalog is splitted in chunks registered in a shared work queue. Every
+node runs ``work()``, which leases a chunk, extracts it with
+``FeatureSpace.extract_batch()`` and writes its own result shard in a
+shared directory. A lease that is not completed before its timeout (the
+node died or is too slow) is leased again by another node; if both finish,
+the first completion wins and the other shard is discarded. Finally
+``merge()`` joins the shards in the order of the chunks.
+
+As in ``feets.runs.CheckpointedRun``, the light curves that can't be
+extracted are quarantined: if the batch of a chunk fails their light
+curves are extracted one by one and the ones that fail are excluded from
+the shard, and a chunk leased more than ``max_attempts`` times (the nodes
+that took it died) is completed without a shard. The quarantined light
+curves are reported by ``WorkQueue.quarantine()``.
+
+The queue is pluggable (see ``WorkQueue``). Two backends are included,
+both usable over shared storage:
+
+- ``SQLiteQueue``: a SQLite database. Prefer a local filesystem or one
+  with working POSIX locks (some NFS setups don't have them).
+- ``FileQueue``: a directory, using only atomic file creations and
+  renames.
+
+.. code-block:: python
+
+    # once
+    queue = feets.workqueue.SQLiteQueue("/shared/run/queue.db")
+    queue.put(feets.workqueue.file_chunks(paths, chunk_size=1000))
+
+    # in every node
+    feets.workqueue.work(fs, queue, "/shared/run/shards")
+
+    # at the end
+    feets.workqueue.merge(queue, "/shared/run/shards", "features.csv")
+
+The expiration of the leases compares timestamps of different machines,
+so their clocks must be synchronized (within a small fraction of the lease
+timeout).
+
+"""
+
+__all__ = [
+    "WorkQueue",
+    "SQLiteQueue",
+    "FileQueue",
+    "file_chunks",
+    "load_files",
+    "work",
+    "merge"]
+
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+import os
+import io
+import json
+import time
+import uuid
+import errno
+import socket
+import sqlite3
+from contextlib import closing
+
+import numpy as np
+
+import six
+
+from .runs import (
+    WRITERS, DEFAULT_COLUMNS, resolve_output_format, parse_name, load_lc)
+
+
+# =============================================================================
+# QUEUES
+# =============================================================================
+
+class WorkQueue(object):
+    """Base class of the work queues.
+
+    A chunk is identified by a string ``key`` (the chunks are leased in
+    the order of the keys) and has a JSON serializable ``payload`` that
+    describes their light curves (for example a list of files).
+
+    """
+
+    def put(self, chunks):
+        """Register the ``{key: payload}`` chunks. The keys already
+        registered are ignored, so every node can call it.
+
+        """
+        raise NotImplementedError()
+
+    def lease(self, worker, timeout):
+        """Lease the first chunk that is not completed nor leased (or
+        with an expired lease) for ``timeout`` seconds.
+
+        Returns
+        -------
+
+        tuple or None
+            ``(key, payload, attempts)`` or None if no chunk is available.
+            ``attempts`` is the number of times the chunk was leased,
+            including this one.
+
+        """
+        raise NotImplementedError()
+
+    def complete(self, key, worker, shard, quarantine=None):
+        """Record the ``shard`` with the results of the chunk ``key``
+        (``None`` if no light curve of the chunk was extracted) and the
+        ``{id: error}`` of their quarantined light curves.
+
+        Returns
+        -------
+
+        bool
+            False if the chunk was already completed by another worker
+            (the shard must be discarded).
+
+        """
+        raise NotImplementedError()
+
+    def remaining(self):
+        """The number of chunks not completed."""
+        raise NotImplementedError()
+
+    def results(self):
+        """The list of ``(key, shard)`` of the completed chunks with a
+        shard sorted by key.
+
+        """
+        raise NotImplementedError()
+
+    def quarantine(self):
+        """``{id: error}`` of the light curves quarantined by the
+        completed chunks.
+
+        """
+        raise NotImplementedError()
+
+
+class SQLiteQueue(WorkQueue):
+    """Work queue stored in the SQLite database ``path``.
+
+    The leases are taken inside ``BEGIN IMMEDIATE`` transactions so only
+    one worker can take every chunk.
+
+    """
+
+    def __init__(self, path, timeout=60.):
+        self.path = path
+        self.timeout = timeout
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS chunks ("
+                "key TEXT PRIMARY KEY, payload TEXT NOT NULL, worker TEXT, "
+                "expires REAL, attempts INTEGER NOT NULL DEFAULT 0, "
+                "done INTEGER NOT NULL DEFAULT 0, shard TEXT, "
+                "quarantine TEXT)")
+
+    def _connect(self):
+        # autocommit mode, the transactions are explicit
+        return sqlite3.connect(
+            self.path, timeout=self.timeout, isolation_level=None)
+
+    def put(self, chunks):
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(
+                "INSERT OR IGNORE INTO chunks (key, payload) VALUES (?, ?)",
+                [(six.text_type(k), json.dumps(p))
+                 for k, p in chunks.items()])
+            conn.execute("COMMIT")
+
+    def lease(self, worker, timeout):
+        now = time.time()
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT key, payload, attempts FROM chunks WHERE done = 0 "
+                "AND (expires IS NULL OR expires < ?) ORDER BY key LIMIT 1",
+                (now,)).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE chunks SET worker = ?, expires = ?, "
+                    "attempts = attempts + 1 WHERE key = ?",
+                    (worker, now + timeout, row[0]))
+            conn.execute("COMMIT")
+        if row is None:
+            return None
+        return row[0], json.loads(row[1]), row[2] + 1
+
+    def complete(self, key, worker, shard, quarantine=None):
+        with closing(self._connect()) as conn:
+            cursor = conn.execute(
+                "UPDATE chunks SET worker = ?, done = 1, shard = ?, "
+                "quarantine = ? WHERE key = ? AND done = 0",
+                (worker, shard, json.dumps(quarantine or {}), key))
+            return cursor.rowcount == 1
+
+    def remaining(self):
+        with closing(self._connect()) as conn:
+            return conn.execute(
+                "SELECT COUNT(*) FROM chunks WHERE done = 0"
+            ).fetchone()[0]
+
+    def results(self):
+        with closing(self._connect()) as conn:
+            return conn.execute(
+                "SELECT key, shard FROM chunks WHERE done = 1 AND "
+                "shard IS NOT NULL ORDER BY key").fetchall()
+
+    def quarantine(self):
+        quarantine = {}
+        with closing(self._connect()) as conn:
+            for row in conn.execute(
+                "SELECT quarantine FROM chunks WHERE done = 1 ORDER BY key"
+            ):
+                quarantine.update(json.loads(row[0]))
+        return quarantine
+
+
+def _create_exclusive(path, content):
+    # atomically create path with its content; False if already exists.
+    # The content is written in a hidden temporary file and hard linked to
+    # path, so the other workers never see a partially written file
+    dirname, basename = os.path.split(path)
+    tmp = os.path.join(dirname, ".{}.{}.tmp".format(
+        basename, uuid.uuid4().hex))
+    with io.open(tmp, "w", encoding="utf-8") as fp:
+        fp.write(six.text_type(json.dumps(content)))
+    try:
+        os.link(tmp, path)
+    except OSError as err:
+        if err.errno != errno.EEXIST:
+            raise
+        return False
+    finally:
+        os.remove(tmp)
+    return True
+
+
+def _read_json(path):
+    # None if the file doesn't exists
+    try:
+        with io.open(path, encoding="utf-8") as fp:
+            return json.load(fp)
+    except (IOError, OSError, ValueError):
+        return None
+
+
+def _listdir(path):
+    # without the temporary files of _create_exclusive
+    return [name for name in os.listdir(path) if not name.startswith(".")]
+
+
+class FileQueue(WorkQueue):
+    """Work queue stored in ``directory`` with one file per chunk
+    (``chunks/<key>.json``), per lease (``leases/<key>``), per completion
+    (``done/<key>``) and per attempt (``attempts/<key>/<uuid>``).
+
+    The files are written in a temporary file and created with an atomic
+    hard link (that fails if the file exists) and the expired leases are
+    broken with an atomic rename, so it only needs a filesystem with hard
+    links and atomic renames.
+
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        for sub in ("chunks", "leases", "done", "attempts"):
+            path = os.path.join(directory, sub)
+            if not os.path.isdir(path):
+                try:
+                    os.makedirs(path)
+                except OSError as err:  # created by another node
+                    if err.errno != errno.EEXIST:
+                        raise
+
+    def _path(self, sub, key):
+        return os.path.join(self.directory, sub, key)
+
+    def _keys(self):
+        chunks = _listdir(os.path.join(self.directory, "chunks"))
+        return sorted(c[:-5] for c in chunks if c.endswith(".json"))
+
+    def put(self, chunks):
+        for key, payload in chunks.items():
+            key = six.text_type(key)
+            _create_exclusive(self._path("chunks", key + ".json"), payload)
+
+    def _break_lease(self, key, now):
+        # rename the expired lease to a unique name: only one worker can
+        # do it. If meanwhile it was renewed by other worker it's restored
+        path = self._path("leases", key)
+        broken = "{}.broken-{}".format(path, uuid.uuid4().hex)
+        try:
+            os.rename(path, broken)
+        except OSError:
+            return False
+        lease = _read_json(broken)
+        if lease is not None and lease["expires"] >= now:
+            try:
+                os.link(broken, path)
+            except OSError:
+                pass
+            os.remove(broken)
+            return False
+        os.remove(broken)
+        return True
+
+    def lease(self, worker, timeout):
+        for key in self._keys():
+            if os.path.exists(self._path("done", key)):
+                continue
+            now = time.time()
+            content = {"worker": worker, "expires": now + timeout}
+            path = self._path("leases", key)
+            if not _create_exclusive(path, content):
+                lease = _read_json(path)
+                if lease is None or lease["expires"] >= now:
+                    continue
+                if not self._break_lease(key, now):
+                    continue
+                if not _create_exclusive(path, content):
+                    continue
+            payload = _read_json(self._path("chunks", key + ".json"))
+            return key, payload, self._add_attempt(key)
+        return None
+
+    def _add_attempt(self, key):
+        # one file per attempt, the number of files is the number of
+        # attempts
+        path = self._path("attempts", key)
+        try:
+            os.mkdir(path)
+        except OSError as err:
+            if err.errno != errno.EEXIST:
+                raise
+        io.open(os.path.join(path, uuid.uuid4().hex), "w").close()
+        return len(_listdir(path))
+
+    def complete(self, key, worker, shard, quarantine=None):
+        done = _create_exclusive(self._path("done", key), {
+            "worker": worker, "shard": shard,
+            "quarantine": quarantine or {}})
+        lease = _read_json(self._path("leases", key))
+        if lease is not None and lease["worker"] == worker:
+            try:
+                os.remove(self._path("leases", key))
+            except OSError:
+                pass
+        return done
+
+    def remaining(self):
+        done = set(_listdir(os.path.join(self.directory, "done")))
+        return sum(1 for key in self._keys() if key not in done)
+
+    def _records(self):
+        for key in sorted(_listdir(os.path.join(self.directory, "done"))):
+            yield key, _read_json(self._path("done", key))
+
+    def results(self):
+        return [
+            (key, record["shard"]) for key, record in self._records()
+            if record["shard"] is not None]
+
+    def quarantine(self):
+        quarantine = {}
+        for _, record in self._records():
+            quarantine.update(record["quarantine"])
+        return quarantine
+
+
+# =============================================================================
+# CHUNKS
+# =============================================================================
+
+def file_chunks(paths, chunk_size=1000):
+    """Split the light curve files ``paths`` in chunks for
+    ``WorkQueue.put()``. The keys are the zero padded number of the chunk.
+
+    """
+    paths = list(paths)
+    return {
+        "{:08d}".format(idx): paths[start:start + chunk_size]
+        for idx, start in enumerate(range(0, len(paths), chunk_size))}
+
+
+def load_files(payload, columns=DEFAULT_COLUMNS, band=None):
+    """Load the ``(id, lc)`` of the light curve files of a chunk created
+    with ``file_chunks()`` (the id is the name of the file without the
+    band and the extension, as in ``feets extract``).
+
+    """
+    return [
+        (parse_name(path, band), load_lc(path, columns))
+        for path in payload]
+
+
+# =============================================================================
+# DRIVER
+# =============================================================================
+
+def _default_worker():
+    return "{}-{}".format(socket.gethostname(), os.getpid())
+
+
+def _shard_files(path):
+    # the npy writer adds files with the ids and the features
+    return [path, path + ".ids.txt", path + ".features.txt"]
+
+
+def _extract_chunk(space, chunk, attempts, n_jobs):
+    # (ids, values, quarantine) of a chunk. After a failed batch or a
+    # failed attempt the light curves are extracted one by one
+    if attempts == 1:
+        try:
+            values = space.extract_batch(
+                [lc for _, lc in chunk], n_jobs=n_jobs)[1]
+        except Exception:
+            pass
+        else:
+            return [lc_id for lc_id, _ in chunk], values, {}
+    ids, values, quarantine = [], [], {}
+    for lc_id, lc in chunk:
+        try:
+            values.append(space.extract(**lc)[1])
+        except Exception as err:
+            quarantine[lc_id] = repr(err)
+        else:
+            ids.append(lc_id)
+    return ids, np.asarray(values), quarantine
+
+
+def work(space, queue, directory, load=load_files, worker=None,
+         lease_timeout=3600., poll_interval=10., output_format="csv",
+         n_jobs=None, max_attempts=3):
+    """Extract chunks leased from ``queue`` until all are completed.
+
+    Parameters
+    ----------
+
+    space : FeatureSpace
+    queue : WorkQueue
+    directory : str
+        Shared directory of the result shards (created if not exists).
+        Every shard is named ``shard-<key>-<worker>.<format>``.
+    load : callable, default load_files
+        Receives the payload of a chunk and returns a list of
+        ``(id, lc)``.
+    worker : str, optional
+        The name of this worker, by default ``<hostname>-<pid>``.
+    lease_timeout : float, default 3600
+        Seconds to extract a chunk before other worker can lease it.
+    poll_interval : float, default 10
+        Seconds to wait when all the remaining chunks are leased by other
+        workers (their leases can expire).
+    output_format : str, default "csv"
+        The format of the shards (csv, parquet or npy).
+    n_jobs : int, optional
+        Number of threads for ``FeatureSpace.extract_batch()``.
+    max_attempts : int, default 3
+        Times a chunk can be leased. The first attempt extracts the chunk
+        in a batch and the next ones one light curve at a time; after the
+        last one all the light curves of the chunk are quarantined.
+
+    Returns
+    -------
+
+    int
+        The number of chunks completed by this worker.
+
+    Notes
+    -----
+
+    The errors of a chunk never stop the worker: the light curves that
+    raise an exception are quarantined (see ``WorkQueue.quarantine()``)
+    and a chunk that can't be loaded is quarantined as ``chunk-<key>``.
+
+    """
+    worker = worker or _default_worker()
+    output_format = resolve_output_format(output_format, None)
+    if not os.path.isdir(directory):
+        try:
+            os.makedirs(directory)
+        except OSError as err:
+            if err.errno != errno.EEXIST:
+                raise
+
+    completed = 0
+    while True:
+        leased = queue.lease(worker, lease_timeout)
+        if leased is None:
+            if not queue.remaining():
+                break
+            time.sleep(poll_interval)
+            continue
+
+        key, payload, attempts = leased
+        try:
+            chunk = [
+                (six.text_type(lc_id), lc) for lc_id, lc in load(payload)]
+        except Exception as err:
+            ids, quarantine = [], {"chunk-{}".format(key): repr(err)}
+        else:
+            if attempts > max_attempts:
+                # the workers died extracting this chunk
+                msg = "The chunk failed {} attempts".format(max_attempts)
+                ids, quarantine = [], {lc_id: msg for lc_id, _ in chunk}
+            else:
+                ids, values, quarantine = _extract_chunk(
+                    space, chunk, attempts, n_jobs)
+
+        shard = path = None
+        if ids:
+            shard = "shard-{}-{}{}".format(key, worker, output_format)
+            path = os.path.join(directory, shard)
+            writer = WRITERS[output_format](path, space.features_as_array_)
+            try:
+                writer.write(ids, values)
+            finally:
+                writer.close()
+
+        if queue.complete(key, worker, shard, quarantine):
+            completed += 1
+        elif path is not None:
+            # other worker completed the chunk after our lease expired
+            for fpath in _shard_files(path):
+                if os.path.exists(fpath):
+                    os.remove(fpath)
+    return completed
+
+
+def _read_shard(path):
+    # (ids, features, values) of a shard
+    import pandas as pd
+    if path.endswith(".npy"):
+        with io.open(path + ".ids.txt", encoding="utf-8") as fp:
+            ids = fp.read().splitlines()
+        with io.open(path + ".features.txt", encoding="utf-8") as fp:
+            features = fp.read().splitlines()
+        return ids, features, np.load(path)
+    if path.endswith(".parquet"):
+        df = pd.read_parquet(path)
+    else:
+        df = pd.read_csv(path, dtype={"id": six.text_type})
+    features = [c for c in df.columns if c != "id"]
+    return list(df["id"]), features, df[features].values
+
+
+def merge(queue, directory, output, output_format=None, features=None):
+    """Join the shards of a completed queue in ``output``, in the order
+    of the chunks.
+
+    ``features`` are the columns of the output when the queue has no
+    shards (by default only the id); otherwise the ones of the shards are
+    used, and all the shards must have the same features (in the same
+    order) or ``ValueError`` is raised.
+
+    Returns
+    -------
+
+    int
+        The number of light curves written.
+
+    """
+    remaining = queue.remaining()
+    if remaining:
+        msg = "The queue still has {} chunks to extract".format(remaining)
+        raise ValueError(msg)
+    output_format = resolve_output_format(output_format, output)
+
+    writer, columns, total = None, None, 0
+    try:
+        for key, shard in queue.results():
+            ids, shard_features, values = _read_shard(
+                os.path.join(directory, shard))
+            if writer is None:
+                columns = list(shard_features)
+                writer = WRITERS[output_format](output, columns)
+            elif list(shard_features) != columns:
+                # a worker with other space
+                msg = (
+                    "The features of the shard '{}' differ from the ones "
+                    "of the previous shards: expected [{}], found [{}]"
+                ).format(
+                    shard, ", ".join(columns), ", ".join(shard_features))
+                raise ValueError(msg)
+            writer.write(ids, values)
+            total += len(ids)
+        if writer is None:
+            # an empty queue or every chunk was quarantined
+            writer = WRITERS[output_format](output, list(features or ()))
+    finally:
+        if writer is not None:
+            writer.close()
+    return total
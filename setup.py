@@ -38,11 +38,13 @@
 # =============================================================================
 
 import os
+import sys
 
 from ez_setup import use_setuptools
 use_setuptools()
 
 from setuptools import setup, find_packages
+from setuptools.command.build_py import build_py
 
 os.environ["FEETS_IN_SETUP"] = "True"
 import feets
@@ -62,6 +64,21 @@ REQUIREMENTS = [
 # FUNCTIONS
 # =============================================================================
 
+class BuildPy(build_py):
+    """Skip the modules that requires a newer Python (feets.service uses
+    async/await, Python 3.5+).
+
+    """
+
+    def find_package_modules(self, package, package_dir):
+        modules = build_py.find_package_modules(self, package, package_dir)
+        if sys.version_info < (3, 5):
+            modules = [
+                mod for mod in modules
+                if (mod[0], mod[1]) != ("feets", "service")]
+        return modules
+
+
 def do_setup():
     setup(
         name=feets.NAME,
@@ -94,6 +111,9 @@ def do_setup():
             pkg for pkg in find_packages() if pkg.startswith("feets")],
         py_modules=["ez_setup"],
         install_requires=REQUIREMENTS,
+        cmdclass={"build_py": BuildPy},
+        entry_points={
+            "console_scripts": ["feets=feets.cli:main"]},
     )
 
 